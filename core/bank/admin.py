@@ -49,8 +49,10 @@ class CardDesignAdmin(admin.ModelAdmin):
 @admin.register(Card)
 class CardAdmin(admin.ModelAdmin):
     list_display = ('id', 'bank_account', 'money',)
+    list_select_related = ('bank_account__balance',)
 
 
 @admin.register(Deposit)
 class DepositAdmin(admin.ModelAdmin):
     list_display = ('id', 'bank_account', 'money',)
+    list_select_related = ('bank_account__balance',)
@@ -0,0 +1,143 @@
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse
+from django.views import View
+
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import serializers, views
+from .pagination import TransactionPagination
+
+
+USER_MODEL = get_user_model()
+
+
+class AsyncAPIView(View):
+    """
+    Базовый async view для read эндпоинтов под ASGI (uvicorn).
+    DRF 3.13 не поддерживает async views, поэтому аутентификация и проверка
+    прав выполняются штатными классами DRF за один переход в sync поток,
+    данные читаются async ORM, а ответ рендерится JSONRenderer.
+    """
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    renderer = JSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(
+            request,
+            authenticators=[auth() for auth in self.authentication_classes]
+        )
+        self.request = request
+        try:
+            await sync_to_async(self.check_permissions)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def check_permissions(self, request):
+        request.user  # аутентификация, может поднять AuthenticationFailed
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated,
+                            exceptions.AuthenticationFailed)):
+            authenticators = self.request.authenticators
+            if authenticators:
+                headers['WWW-Authenticate'] = authenticators[0].authenticate_header(
+                    self.request
+                )
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data),
+            content_type=self.renderer.media_type,
+            status=status
+        )
+
+
+class AsyncUserListAPIView(AsyncAPIView):
+    """
+    Async вариант списков user_* эндпоинтов: queryset и фильтры берутся
+    у sync view (sync_view_class), страница читается async ORM.
+    """
+
+    sync_view_class = None
+    serializer_class = None
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    # prefetch_related() не поддерживается async итерацией в Django 4.1,
+    # связи догружаются для уже прочитанной страницы
+    prefetch_related = ()
+
+    async def get(self, request, user_pk=None, *args, **kwargs):
+        user = await self.aget_user(request, user_pk)
+        if user is None:
+            return self.render(
+                {'non_field_errors': 'Передан неверный id пользователя.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        queryset = self.get_queryset(request, user).prefetch_related(None)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        if self.prefetch_related:
+            await sync_to_async(prefetch_related_objects)(
+                page, *self.prefetch_related
+            )
+
+        serializer = self.serializer_class(page, many=True)
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+    async def aget_user(self, request, user_pk=None):
+        if user_pk is None or user_pk == request.user.pk:
+            return request.user
+        try:
+            return await USER_MODEL.objects.aget(pk=user_pk)
+        except USER_MODEL.DoesNotExist:
+            return None
+
+    def get_queryset(self, request, user):
+        return self.sync_view_class().get_queryset(user)
+
+
+class UserCardListAsyncAPI(AsyncUserListAPIView):
+    sync_view_class = views.UserCardListAPI
+    serializer_class = serializers.CardSerializer
+    prefetch_related = ('card_type__cashbacks',)
+
+
+class UserDepositListAsyncAPI(AsyncUserListAPIView):
+    sync_view_class = views.UserDepositListAPI
+    serializer_class = serializers.DepositSeializer
+
+
+class UserTransactionListAsyncAPI(AsyncUserListAPIView):
+    sync_view_class = views.UserTransactionListAPI
+    serializer_class = serializers.TransactionSerializer
+    pagination_class = TransactionPagination
+
+    def get_queryset(self, request, user):
+        sync_view = self.sync_view_class()
+        return sync_view.get_queryset(user, **sync_view.get_filter_params(request))
@@ -0,0 +1,176 @@
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.db.models import F, Sum
+from django.dispatch import Signal
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AccountBalance, AccountDailyBalance, Posting, Transaction
+
+
+BACKFILL_BATCH_SIZE = 5000
+BALANCE_CHART_MAX_DAYS = 366
+
+# Балансы счетов изменены (record_daily_balances), аргумент user_pks -
+# владельцы счетов
+balances_changed = Signal()
+
+
+def get_current_balances(bank_account_pks=None):
+    """
+    Текущие балансы {bank_account_id: money} счетов,
+    без bank_account_pks - всех счетов.
+    """
+    queryset = AccountBalance.objects.all()
+    if bank_account_pks is not None:
+        queryset = queryset.filter(bank_account_id__in=bank_account_pks)
+    return dict(queryset.values_list('bank_account_id', 'balance'))
+
+
+def upsert_daily_balances(rows, batch_size=None):
+    """INSERT ... ON CONFLICT (bank_account, date) DO UPDATE SET balance."""
+    return AccountDailyBalance.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        # Django 4.1 подставляет имена в ON CONFLICT как есть - нужна колонка
+        unique_fields=['bank_account_id', 'date'],
+        update_fields=['balance']
+    )
+
+
+def save_daily_balances(balances, on_date=None, batch_size=None):
+    """Записывает остатки {bank_account_id: balance} на дату on_date."""
+    on_date = on_date or timezone.localdate()
+    upsert_daily_balances(
+        [
+            AccountDailyBalance(bank_account_id=pk, date=on_date, balance=balance)
+            for pk, balance in balances.items()
+        ],
+        batch_size=batch_size
+    )
+
+
+def record_daily_balances(bank_account_pks):
+    """
+    Записывает текущие балансы счетов в остатки за сегодня и отправляет
+    balances_changed с владельцами счетов (тем же запросом).
+    Вызывается после изменения балансов, пока строки счетов заблокированы
+    (transfers.lock_bank_accounts берут transfer, bulk_transfer, начисление
+    процентов и списание платы), - прочитанные значения не устареют
+    до commit.
+    """
+    if bank_account_pks:
+        rows = list(AccountBalance.objects.filter(
+            bank_account_id__in=bank_account_pks
+        ).values_list('bank_account_id', 'balance', 'bank_account__user_id'))
+        save_daily_balances({pk: balance for pk, balance, _ in rows})
+        balances_changed.send(
+            sender=AccountBalance, user_pks={user_pk for *_, user_pk in rows}
+        )
+
+
+def get_balance_at(bank_account, on_date):
+    """Остаток счета на конец дня on_date, None - если операций еще не было."""
+    if on_date >= timezone.localdate():
+        return get_current_balances([bank_account.pk]).get(bank_account.pk)
+    return AccountDailyBalance.objects.filter(
+        bank_account=bank_account, date__lte=on_date
+    ).order_by('-date').values_list('balance', flat=True).first()
+
+
+def get_balance_chart(bank_account, date_from, date_to):
+    """
+    Остатки счета на каждый день [date_from, date_to]: строки периода
+    и последняя строка до него, дни без операций заполняются предыдущим
+    остатком. Дни до первой операции по счету пропускаются.
+    """
+    rows = AccountDailyBalance.objects.filter(bank_account=bank_account)
+    previous = rows.filter(date__lt=date_from).order_by('-date').first()
+    balances = {
+        row.date: row.balance
+        for row in rows.filter(date__gte=date_from, date__lte=date_to)
+    }
+
+    balance = None if previous is None else previous.balance
+    chart = []
+    day = date_from
+    while day <= date_to:
+        balance = balances.get(day, balance)
+        if balance is not None:
+            chart.append(AccountDailyBalance(
+                bank_account=bank_account, date=day, balance=balance
+            ))
+        day += timedelta(days=1)
+    return chart
+
+
+def iter_daily_changes(queryset, account_field, sign, date_field='date',
+                       amount_field='money'):
+    """(дата, bank_account_id, изменение) по дням в порядке (дата, счет)."""
+    rows = queryset.filter(**{f'{account_field}__isnull': False}).annotate(
+        day=TruncDate(date_field), account=F(account_field)
+    ).values('day', 'account').annotate(total=Sum(amount_field)).order_by(
+        'day', 'account'
+    )
+    for row in rows.values_list('day', 'account', 'total').iterator():
+        yield row[0], row[1], sign * row[2]
+
+
+def get_adjustment_postings():
+    """
+    Проводки счетов без Transaction: прямые изменения баланса через
+    Card/Deposit.save() (и операции, запись Transaction которых удалена).
+    """
+    return Posting.objects.filter(transaction__isnull=True)
+
+
+def backfill_daily_balances(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Заполняет остатки счетов по истории Transaction и проводкам
+    корректировок баланса (get_adjustment_postings).
+    Начальный остаток счета - текущий баланс минус сумма всех его операций
+    и корректировок, затем история читается потоком по дням (GROUP BY день,
+    счет) и остаток записывается за каждый день с изменениями. Повторный
+    запуск перезаписывает те же строки. Возвращает число записанных строк.
+    """
+    balances = get_current_balances()
+    running = defaultdict(Decimal, balances)
+    for queryset, account_field, sign, amount_field in (
+        (Transaction.objects.all(), 'to_number', -1, 'money'),
+        (Transaction.objects.all(), 'from_number', 1, 'money'),
+        (get_adjustment_postings(), 'bank_account', -1, 'amount'),
+    ):
+        totals = queryset.filter(
+            **{f'{account_field}__isnull': False}
+        ).values_list(account_field).annotate(total=Sum(amount_field)).order_by()
+        for pk, total in totals:
+            running[pk] += sign * total
+
+    changes = heapq.merge(
+        iter_daily_changes(Transaction.objects.all(), 'to_number', 1),
+        iter_daily_changes(Transaction.objects.all(), 'from_number', -1),
+        iter_daily_changes(
+            get_adjustment_postings(), 'bank_account', 1,
+            date_field='created_at', amount_field='amount'
+        ),
+    )
+    count = 0
+    batch = []
+    for (day, pk), day_changes in groupby(changes, key=lambda row: row[:2]):
+        running[pk] += sum(change for _, _, change in day_changes)
+        batch.append(AccountDailyBalance(
+            bank_account_id=pk, date=day, balance=running[pk]
+        ))
+        if len(batch) >= batch_size:
+            count += len(upsert_daily_balances(batch))
+            batch = []
+    count += len(upsert_daily_balances(batch))
+
+    # Строка за сегодня с текущим балансом - у счетов без операций тоже
+    save_daily_balances(balances, batch_size=batch_size)
+    return count + len(balances)
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Max, Min, Value, When
+
+from .models import AccountBalance, Card, JobCheckpoint, Transaction
+from .balances import record_daily_balances
+from .journal import create_postings
+from .processes import run_in_pool
+from .transfers import lock_bank_accounts, get_or_create_transaction_type
+
+
+BILLING_JOB = 'card_billing'
+BILLING_CHUNK_SIZE = 5000
+BILLING_PROCESSES = 4
+SERVICE_FEE_TRANSACTION_TYPE = 'Обслуживание карты'
+PUSH_FEE_TRANSACTION_TYPE = 'Уведомления по карте'
+
+
+def get_fee_expressions():
+    """
+    Месячная плата карты: обслуживание (бесплатно на тарифе
+    с free_card_maintenance) и уведомления (если включены is_push).
+    Цены берутся join'ами card_type и bank_account__user__tarif по pk.
+    """
+    service_fee = Case(
+        When(bank_account__user__tarif__free_card_maintenance=True, then=Value(0)),
+        default=F('card_type__service_price'),
+        output_field=models.IntegerField()
+    )
+    push_fee = Case(
+        When(is_push=True, then=F('card_type__push_price')),
+        default=Value(0),
+        output_field=models.IntegerField()
+    )
+    return service_fee, push_fee
+
+
+def get_partition_checkpoints(period, partitions):
+    """
+    Контрольные точки задачи за период, по одной на диапазон pk карт.
+    Диапазоны фиксируются при первом запуске и не меняются при перезапуске,
+    карты, созданные после первого запуска, в этом периоде не списываются.
+    """
+    checkpoints = JobCheckpoint.objects.filter(job=BILLING_JOB, period=period)
+    if not checkpoints.exists():
+        bounds = Card.objects.aggregate(min_id=Min('pk'), max_id=Max('pk'))
+        min_id, max_id = bounds['min_id'] or 1, bounds['max_id'] or 0
+        step = max(1, -(-(max_id - min_id + 1) // partitions))
+        starts = range(min_id, max(max_id, min_id) + 1, step)
+        JobCheckpoint.objects.bulk_create(
+            (
+                JobCheckpoint(
+                    job=BILLING_JOB,
+                    period=period,
+                    partition=i,
+                    last_id=start - 1,
+                    end_id=min(start + step - 1, max_id)
+                )
+                for i, start in enumerate(starts)
+            ),
+            ignore_conflicts=True
+        )
+    return list(checkpoints.order_by('partition'))
+
+
+def bill_cards(on_date=None, processes=BILLING_PROCESSES,
+               chunk_size=BILLING_CHUNK_SIZE):
+    """
+    Списывает месячную плату за обслуживание и уведомления со всех
+    действующих карт за месяц on_date.
+    Карты делятся на processes диапазонов pk, диапазоны обрабатываются
+    параллельно в пуле процессов, каждый - пачками по chunk_size со своей
+    контрольной точкой. Повторный запуск за тот же месяц продолжает
+    незавершенные диапазоны и не списывает плату дважды.
+    Возвращает контрольные точки диапазонов.
+    """
+    on_date = on_date or date.today()
+    period = on_date.strftime('%Y-%m')
+    # Типы создаются до запуска процессов, чтобы не создать их дважды
+    get_or_create_transaction_type(SERVICE_FEE_TRANSACTION_TYPE)
+    get_or_create_transaction_type(PUSH_FEE_TRANSACTION_TYPE)
+
+    pending = [
+        (checkpoint.pk, on_date, chunk_size)
+        for checkpoint in get_partition_checkpoints(period, processes)
+        if not checkpoint.is_completed
+    ]
+    run_in_pool(bill_partition, pending, processes)
+
+    return list(
+        JobCheckpoint.objects.filter(job=BILLING_JOB, period=period).order_by(
+            'partition'
+        )
+    )
+
+
+def bill_partition(checkpoint_pk, on_date, chunk_size):
+    transaction_types = (
+        get_or_create_transaction_type(SERVICE_FEE_TRANSACTION_TYPE),
+        get_or_create_transaction_type(PUSH_FEE_TRANSACTION_TYPE),
+    )
+    fees = get_fee_expressions()
+    is_completed = False
+    while not is_completed:
+        with transaction.atomic():
+            checkpoint = JobCheckpoint.objects.select_for_update().get(
+                pk=checkpoint_pk
+            )
+            is_completed = checkpoint.is_completed or bill_chunk(
+                checkpoint, on_date, fees, transaction_types, chunk_size
+            )
+
+
+def bill_chunk(checkpoint, on_date, fees, transaction_types, chunk_size):
+    """
+    Списывает плату со следующей пачки карт диапазона после checkpoint.last_id.
+    Возвращает True, если диапазон обработан полностью.
+    Должна вызываться внутри transaction.atomic().
+    """
+    pks = list(
+        Card.objects.filter(
+            pk__gt=checkpoint.last_id, pk__lte=checkpoint.end_id
+        ).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+    )
+    if not pks:
+        checkpoint.is_completed = True
+        checkpoint.save(update_fields=['is_completed', 'updated_at'])
+        return True
+
+    cards = Card.objects.filter(pk__gte=pks[0], pk__lte=pks[-1])
+    lock_bank_accounts(cards.values('bank_account_id'))
+
+    service_fee, push_fee = fees
+    # Плата списывается целиком, баланс карты не уходит в минус
+    charges = list(
+        cards.filter(completion_date__gte=on_date).annotate(
+            service_fee=service_fee,
+            push_fee=push_fee,
+            fee=ExpressionWrapper(
+                service_fee + push_fee, output_field=models.IntegerField()
+            )
+        ).filter(
+            fee__gt=0, bank_account__balance__balance__gte=F('fee')
+        ).values_list(
+            'pk', 'bank_account_id', 'currency', 'service_fee', 'push_fee'
+        )
+    )
+
+    # UPDATE ... WHERE pk IN (...) на каждую различную сумму платы,
+    # сумм мало - они определяются ценами типов карт
+    pks_by_fee = defaultdict(list)
+    for _, bank_account_id, _, service, push in charges:
+        pks_by_fee[service + push].append(bank_account_id)
+    for fee, fee_pks in pks_by_fee.items():
+        AccountBalance.objects.filter(pk__in=fee_pks).update(
+            balance=F('balance') - fee, version=F('version') + 1
+        )
+
+    create_postings(Transaction.objects.bulk_create(
+        Transaction(
+            from_number_id=bank_account_id,
+            money=money,
+            currency=currency,
+            transaction_type=transaction_type,
+        )
+        for _, bank_account_id, currency, *money_values in charges
+        for transaction_type, money in zip(transaction_types, money_values)
+        if money
+    ))
+    record_daily_balances([bank_account_id for _, bank_account_id, *_ in charges])
+
+    checkpoint.last_id = pks[-1]
+    checkpoint.processed += len(charges)
+    checkpoint.save(update_fields=['last_id', 'processed', 'updated_at'])
+    return False
@@ -0,0 +1,96 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+
+from .response import Response
+
+
+GENERATION_KEY = 'bank:generation:{model}'
+RESPONSE_KEY = 'bank:response:{etag}'
+
+
+def get_model_label(model):
+    return model._meta.label_lower
+
+
+def get_generations(models):
+    """
+    Текущие поколения моделей. None - если кэш не хранит значения
+    (DummyCache), тогда кэшировать ответы нельзя.
+    """
+    keys = {model: GENERATION_KEY.format(model=get_model_label(model))
+            for model in models}
+    values = cache.get_many(keys.values())
+    generations = []
+    for model, key in keys.items():
+        generation = values.get(key)
+        if generation is None:
+            cache.add(key, 1, timeout=None)
+            generation = cache.get(key)
+            if generation is None:
+                return None
+        generations.append(generation)
+    return generations
+
+
+def bump_generation(model):
+    key = GENERATION_KEY.format(model=get_model_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate_model(model):
+    # Повторный сброс после commit - для запросов, успевших закэшировать
+    # ответ по еще не закоммиченным данным.
+    bump_generation(model)
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+def cache_response(*models):
+    """
+    Кэширует data ответа GET по версиям (поколениям) моделей models.
+    Поколение модели увеличивается сигналами (bank.signals) при любом
+    изменении, поэтому старые ключи просто перестают использоваться.
+    Отдает ETag и 304 Not Modified на совпадающий If-None-Match - без
+    обращения к бд и без тела ответа.
+    """
+
+    def decorator(get):
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            generations = get_generations(models)
+            if generations is None:
+                return get(self, request, *args, **kwargs)
+
+            key_source = '|'.join([
+                request.build_absolute_uri(),
+                request.accepted_renderer.format,
+                *map(str, generations),
+            ])
+            etag = quote_etag(hashlib.md5(key_source.encode()).hexdigest())
+            headers = {'ETag': etag}
+
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            response_key = RESPONSE_KEY.format(etag=etag.strip('"'))
+            data = cache.get(response_key)
+            if data is None:
+                response = get(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(response_key, response.data)
+                data = response.data
+            return Response(data, headers=headers)
+
+        return wrapper
+
+    return decorator
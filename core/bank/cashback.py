@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CardType
+
+
+CASHBACK_RATES_VERSION_KEY = 'bank:cashback_rates:version'
+CASHBACK_RATES_KEY = 'bank:cashback_rates:{version}'
+
+
+def build_cashback_rates():
+    """
+    Строит таблицу {(card_type_id, transaction_type_id): максимальный процент}
+    одним запросом по связям CardType.cashbacks и Cashback.transaction_type.
+    """
+    rates = {}
+    rows = CardType.cashbacks.through.objects.filter(
+        cashback__transaction_type__isnull=False
+    ).values_list('cardtype_id', 'cashback__transaction_type', 'cashback__percent')
+
+    for card_type_id, transaction_type_id, percent in rows:
+        key = (card_type_id, transaction_type_id)
+        if percent > rates.get(key, 0):
+            rates[key] = percent
+    return rates
+
+
+class CashbackRates:
+    """
+    Кэш процентов кэшбэка в памяти процесса.
+    Сбрасывается сигналами (bank.signals) при изменении CardType, Cashback
+    и их m2m связей. При CASHBACK_RATES_SHARED_CACHE = True таблица хранится
+    в django cache под ключом с версией, и сброс в одном воркере gunicorn
+    виден всем остальным: каждый воркер сверяет версию перед поиском.
+    """
+
+    def __init__(self):
+        self._state = (None, None)  # (version, rates)
+
+    def get_percent(self, card_type_id, transaction_type_id):
+        return self.get_rates().get((card_type_id, transaction_type_id), 0)
+
+    def get_rates(self):
+        version, rates = self._state
+
+        if not settings.CASHBACK_RATES_SHARED_CACHE:
+            if rates is None:
+                rates = build_cashback_rates()
+                self._state = (None, rates)
+            return rates
+
+        current_version = cache.get(CASHBACK_RATES_VERSION_KEY)
+        if current_version is None:
+            cache.add(CASHBACK_RATES_VERSION_KEY, 1)
+            current_version = cache.get(CASHBACK_RATES_VERSION_KEY, 1)
+        if rates is not None and version == current_version:
+            return rates
+
+        rates_key = CASHBACK_RATES_KEY.format(version=current_version)
+        rates = cache.get(rates_key)
+        if rates is None:
+            rates = build_cashback_rates()
+            cache.set(rates_key, rates, timeout=None)
+        self._state = (current_version, rates)
+        return rates
+
+    def invalidate(self):
+        self._state = (None, None)
+        if settings.CASHBACK_RATES_SHARED_CACHE:
+            try:
+                cache.incr(CASHBACK_RATES_VERSION_KEY)
+            except ValueError:
+                cache.set(CASHBACK_RATES_VERSION_KEY, 1, timeout=None)
+
+
+cashback_rates = CashbackRates()
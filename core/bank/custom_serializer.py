@@ -1,7 +1,57 @@
+import time
+
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
 from rest_framework import serializers
 
+from .representation import get_representation
+
+
+# Сериализатор выполнил is_valid или data, аргумент seconds - время выполнения
+serializer_measured = Signal()
+
+
+class MeasuredSerializerMixin:
+    """Время is_valid и data отправляется сигналом serializer_measured."""
+
+    def is_valid(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().is_valid(*args, **kwargs)
+        finally:
+            serializer_measured.send(
+                sender=type(self), seconds=time.perf_counter() - start
+            )
+
+    @property
+    def data(self):
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            serializer_measured.send(
+                sender=type(self), seconds=time.perf_counter() - start
+            )
+
+
+class CustomListSerializer(MeasuredSerializerMixin, serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        represent = get_representation(self.child)
+        tz = timezone.get_current_timezone()
+        return [represent(item, tz) for item in iterable]
+
+
+class CustomSerializer(MeasuredSerializerMixin, serializers.Serializer):
+    class Meta:
+        list_serializer_class = CustomListSerializer
+
+    def to_representation(self, instance):
+        # Представление, собранное по полям этого сериализатора, см. representation
+        return get_representation(self)(instance, timezone.get_current_timezone())
 
-class CustomSerializer(serializers.Serializer):
     def create(self, validated_data):
         return self.get_model().objects.create(**validated_data)
 
@@ -0,0 +1,34 @@
+# Поле выгрузки -> путь в бд
+TRANSACTION_EXPORT_FIELDS = {
+    'id': 'id',
+    'date': 'date',
+    'from_number': 'from_number__number',
+    'to_number': 'to_number__number',
+    'money': 'money',
+    'currency': 'currency',
+    'transaction_type': 'transaction_type__title',
+    'cashback_money': 'cashback_money',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def transaction_row_to_dict(row):
+    """Строка values_list -> dict выгрузки без DRF сериализатора."""
+    row = dict(zip(TRANSACTION_EXPORT_FIELDS, row))
+    row['date'] = row['date'].isoformat()
+    row['money'] = str(row['money'])
+    return row
+
+
+def iter_transaction_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Построчно отдает транзакции queryset в хронологическом порядке.
+    iterator() читает бд порциями по chunk_size (server-side cursor в postgres),
+    поэтому расход памяти не зависит от длины истории.
+    """
+    rows = queryset.order_by('date', 'id').values_list(
+        *TRANSACTION_EXPORT_FIELDS.values()
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield transaction_row_to_dict(row)
@@ -1,7 +1,35 @@
+from collections.abc import Mapping
 from typing import Iterable
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+
 from rest_framework import serializers
 from rest_framework.validators import ValidationError
 
+from .models import MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES
+
+
+class MoneyField(serializers.DecimalField):
+    """
+    Денежное поле.
+    Принимает число (или строку) и хранит Decimal с точностью до копеек,
+    в ответе отдает число, как прежний FloatField, - JSON API не меняется.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', MONEY_MAX_DIGITS)
+        kwargs.setdefault('decimal_places', MONEY_DECIMAL_PLACES)
+        kwargs.setdefault('coerce_to_string', False)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        value = super().to_representation(value)
+        return None if value is None else float(value)
+
+
+# Ключ identity map в context корневого сериализатора
+RELATED_OBJECTS_CONTEXT_KEY = '_custom_related_objects'
+
 
 class CustomRelatedField(serializers.RelatedField):
     """
@@ -10,7 +38,11 @@ class CustomRelatedField(serializers.RelatedField):
     Необходимо передать model и modle_serializer.
     Поиск осуществляется по полю lookup_field='pk'.
     Если передается many=True, необходимо будет передать model_serializer.
+    select_related - связи, которые нужно загрузить вместе с объектом.
     Встроенная валидации на существование объекта в бд.
+    Объекты загружаются одним filter(lookup__in=...) на модель сразу для всех
+    полей корневого сериализатора (и всех элементов при many=True) и хранятся
+    в identity map в его context - повторные pk не запрашиваются.
     """
 
     def __new__(cls, *args, **kwargs):
@@ -18,44 +50,119 @@ class CustomRelatedField(serializers.RelatedField):
             return CustomManyRelatedField(*args, **kwargs)
         return super().__new__(cls, *args, **kwargs)
 
-    def __init__(self, model, model_serializer, lookup_field='pk', **kwargs):
+    def __init__(self, model, model_serializer, lookup_field='pk',
+                 select_related=(), **kwargs):
         self.model = model
         self.model_serializer = model_serializer
         self.lookup_field = lookup_field
+        self.select_related = tuple(select_related)
         super().__init__(**kwargs)
 
     def to_representation(self, value):
         return self.model_serializer().to_representation(value)
 
     def to_internal_value(self, data):
-        try:
-            lookup_kwargs = {self.lookup_field: data}
-            obj = self.model.objects.get(**lookup_kwargs)
-        except:
-            raise ValidationError(
-                f'Объекта с {self.lookup_field} = {data} не существует.'
-            )
-        return obj
+        objects = self.get_objects([data])
+        if objects[0] is None:
+            raise ValidationError(self.get_missing_message(data))
+        return objects[0]
 
     def get_queryset(self):
         pass
 
+    def get_missing_message(self, value):
+        return f'Объекта с {self.lookup_field} = {value} не существует.'
+
+    def get_lookup_model_field(self):
+        meta = self.model._meta
+        if self.lookup_field == 'pk':
+            return meta.pk
+        return meta.get_field(self.lookup_field)
+
+    def get_lookup_key(self, value):
+        """Значение из запроса -> ключ identity map (None, если значение неверное)."""
+        try:
+            return self.get_lookup_model_field().to_python(value)
+        except (DjangoValidationError, TypeError):
+            return None
+
+    @property
+    def identity_key(self):
+        return self.model, self.lookup_field, self.select_related
+
+    def get_identity_map(self):
+        related_objects = self.context.setdefault(RELATED_OBJECTS_CONTEXT_KEY, {})
+        return related_objects.setdefault(self.identity_key, {})
+
+    def get_objects(self, values):
+        """Объекты для values в том же порядке, None - если объекта нет."""
+        identity_map = self.get_identity_map()
+        keys = [self.get_lookup_key(value) for value in values]
+
+        if any(key is not None and key not in identity_map for key in keys):
+            to_load = {key for key in keys if key is not None}
+            to_load.update(self.get_sibling_keys())
+            to_load.difference_update(identity_map)
+
+            model_field = self.get_lookup_model_field()
+            queryset = self.model.objects.filter(**{
+                f'{self.lookup_field}__in': to_load
+            })
+            if self.select_related:
+                queryset = queryset.select_related(*self.select_related)
+            identity_map.update(dict.fromkeys(to_load))
+            for obj in queryset:
+                identity_map[getattr(obj, model_field.attname)] = obj
+
+        return [identity_map.get(key) if key is not None else None for key in keys]
+
+    def get_sibling_keys(self):
+        """
+        Значения всех полей корневого сериализатора с той же моделью
+        из initial_data - чтобы загрузить их тем же запросом.
+        """
+        root = self.root
+        data = getattr(root, 'initial_data', None)
+        if isinstance(root, serializers.ListSerializer):
+            fields = root.child.fields
+            items = data if isinstance(data, list) else []
+        elif isinstance(root, serializers.Serializer):
+            fields = root.fields
+            items = [data]
+        else:
+            return set()
+
+        related_fields = [
+            field for field in fields.values()
+            if getattr(field, 'identity_key', None) == self.identity_key
+        ]
+        keys = set()
+        for item in items:
+            if not isinstance(item, Mapping):
+                continue
+            for field in related_fields:
+                value = item.get(field.field_name)
+                values = value if isinstance(field, CustomManyRelatedField) else [value]
+                if not isinstance(values, list):
+                    continue
+                keys.update(self.get_lookup_key(value) for value in values)
+        keys.discard(None)
+        return keys
+
 
 class CustomManyRelatedField(CustomRelatedField):
     def to_internal_value(self, data):
-        if not isinstance(data, Iterable):
+        if not isinstance(data, Iterable) or isinstance(data, (str, Mapping)):
             raise ValidationError('Необходимо передать список.')
-        try:
-            related_obj_list = []
-            for pk_value in list(data):
-                pk_v = pk_value
-                lookup_kwargs = {self.lookup_field: pk_value}
-                related_obj_list.append(self.model.objects.get(**lookup_kwargs))
-        except:
+        data = list(data)
+        objects = self.get_objects(data)
+
+        missing = [value for value, obj in zip(data, objects) if obj is None]
+        if missing:
             raise ValidationError(
-                f'Объекта с {self.lookup_field} = {pk_v} не существует.'
+                [self.get_missing_message(value) for value in missing]
             )
-        return related_obj_list
+        return objects
 
     def to_representation(self, manager):
         # manager - ManyRelatedManager (django.db.models.fields.related_descriptors)
@@ -0,0 +1,109 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from rest_framework import status
+
+from .models import IdempotencyKey
+from .response import Response
+
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def get_expiration_time():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def get_request_hash(request):
+    request_hash = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    request_hash.update(request.body)
+    return request_hash.hexdigest()
+
+
+def get_stored_key(user, key):
+    """Один запрос по уникальному индексу (user, key)."""
+    return IdempotencyKey.objects.filter(
+        user=user, key=key, created_at__gte=get_expiration_time()
+    ).first()
+
+
+def replay_response(stored, request_hash):
+    if stored.request_hash != request_hash:
+        return Response(
+            {'non_field_errors': (
+                f'Ключ {IDEMPOTENCY_KEY_HEADER} уже использован для другого запроса.'
+            )},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(
+        stored.response_data,
+        status=stored.status_code,
+        headers={REPLAYED_HEADER: 'true'}
+    )
+
+
+def idempotent_response(post):
+    """
+    Обработка заголовка Idempotency-Key для POST.
+    Повтор запроса с тем же ключом получает сохраненный ответ без вызова
+    post - без валидации и изменения балансов. Ключ создается до вызова
+    post в той же транзакции бд, поэтому параллельный повтор ждет на
+    уникальном индексе и затем получает сохраненный ответ.
+    Сохраняются только успешные ответы, после ошибки (нехватка средств и т.п.)
+    запрос с тем же ключом можно повторить.
+    """
+
+    @wraps(post)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None or not request.user.is_authenticated:
+            return post(self, request, *args, **kwargs)
+        if not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {'non_field_errors': (
+                    f'Длина {IDEMPOTENCY_KEY_HEADER} должна быть '
+                    f'от 1 до {IDEMPOTENCY_KEY_MAX_LENGTH} символов.'
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_hash = get_request_hash(request)
+        stored = get_stored_key(request.user, key)
+        if stored is not None:
+            return replay_response(stored, request_hash)
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    stored = IdempotencyKey.objects.create(
+                        user=request.user, key=key, request_hash=request_hash
+                    )
+            except IntegrityError:
+                stored = IdempotencyKey.objects.get(user=request.user, key=key)
+                if stored.created_at >= get_expiration_time():
+                    # Параллельный запрос с тем же ключом уже завершился
+                    return replay_response(stored, request_hash)
+                # Ключ с истекшим сроком, еще не удаленный cleanup_idempotency_keys
+                stored.delete()
+                stored = IdempotencyKey.objects.create(
+                    user=request.user, key=key, request_hash=request_hash
+                )
+
+            response = post(self, request, *args, **kwargs)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+                return response
+
+            stored.status_code = response.status_code
+            stored.response_data = response.data
+            stored.save(update_fields=['status_code', 'response_data'])
+            return response
+
+    return wrapper
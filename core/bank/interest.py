@@ -0,0 +1,170 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Least, Round
+
+from .models import (
+    AccountBalance,
+    BankAccount,
+    Deposit,
+    JobCheckpoint,
+    Transaction,
+    MONEY_MAX_DIGITS,
+    MONEY_DECIMAL_PLACES,
+)
+from .balances import record_daily_balances
+from .journal import create_postings
+from .transfers import lock_bank_accounts, get_or_create_transaction_type
+
+
+ACCRUAL_CHUNK_SIZE = 10000
+INTEREST_TRANSACTION_TYPE = 'Начисление процентов'
+
+# Число начислений в году для периода
+ACCRUAL_PERIODS = {
+    'daily': 365,
+    'monthly': 12,
+}
+
+MONEY_FIELD = models.DecimalField(
+    max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES
+)
+RATE_FIELD = models.DecimalField(max_digits=12, decimal_places=6)
+# Баланс вклада (AccountBalance) в запросах по Deposit
+DEPOSIT_BALANCE = 'bank_account__balance__balance'
+
+
+def get_period_key(on_date, period):
+    if period == 'daily':
+        return on_date.isoformat()
+    return on_date.strftime('%Y-%m')
+
+
+def get_interest_expression(period):
+    """
+    SQL выражение начисления за период для строки Deposit:
+    баланс * (ставка вклада + надбавка тарифа) / 100 / число периодов в году,
+    с округлением до копеек и не больше, чем осталось до max_value.
+    Одно и то же выражение используется в SELECT (суммы для Transaction)
+    и в UPDATE, поэтому суммы совпадают без пересчета в python.
+    """
+    tarif_rate = Subquery(
+        BankAccount.objects.filter(pk=OuterRef('bank_account_id')).values(
+            'user__tarif__additional_interest_rate'
+        )[:1],
+        output_field=models.FloatField()
+    )
+    tarif_rate = Cast(Coalesce(tarif_rate, Value(0.0)), RATE_FIELD)
+    rate = Cast('interest_rate', RATE_FIELD) + tarif_rate
+    interest = Round(
+        F(DEPOSIT_BALANCE) * rate / Value(Decimal(100 * ACCRUAL_PERIODS[period])),
+        precision=MONEY_DECIMAL_PLACES,
+        output_field=MONEY_FIELD
+    )
+    headroom = ExpressionWrapper(
+        F('max_value') - F(DEPOSIT_BALANCE), output_field=MONEY_FIELD
+    )
+    return Least(interest, headroom, output_field=MONEY_FIELD)
+
+
+def get_active_deposits(on_date):
+    """Вклады, по которым начисляются проценты на дату on_date."""
+    return Deposit.objects.filter(
+        date_issue__lte=on_date,
+        completion_date__gte=on_date,
+        bank_account__balance__balance__gt=0,
+        bank_account__balance__balance__gte=F('min_value'),
+        bank_account__balance__balance__lt=F('max_value'),
+    )
+
+
+def accrue_interest(on_date=None, period='monthly', chunk_size=ACCRUAL_CHUNK_SIZE):
+    """
+    Начисляет проценты по всем активным вкладам за период, в который
+    попадает on_date (месяц или день).
+    Вклады обрабатываются пачками по диапазону pk: на пачку один UPDATE
+    AccountBalance (balance = balance + начисление) и один bulk_create
+    записей Transaction.
+    Прогресс хранится в JobCheckpoint и фиксируется в транзакции пачки,
+    поэтому повторный запуск за тот же период ничего не начисляет повторно,
+    а прерванный - продолжает с последней пачки.
+    Возвращает JobCheckpoint задачи.
+    """
+    on_date = on_date or date.today()
+    if period not in ACCRUAL_PERIODS:
+        raise ValueError(f'Неизвестный период начисления: {period}.')
+
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(
+        job=f'accrue_interest_{period}', period=get_period_key(on_date, period)
+    )
+    transaction_type = get_or_create_transaction_type(INTEREST_TRANSACTION_TYPE)
+    interest = get_interest_expression(period)
+
+    while not checkpoint.is_completed:
+        with transaction.atomic():
+            checkpoint = JobCheckpoint.objects.select_for_update().get(
+                pk=checkpoint.pk
+            )
+            if checkpoint.is_completed:
+                break
+            accrue_chunk(
+                checkpoint, on_date, interest, transaction_type, chunk_size
+            )
+    return checkpoint
+
+
+def accrue_chunk(checkpoint, on_date, interest, transaction_type, chunk_size):
+    """
+    Начисляет проценты по следующей пачке вкладов после checkpoint.last_id.
+    Должна вызываться внутри transaction.atomic().
+    """
+    pks = list(
+        Deposit.objects.filter(pk__gt=checkpoint.last_id).order_by('pk').values_list(
+            'pk', flat=True
+        )[:chunk_size]
+    )
+    if not pks:
+        checkpoint.is_completed = True
+        checkpoint.save(update_fields=['is_completed', 'updated_at'])
+        return
+
+    chunk = Deposit.objects.filter(pk__gte=pks[0], pk__lte=pks[-1])
+    # Счета блокируются так же, как в transfer(), балансы читаются после блокировки
+    lock_bank_accounts(chunk.values('bank_account_id'))
+
+    deposits = get_active_deposits(on_date).filter(pk__gte=pks[0], pk__lte=pks[-1])
+    accruals = list(
+        deposits.annotate(interest=interest).filter(interest__gt=0).values_list(
+            'bank_account_id', 'currency', 'interest'
+        )
+    )
+    if accruals:
+        # UPDATE по связанной таблице невозможен, начисление для строки
+        # AccountBalance берется подзапросом по ее вкладу
+        AccountBalance.objects.filter(
+            pk__in=[bank_account_id for bank_account_id, *_ in accruals]
+        ).update(
+            balance=F('balance') + Subquery(
+                deposits.filter(bank_account_id=OuterRef('pk')).annotate(
+                    interest=interest
+                ).values('interest')[:1],
+                output_field=MONEY_FIELD
+            ),
+            version=F('version') + 1
+        )
+        create_postings(Transaction.objects.bulk_create(
+            Transaction(
+                to_number_id=bank_account_id,
+                money=money,
+                currency=currency,
+                transaction_type=transaction_type,
+            )
+            for bank_account_id, currency, money in accruals
+        ))
+        record_daily_balances([bank_account_id for bank_account_id, *_ in accruals])
+
+    checkpoint.last_id = pks[-1]
+    checkpoint.processed += len(accruals)
+    checkpoint.save(update_fields=['last_id', 'processed', 'updated_at'])
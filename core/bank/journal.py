@@ -0,0 +1,184 @@
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Max, OuterRef, ProtectedError, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from rest_framework.validators import ValidationError
+
+from .models import (
+    BankAccount,
+    BalanceSnapshot,
+    JobCheckpoint,
+    Posting,
+    MONEY_MAX_DIGITS,
+    MONEY_DECIMAL_PLACES,
+)
+
+
+POSTING_BATCH_SIZE = 1000
+# Счетов в пачке: строки счетов пачки заблокированы до конца ее транзакции
+COMPACTION_CHUNK_SIZE = 1000
+COMPACTION_JOB = 'compact_postings'
+
+MONEY_FIELD = models.DecimalField(
+    max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES
+)
+ZERO = Value(Decimal('0.00'), output_field=MONEY_FIELD)
+
+
+def create_postings(transactions):
+    """Пара проводок на каждую Transaction одним bulk_create."""
+    return Posting.objects.bulk_create(
+        [
+            posting
+            for obj in transactions
+            for posting in Posting.pair(
+                obj.pk, obj.from_number_id, obj.to_number_id, obj.money
+            )
+        ],
+        batch_size=POSTING_BATCH_SIZE
+    )
+
+
+def delete_with_journal_check(*objs):
+    """
+    Удаляет objs в одной транзакции бд. Проводки и снимки защищают свои
+    счета (on_delete=PROTECT), удаление счета с историей откатывается
+    и поднимает ValidationError.
+    """
+    try:
+        with transaction.atomic():
+            for obj in objs:
+                obj.delete()
+    except ProtectedError:
+        raise ValidationError({'non_field_errors': [
+            'Счет с операциями в журнале проводок не может быть удален.'
+        ]})
+
+
+def get_journal_balances(bank_account_pks=None):
+    """
+    Балансы {bank_account_id: balance} по журналу: снимок счета плюс
+    сумма проводок после него, без bank_account_pks - всех счетов.
+    Снимок и проводки читаются одним запросом, поэтому параллельная
+    компактизация не приводит к двойному учету или пропуску проводок.
+    """
+    pending = Posting.objects.filter(
+        bank_account_id=OuterRef('pk'),
+        pk__gt=Coalesce(OuterRef('balance_snapshot__last_posting_id'), 0)
+    ).values('bank_account_id').annotate(total=Sum('amount')).values('total')
+
+    queryset = BankAccount.objects.all()
+    if bank_account_pks is not None:
+        queryset = queryset.filter(pk__in=bank_account_pks)
+    return dict(
+        queryset.annotate(
+            journal_balance=Coalesce(
+                'balance_snapshot__balance', ZERO, output_field=MONEY_FIELD
+            ) + Coalesce(Subquery(pending), ZERO, output_field=MONEY_FIELD)
+        ).values_list('pk', 'journal_balance')
+    )
+
+
+def compact_postings(chunk_size=COMPACTION_CHUNK_SIZE):
+    """
+    Сворачивает проводки в BalanceSnapshot проходом по счетам пачками
+    по chunk_size счетов. Проводки счета пишутся только под блокировкой его
+    строки (transfers.lock_bank_accounts, Card/Deposit.save_balance), поэтому
+    пачка блокирует свои счета так же: после получения блокировок все
+    проводки этих счетов закоммичены, а следующие получат больший id.
+    Сворачиваются все проводки счета после его снимка, и проводка,
+    закоммиченная позже проводок с большим id, не теряется.
+    Прогресс прохода (последний pk счета) хранится в JobCheckpoint
+    и фиксируется в транзакции пачки: прерванный запуск продолжает проход
+    с последней пачки, после завершенного следующий запуск начинает новый.
+    Возвращает JobCheckpoint задачи.
+    """
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(
+        job=COMPACTION_JOB, period='all'
+    )
+    with transaction.atomic():
+        checkpoint = JobCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+        if checkpoint.is_completed or checkpoint.end_id is None:
+            checkpoint.last_id = 0
+            checkpoint.end_id = BankAccount.objects.aggregate(
+                max_id=Max('pk')
+            )['max_id'] or 0
+            checkpoint.is_completed = False
+            checkpoint.save(
+                update_fields=['last_id', 'end_id', 'is_completed', 'updated_at']
+            )
+
+    while not checkpoint.is_completed:
+        with transaction.atomic():
+            checkpoint = JobCheckpoint.objects.select_for_update().get(
+                pk=checkpoint.pk
+            )
+            if not checkpoint.is_completed:
+                compact_chunk(checkpoint, chunk_size)
+    return checkpoint
+
+
+def compact_chunk(checkpoint, chunk_size):
+    """
+    Сворачивает проводки следующей пачки счетов после checkpoint.last_id:
+    один GROUP BY по счетам, bulk_create новых и bulk_update существующих
+    снимков. Должна вызываться внутри transaction.atomic().
+    """
+    pks = list(
+        BankAccount.objects.filter(
+            pk__gt=checkpoint.last_id, pk__lte=checkpoint.end_id
+        ).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+    )
+    if not pks:
+        checkpoint.is_completed = True
+        checkpoint.save(update_fields=['is_completed', 'updated_at'])
+        return
+
+    # Те же блокировки в том же порядке, что у transfers.lock_bank_accounts
+    # (модуль transfers импортирует journal)
+    list(BankAccount.objects.select_for_update().filter(
+        pk__gte=pks[0], pk__lte=pks[-1]
+    ).order_by('pk').values_list('pk', flat=True))
+    totals = list(
+        Posting.objects.filter(
+            bank_account_id__gte=pks[0],
+            bank_account_id__lte=pks[-1],
+            pk__gt=Coalesce(
+                Subquery(BalanceSnapshot.objects.filter(
+                    pk=OuterRef('bank_account_id')
+                ).values('last_posting_id')),
+                0
+            )
+        ).values_list('bank_account_id').annotate(
+            total=Sum('amount'), last_posting_id=Max('pk')
+        ).order_by()
+    )
+    snapshots = BalanceSnapshot.objects.in_bulk(
+        [bank_account_id for bank_account_id, *_ in totals]
+    )
+
+    new_snapshots = []
+    for bank_account_id, total, last_posting_id in totals:
+        snapshot = snapshots.get(bank_account_id)
+        if snapshot is None:
+            new_snapshots.append(BalanceSnapshot(
+                bank_account_id=bank_account_id,
+                balance=total,
+                last_posting_id=last_posting_id
+            ))
+        else:
+            snapshot.balance += total
+            snapshot.last_posting_id = last_posting_id
+
+    BalanceSnapshot.objects.bulk_create(new_snapshots, batch_size=POSTING_BATCH_SIZE)
+    BalanceSnapshot.objects.bulk_update(
+        snapshots.values(),
+        ['balance', 'last_posting_id'],
+        batch_size=POSTING_BATCH_SIZE
+    )
+
+    checkpoint.last_id = pks[-1]
+    checkpoint.processed += len(totals)
+    checkpoint.save(update_fields=['last_id', 'processed', 'updated_at'])
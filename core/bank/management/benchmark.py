@@ -0,0 +1,160 @@
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from user.models import AccountTarif, User
+from bank.models import (
+    AccountBalance,
+    BalanceSnapshot,
+    BankAccount,
+    TransactionType,
+    Transaction,
+    CardType,
+    Card,
+    Deposit,
+)
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Базовый класс для команд bench_*.
+    Бенчмарк выполняется на отдельной тестовой бд (как manage.py test),
+    рабочая бд не затрагивается. Для sqlite тестовая бд создается в файле,
+    чтобы ее видели все потоки и процессы бенчмарка.
+    Результаты имеют смысл на PostgreSQL - sqlite сериализует любые записи.
+    """
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            test_name = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = test_name
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.benchmark(**options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, **options):
+        raise NotImplementedError('Need to override benchmark method.')
+
+    def report(self, title, seconds, count=None):
+        line = f'{title:<48} {seconds * 1000:>10.2f} ms'
+        if count:
+            line += f' {count / seconds:>12.1f} ops/s'
+        self.stdout.write(line)
+
+
+def measure(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def create_card_accounts(count, money=1000, currency='RUB'):
+    """Создает одного пользователя и count счетов с картами."""
+    tarif = AccountTarif.objects.create(title='Benchmark tarif')
+    user = User.objects.create(
+        username='benchmark',
+        email='benchmark@example.com',
+        phone='+79999999999',
+        tarif=tarif
+    )
+    card_type = CardType.objects.create(title='Benchmark card type')
+
+    bank_accounts = BankAccount.objects.bulk_create(
+        BankAccount(number=f'{i:020d}', user=user, kind='card')
+        for i in range(1, count + 1)
+    )
+    Card.objects.bulk_create(
+        Card(bank_account=bank_account, currency=currency, card_type=card_type)
+        for bank_account in bank_accounts
+    )
+    create_balances(bank_accounts, money)
+    return list(BankAccount.objects.with_related().order_by('pk'))
+
+
+def create_deposit_accounts(count, money=10000, interest_rate=5.0, currency='RUB'):
+    """Создает одного пользователя и count счетов со вкладами."""
+    tarif = AccountTarif.objects.create(
+        title='Benchmark deposit tarif', additional_interest_rate=1.0
+    )
+    user = User.objects.create(
+        username='benchmark_deposits',
+        email='benchmark_deposits@example.com',
+        phone='+79999999998',
+        tarif=tarif
+    )
+    bank_accounts = BankAccount.objects.bulk_create(
+        BankAccount(number=f'{i:020d}', user=user, kind='deposit')
+        for i in range(10 ** 19, 10 ** 19 + count)
+    )
+    Deposit.objects.bulk_create(
+        (
+            Deposit(
+                bank_account=bank_account,
+                currency=currency,
+                interest_rate=interest_rate,
+                max_value=10 ** 9
+            )
+            for bank_account in bank_accounts
+        ),
+        batch_size=10000
+    )
+    create_balances(bank_accounts, money)
+
+
+def create_balances(bank_accounts, money):
+    # bulk_create не вызывает save(), строки AccountBalance создаются отдельно,
+    # начальный баланс в журнале - открывающий снимок, как в миграции
+    for model in (AccountBalance, BalanceSnapshot):
+        model.objects.bulk_create(
+            (
+                model(bank_account=bank_account, balance=money)
+                for bank_account in bank_accounts
+            ),
+            batch_size=10000
+        )
+
+
+def get_total(model):
+    """Сумма балансов всех счетов модели Card или Deposit."""
+    return model.objects.aggregate(
+        total=Sum('bank_account__balance__balance')
+    )['total']
+
+
+def create_transaction_type(title='Benchmark transaction type'):
+    return TransactionType.objects.create(title=title)
+
+
+def create_transactions(bank_accounts, transaction_type, count, batch_size=10000):
+    """Создает count транзакций между случайными счетами за последний год."""
+    rnd = random.Random(0)
+    start = timezone.now() - timedelta(days=365)
+
+    for batch_start in range(0, count, batch_size):
+        batch = []
+        for i in range(batch_start, min(batch_start + batch_size, count)):
+            from_number, to_number = rnd.sample(bank_accounts, 2)
+            batch.append(Transaction(
+                from_number=from_number,
+                to_number=to_number,
+                money=rnd.randint(1, 1000),
+                transaction_type=transaction_type,
+            ))
+        Transaction.objects.bulk_create(batch)
+
+    # auto_now_add проставляет текущее время - разносим даты по году,
+    # записи одной пачки получают одинаковую дату
+    for pk in range(1, count + 1, batch_size):
+        Transaction.objects.filter(pk__gte=pk, pk__lt=pk + batch_size).update(
+            date=start + timedelta(seconds=pk // 2)
+        )
@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bank.interest import accrue_interest, ACCRUAL_CHUNK_SIZE, ACCRUAL_PERIODS
+
+
+class Command(BaseCommand):
+    help = (
+        'Начисляет проценты по активным вкладам за период (daily/monthly). '
+        'Запускается по расписанию (cron), повторный запуск за тот же период '
+        'ничего не начисляет, прерванный - продолжает с последней пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', help='Дата начисления YYYY-MM-DD, по умолчанию сегодня.'
+        )
+        parser.add_argument(
+            '--period', choices=list(ACCRUAL_PERIODS), default='monthly'
+        )
+        parser.add_argument('--chunk-size', type=int, default=ACCRUAL_CHUNK_SIZE)
+
+    def handle(self, *args, period, chunk_size, **options):
+        try:
+            on_date = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f'Неверная дата: {options["date"]}.')
+
+        checkpoint = accrue_interest(on_date, period, chunk_size)
+        self.stdout.write(
+            f'{checkpoint.job} {checkpoint.period}: '
+            f'проценты начислены по {checkpoint.processed} вкладам.'
+        )
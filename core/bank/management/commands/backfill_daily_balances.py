@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from bank.balances import backfill_daily_balances, BACKFILL_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет остатки счетов за день (AccountDailyBalance) по истории '
+        'транзакций и корректировок баланса (проводки без транзакции), история '
+        'читается потоком в порядке дат. Запускается '
+        'один раз после миграции, дальше остатки ведут переводы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE)
+
+    def handle(self, *args, batch_size, **options):
+        count = backfill_daily_balances(batch_size)
+        self.stdout.write(f'Записано остатков: {count}.')
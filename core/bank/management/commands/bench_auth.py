@@ -0,0 +1,53 @@
+import base64
+
+from django.core.cache import cache
+
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from user.authentication import CachedTokenAuthentication
+from user.models import User
+from bank.management.benchmark import BenchmarkCommand, measure
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает стоимость аутентификации одного запроса: Basic (проверка '
+        'пароля), TokenAuthentication и CachedTokenAuthentication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def benchmark(self, requests, repeat, **options):
+        user = User.objects.create_user(
+            'benchmark', 'benchmark@example.com', '+79999999999',
+            password='benchmark_password'
+        )
+        token = Token.objects.get(user=user)
+        credentials = base64.b64encode(b'benchmark:benchmark_password').decode()
+
+        factory = APIRequestFactory()
+        cases = (
+            ('basic', BasicAuthentication(), f'Basic {credentials}'),
+            ('token', TokenAuthentication(), f'Token {token.key}'),
+            ('cached token', CachedTokenAuthentication(), f'Token {token.key}'),
+        )
+        cache.clear()
+
+        for title, authentication, header in cases:
+            request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+            # Проверка пароля на порядки медленнее - меньше повторов
+            count = max(1, requests // 100) if title == 'basic' else requests
+
+            def run():
+                for _ in range(count):
+                    assert authentication.authenticate(request)[0].pk == user.pk
+
+            run()
+            seconds = min(measure(run)[0] for _ in range(repeat))
+            self.report(f'{title}: per request', seconds / count)
+            self.report(f'{title}: {count} requests', seconds, count)
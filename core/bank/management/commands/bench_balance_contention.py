@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection, transaction, DatabaseError
+from django.db.models import F, Sum
+
+from rest_framework.exceptions import APIException
+from rest_framework.validators import ValidationError
+
+from bank.models import AccountBalance, Transaction
+from bank.transfers import lock_bank_accounts, transfer
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    create_card_accounts,
+    create_transaction_type,
+)
+
+
+def locked_transfer(from_number, to_number, money, transaction_type):
+    """
+    Перевод с блокировкой обоих счетов (select_for_update) и одним условным
+    UPDATE списания вместо чтения баланса - для сравнения с transfer().
+    """
+    with transaction.atomic():
+        lock_bank_accounts([from_number.pk, to_number.pk])
+        is_debited = AccountBalance.objects.filter(
+            pk=from_number.pk, balance__gte=money
+        ).update(balance=F('balance') - money, version=F('version') + 1)
+        if not is_debited:
+            raise ValidationError({'from_number': ['Недостаточно средств.']})
+        AccountBalance.objects.filter(pk=to_number.pk).update(
+            balance=F('balance') + money, version=F('version') + 1
+        )
+        Transaction.objects.create(
+            from_number=from_number,
+            to_number=to_number,
+            money=money,
+            transaction_type=transaction_type
+        )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Пропускная способность переводов по нескольким "горячим" счетам: '
+        'transfer() (AccountBalance, проверка баланса после блокировки) '
+        'против условного UPDATE списания.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=4)
+        parser.add_argument('--transfers', type=int, default=2000)
+        parser.add_argument('--threads', type=str, default='1,4,8')
+
+    def benchmark(self, accounts, transfers, threads, **options):
+        bank_accounts = create_card_accounts(accounts, money=10 ** 6)
+        transaction_type = create_transaction_type()
+        total_before = self.get_total_balance()
+
+        for title, transfer_func in (
+            ('transfer', transfer),
+            ('conditional update', locked_transfer),
+        ):
+            for threads_count in [int(value) for value in threads.split(',')]:
+                stats = {'done': 0, 'rejected': 0, 'conflicts': 0}
+                lock = threading.Lock()
+                workers = [
+                    threading.Thread(
+                        target=self.worker,
+                        args=(
+                            transfer_func, bank_accounts, transaction_type,
+                            transfers // threads_count, seed, stats, lock
+                        )
+                    )
+                    for seed in range(threads_count)
+                ]
+
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                seconds = time.perf_counter() - start
+
+                self.report(
+                    f'{title}, {threads_count} threads: {stats["done"]} done, '
+                    f'{stats["rejected"]} rejected, {stats["conflicts"]} conflicts',
+                    seconds,
+                    stats['done']
+                )
+                if self.get_total_balance() != total_before:
+                    raise CommandError('Суммарный баланс не сохранился.')
+
+    def worker(self, transfer_func, bank_accounts, transaction_type, count, seed,
+               stats, lock):
+        rnd = random.Random(seed)
+        done = rejected = conflicts = 0
+        try:
+            for _ in range(count):
+                from_number, to_number = rnd.sample(bank_accounts, 2)
+                try:
+                    transfer_func(
+                        from_number, to_number, rnd.randint(1, 100), transaction_type
+                    )
+                    done += 1
+                except ValidationError:
+                    rejected += 1
+                except (APIException, DatabaseError):
+                    # Конфликт конкурентного доступа (sqlite: database is locked,
+                    # deadlock, ответ 409) не останавливает поток
+                    conflicts += 1
+        finally:
+            connection.close()
+            with lock:
+                stats['done'] += done
+                stats['rejected'] += rejected
+                stats['conflicts'] += conflicts
+
+    def get_total_balance(self):
+        return AccountBalance.objects.aggregate(total=Sum('balance'))['total']
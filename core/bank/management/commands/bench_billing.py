@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.db import connection
+
+from bank.models import Card, Transaction
+from bank.billing import bill_cards, BILLING_CHUNK_SIZE
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    get_total,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Списание месячной платы за карты bank.billing.bill_cards '
+        'при разном числе процессов (каждый прогон - отдельный месяц).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=100000)
+        parser.add_argument('--processes', type=str, default='1,2,4')
+        parser.add_argument('--chunk-size', type=int, default=BILLING_CHUNK_SIZE)
+
+    def benchmark(self, cards, processes, chunk_size, **options):
+        create_card_accounts(cards, money=10 ** 6)
+        Card.objects.update(is_push=True)
+
+        for month, processes_count in enumerate(
+            [int(value) for value in processes.split(',')], start=1
+        ):
+            if processes_count > 1 and connection.vendor == 'sqlite':
+                # sqlite не допускает параллельных пишущих транзакций
+                self.stdout.write(f'processes={processes_count}: пропущено на sqlite')
+                continue
+            on_date = date(date.today().year, month, 1)
+            seconds, checkpoints = measure(
+                bill_cards, on_date, processes_count, chunk_size
+            )
+            processed = sum(checkpoint.processed for checkpoint in checkpoints)
+            self.report(
+                f'bill_cards, processes={processes_count}', seconds, processed
+            )
+
+        self.stdout.write(
+            f'    transactions {Transaction.objects.count()}, '
+            f'total {get_total(Card)}'
+        )
@@ -0,0 +1,59 @@
+import random
+
+from bank.serializers import TransactionCreateUpdateSerializer
+from bank.transfers import bulk_transfer
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает проведение переводов по одному '
+        '(TransactionCreateUpdateSerializer) и пачкой (bulk_transfer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=1000)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument(
+            '--single-items', type=int, default=1000,
+            help='Число переводов для замера пути по одному.'
+        )
+
+    def benchmark(self, accounts, items, single_items, **options):
+        bank_accounts = create_card_accounts(accounts, money=10 ** 9)
+        transaction_type = create_transaction_type()
+        rnd = random.Random(0)
+
+        def make_items(count):
+            result = []
+            for _ in range(count):
+                from_number, to_number = rnd.sample(bank_accounts, 2)
+                result.append({
+                    'from_number': from_number.pk,
+                    'to_number': to_number.pk,
+                    'money': rnd.randint(1, 100),
+                    'currency': 'RUB',
+                    'transaction_type': transaction_type.pk,
+                })
+            return result
+
+        def run_single(data_list):
+            for data in data_list:
+                serializer = TransactionCreateUpdateSerializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+
+        single_seconds, _ = measure(run_single, make_items(single_items))
+        self.report('single transfers', single_seconds, single_items)
+
+        bulk_seconds, results = measure(bulk_transfer, make_items(items))
+        self.report('bulk_transfer', bulk_seconds, items)
+
+        errors = sum(1 for result in results if 'errors' in result)
+        speedup = (single_seconds / single_items) / (bulk_seconds / items)
+        self.stdout.write(f'bulk errors: {errors}, speedup: {speedup:.1f}x')
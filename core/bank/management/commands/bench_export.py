@@ -0,0 +1,69 @@
+import tracemalloc
+
+from bank.serializers import TransactionSerializer
+from bank.renderers import CSVRenderer
+from bank.views import UserTransactionListAPI
+from bank import exports
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Измеряет время до первого чанка, общее время и пик памяти '
+        'потоковой CSV выписки против сериализации всей истории '
+        'через TransactionSerializer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--chunk-size', type=int, default=exports.EXPORT_CHUNK_SIZE)
+
+    def benchmark(self, rows, chunk_size, **options):
+        bank_accounts = create_card_accounts(2)
+        create_transactions(bank_accounts, create_transaction_type(), rows)
+        user = bank_accounts[0].user
+        queryset = UserTransactionListAPI().get_queryset(user)
+
+        def first_chunk():
+            stream = self.stream(queryset, chunk_size)
+            next(stream)
+            return next(stream)
+
+        seconds, _ = measure(first_chunk)
+        self.report('stream: first row', seconds)
+        seconds, peak = self.trace(self.consume_stream, queryset, chunk_size)
+        self.report('stream: all rows', seconds, rows)
+        self.stdout.write(f'    peak memory = {peak / 2 ** 20:.1f} MiB')
+
+        seconds, peak = self.trace(self.serialize, queryset)
+        self.report('TransactionSerializer(many=True).data', seconds, rows)
+        self.stdout.write(f'    peak memory = {peak / 2 ** 20:.1f} MiB')
+
+    def stream(self, queryset, chunk_size):
+        return CSVRenderer().stream(
+            list(exports.TRANSACTION_EXPORT_FIELDS),
+            exports.iter_transaction_rows(queryset, chunk_size=chunk_size)
+        )
+
+    def consume_stream(self, queryset, chunk_size):
+        for _ in self.stream(queryset, chunk_size):
+            pass
+
+    def serialize(self, queryset):
+        return TransactionSerializer(
+            queryset.order_by('date', 'id'), many=True
+        ).data
+
+    def trace(self, func, *args):
+        tracemalloc.start()
+        try:
+            seconds, _ = measure(func, *args)
+            return seconds, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+
+from bank.models import Deposit, Transaction
+from bank.interest import (
+    accrue_interest,
+    ACCRUAL_CHUNK_SIZE,
+    INTEREST_TRANSACTION_TYPE,
+)
+from bank.transfers import get_or_create_transaction_type
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_deposit_accounts,
+    get_total,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает начисление процентов по вкладам построчно в python '
+        '(read, save(), Transaction.save()) и пачками bank.interest.accrue_interest '
+        '(UPDATE + bulk_create на пачку).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deposits', type=int, default=100000)
+        parser.add_argument('--loop-deposits', type=int, default=5000)
+        parser.add_argument('--chunk-size', type=int, default=ACCRUAL_CHUNK_SIZE)
+
+    def benchmark(self, deposits, loop_deposits, chunk_size, **options):
+        create_deposit_accounts(deposits)
+        transaction_type = get_or_create_transaction_type(INTEREST_TRANSACTION_TYPE)
+
+        seconds, _ = measure(self.accrue_loop, loop_deposits, transaction_type)
+        self.report('python loop: save() + Transaction.save()', seconds, loop_deposits)
+
+        seconds, checkpoint = measure(
+            accrue_interest, date.today(), 'daily', chunk_size
+        )
+        self.report(
+            f'accrue_interest, chunk_size={chunk_size}', seconds, checkpoint.processed
+        )
+        self.stdout.write(
+            f'    deposits {checkpoint.processed}, '
+            f'transactions {Transaction.objects.count()}, '
+            f'total {get_total(Deposit)}'
+        )
+
+    def accrue_loop(self, count, transaction_type):
+        deposits = Deposit.objects.select_related(
+            'bank_account__user__tarif', 'bank_account__balance'
+        )
+        with transaction.atomic():
+            for deposit in deposits.order_by('pk')[:count]:
+                rate = deposit.interest_rate + (
+                    deposit.bank_account.user.tarif.additional_interest_rate
+                )
+                money = (deposit.money * Decimal(rate) / 36500).quantize(
+                    Decimal('0.01')
+                )
+                deposit.money += money
+                deposit.save(update_fields=['money'])
+                Transaction.objects.create(
+                    to_number=deposit.bank_account,
+                    money=money,
+                    currency=deposit.currency,
+                    transaction_type=transaction_type
+                )
@@ -0,0 +1,55 @@
+import random
+
+from django.core.management.base import CommandError
+
+from bank.balances import get_current_balances
+from bank.journal import compact_postings, get_journal_balances
+from bank.transfers import bulk_transfer
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Чтение балансов по журналу (снимок + проводки после него) '
+        'до и после compact_postings, время компактизации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=1000)
+        parser.add_argument('--transfers', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def benchmark(self, accounts, transfers, repeat, **options):
+        bank_accounts = create_card_accounts(accounts, money=10 ** 9)
+        transaction_type = create_transaction_type()
+        rnd = random.Random(0)
+        items = []
+        for _ in range(transfers):
+            from_number, to_number = rnd.sample(bank_accounts, 2)
+            items.append({
+                'from_number': from_number.pk,
+                'to_number': to_number.pk,
+                'money': rnd.randint(1, 100),
+                'transaction_type': transaction_type.pk,
+            })
+        bulk_transfer(items)
+        pks = [bank_account.pk for bank_account in bank_accounts[:10]]
+
+        def run_reads(title):
+            seconds = min(measure(get_journal_balances, pks)[0] for _ in range(repeat))
+            self.report(f'{title}: 10 accounts', seconds)
+            seconds = min(measure(get_journal_balances)[0] for _ in range(repeat))
+            self.report(f'{title}: all accounts', seconds)
+
+        run_reads('before compaction')
+        seconds, checkpoint = measure(compact_postings)
+        self.report('compact_postings', seconds, transfers * 2)
+        run_reads('after compaction')
+
+        if get_journal_balances() != get_current_balances():
+            raise CommandError('Балансы по журналу не совпадают с AccountBalance.')
@@ -0,0 +1,89 @@
+import gc
+from statistics import median
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+from bank.metrics import registry
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает задержку API с MetricsMiddleware и без нее: медианы '
+        'чередующихся прогонов и медиана отношения парных прогонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=51)
+
+    def get_client(self, user, metrics_enabled):
+        # Debug toolbar не участвует в сравнении, MetricsMiddleware
+        # отключается через METRICS_ENABLED (MiddlewareNotUsed)
+        middleware = [
+            name for name in settings.MIDDLEWARE if not name.startswith('debug_toolbar')
+        ]
+        # Вне manage.py test ALLOWED_HOSTS не содержит testserver
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        with override_settings(MIDDLEWARE=middleware, METRICS_ENABLED=metrics_enabled):
+            # Цепочка middleware собирается при первом запросе и сохраняется
+            client.get(reverse('root'))
+        return client
+
+    def benchmark(self, transactions, requests, repeat, **options):
+        bank_accounts = create_card_accounts(100)
+        create_transactions(bank_accounts, create_transaction_type(), transactions)
+        user = bank_accounts[0].user
+        urls = [
+            reverse('bank_account'),
+            reverse('transaction'),
+            reverse('card'),
+            reverse('bank_account_detail', kwargs={'pk': bank_accounts[0].pk}),
+        ]
+        clients = {
+            'without metrics': self.get_client(user, metrics_enabled=False),
+            'with metrics': self.get_client(user, metrics_enabled=True),
+        }
+
+        for url in urls:
+            def run(client):
+                for _ in range(requests):
+                    response = client.get(url)
+                    assert response.status_code == 200, response.status_code
+
+            # Много коротких прогонов, чередующихся (порядок пары меняется),
+            # чтобы прогрев и фон влияли одинаково. Перед прогоном собирается
+            # мусор предыдущего, иначе сборка gc попадает в случайный прогон.
+            # Минимум и одно отношение двух прогонов слишком шумны:
+            # сравниваются медианы.
+            results = {title: [] for title in clients}
+            for index in range(repeat):
+                pair = list(clients.items())
+                for title, client in pair if index % 2 else reversed(pair):
+                    gc.collect()
+                    results[title].append(measure(run, client)[0])
+
+            for title, values in results.items():
+                self.report(f'{url}: {title}', median(values), requests)
+            overhead = median(
+                with_metrics / without_metrics - 1
+                for with_metrics, without_metrics in zip(
+                    results['with metrics'], results['without metrics']
+                )
+            )
+            self.stdout.write(f'{url}: overhead {overhead * 100:.2f}% (median)')
+
+        render_seconds, _ = measure(registry.render)
+        self.report('render /metrics', render_seconds)
@@ -0,0 +1,73 @@
+import random
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F, Sum
+
+from bank.models import AccountBalance
+from bank.management.benchmark import BenchmarkCommand, measure, create_card_accounts
+
+
+LEGACY_TABLE = 'bench_legacy_float_card'
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает агрегацию Sum(money) и обновление балансов '
+        'для прежнего float хранения и текущего DecimalField с F() выражениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=100000)
+        parser.add_argument('--updates', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def benchmark(self, cards, updates, repeat, **options):
+        create_card_accounts(cards, money=Decimal('1000.10'))
+        balance_table = AccountBalance._meta.db_table
+        with connection.cursor() as cursor:
+            # Копия таблицы в прежнем формате (double precision) для сравнения
+            cursor.execute(
+                f'CREATE TABLE {LEGACY_TABLE} AS '
+                f'SELECT bank_account_id AS id, '
+                f'CAST(balance AS double precision) AS balance FROM {balance_table}'
+            )
+
+        for title, table in (('float', LEGACY_TABLE), ('decimal', balance_table)):
+            seconds = min(
+                measure(self.raw_sum, table)[0] for _ in range(repeat)
+            )
+            self.report(f'SUM(balance) {title}', seconds)
+            self.stdout.write(f'    total = {self.raw_sum(table)}')
+
+        seconds = min(
+            measure(AccountBalance.objects.aggregate, total=Sum('balance'))[0]
+            for _ in range(repeat)
+        )
+        self.report('AccountBalance.objects.aggregate(Sum)', seconds)
+
+        pks = list(AccountBalance.objects.values_list('pk', flat=True))
+        rnd = random.Random(0)
+        targets = [(rnd.choice(pks), Decimal(rnd.randint(1, 10000)) / 100)
+                   for _ in range(updates)]
+
+        seconds, _ = measure(self.update_python, targets)
+        self.report('update: read, balance += x, save()', seconds, updates)
+
+        seconds, _ = measure(self.update_f_expression, targets)
+        self.report('update: F(balance) + x', seconds, updates)
+
+    def raw_sum(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT SUM(balance) FROM {table}')
+            return cursor.fetchone()[0]
+
+    def update_python(self, targets):
+        for pk, money in targets:
+            balance = AccountBalance.objects.get(pk=pk)
+            balance.balance += money
+            balance.save(update_fields=['balance'])
+
+    def update_f_expression(self, targets):
+        for pk, money in targets:
+            AccountBalance.objects.filter(pk=pk).update(balance=F('balance') + money)
@@ -0,0 +1,57 @@
+from bank.models import Transaction
+from bank.pagination import TransactionPagination
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает задержку OFFSET и keyset (cursor) пагинации '
+        'списка транзакций на разных номерах страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--pages', type=str, default='1,100,1000,10000')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def benchmark(self, rows, page_size, pages, repeat, **options):
+        create_transactions(
+            create_card_accounts(100), create_transaction_type(), rows
+        )
+        pagination = TransactionPagination()
+        ordering = pagination.ordering
+        queryset = Transaction.objects.order_by(*ordering)
+
+        for page in [int(value) for value in pages.split(',')]:
+            offset = (page - 1) * page_size
+            if offset >= rows:
+                continue
+
+            def offset_page():
+                return list(queryset[offset:offset + page_size])
+
+            if offset == 0:
+                keyset_queryset = queryset
+            else:
+                last = queryset[offset - 1]
+                position = pagination._get_position_from_instance(last, ordering)
+                keyset_queryset = queryset.filter(
+                    pagination.get_keyset_filter(ordering, position)
+                )
+
+            def keyset_page():
+                return list(keyset_queryset[:page_size])
+
+            offset_seconds = min(measure(offset_page)[0] for _ in range(repeat))
+            keyset_seconds = min(measure(keyset_page)[0] for _ in range(repeat))
+            assert offset_page() == keyset_page()
+
+            self.report(f'page {page}: offset', offset_seconds)
+            self.report(f'page {page}: keyset', keyset_seconds)
@@ -0,0 +1,36 @@
+from bank.reconcile import reconcile, RECONCILE_RANGE_SIZE
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сверка балансов bank.reconcile.reconcile при разном числе процессов, '
+        'скорость в счетах в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=100000)
+        parser.add_argument('--transactions', type=int, default=100000)
+        parser.add_argument('--processes', type=str, default='1,2,4')
+        parser.add_argument('--range-size', type=int, default=RECONCILE_RANGE_SIZE)
+
+    def benchmark(self, accounts, transactions, processes, range_size, **options):
+        bank_accounts = create_card_accounts(accounts)
+        create_transactions(bank_accounts, create_transaction_type(), transactions)
+
+        for processes_count in [int(value) for value in processes.split(',')]:
+            seconds, (checked, mismatches) = measure(
+                reconcile, processes_count, range_size
+            )
+            self.report(
+                f'reconcile, processes={processes_count}: '
+                f'{len(mismatches)} mismatches',
+                seconds,
+                checked
+            )
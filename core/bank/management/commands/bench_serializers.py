@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+
+from bank.custom_serializer import CustomSerializer, CustomListSerializer
+from bank.models import Transaction, Card
+from bank.serializers import TransactionSerializer, CardSerializer
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает CPU время сериализации списков штатным '
+        'Serializer.to_representation DRF и скомпилированным представлением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def benchmark(self, rows, repeat, **options):
+        bank_accounts = create_card_accounts(rows)
+        create_transactions(bank_accounts, create_transaction_type(), rows)
+
+        cases = (
+            ('TransactionSerializer', TransactionSerializer, list(
+                Transaction.objects.select_related(
+                    'from_number__user', 'to_number__user', 'transaction_type'
+                )
+            )),
+            ('CardSerializer', CardSerializer, list(
+                Card.objects.select_related(
+                    'bank_account__user', 'card_type', 'design'
+                ).prefetch_related('card_type__cashbacks')
+            )),
+        )
+        for title, serializer_class, instances in cases:
+            with mock.patch.object(
+                CustomSerializer, 'to_representation',
+                drf_serializers.Serializer.to_representation
+            ), mock.patch.object(
+                CustomListSerializer, 'to_representation',
+                drf_serializers.ListSerializer.to_representation
+            ):
+                drf_seconds, drf_json = self.measure_cpu(
+                    serializer_class, instances, repeat
+                )
+            compiled_seconds, compiled_json = self.measure_cpu(
+                serializer_class, instances, repeat
+            )
+            assert drf_json == compiled_json, f'{title}: output differs'
+
+            self.report(f'{title}: DRF fields', drf_seconds, len(instances))
+            self.report(f'{title}: compiled', compiled_seconds, len(instances))
+            self.stdout.write(f'    speedup = {drf_seconds / compiled_seconds:.1f}x')
+
+    def measure_cpu(self, serializer_class, instances, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.process_time()
+            data = serializer_class(instances, many=True).data
+            seconds = time.process_time() - start
+            best = seconds if best is None else min(best, seconds)
+        return best, JSONRenderer().render(data)
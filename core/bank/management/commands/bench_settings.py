@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+    create_transaction_type,
+    create_transactions,
+)
+
+
+PROFILES = ('core.settings.dev', 'core.settings.prod')
+
+# Запуск процесса: настройки, приложения, middleware и url
+STARTUP_SCRIPT = (
+    'import django; django.setup(); '
+    'from django.core.handlers.wsgi import WSGIHandler; WSGIHandler(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает время запуска и задержку запросов профилей настроек '
+        'core.settings.dev и core.settings.prod.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        # Замер запросов в дочернем процессе с DJANGO_SETTINGS_MODULE профиля
+        parser.add_argument('--profile-requests', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['profile_requests']:
+            return super().handle(*args, **options)
+
+        for profile in PROFILES:
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+            startup = min(
+                measure(
+                    subprocess.run, [sys.executable, '-c', STARTUP_SCRIPT],
+                    env=env, cwd=settings.BASE_DIR, check=True
+                )[0]
+                for _ in range(options['repeat'])
+            )
+            self.report(f'{profile}: startup', startup)
+
+            output = subprocess.run(
+                [
+                    sys.executable, 'manage.py', 'bench_settings',
+                    '--profile-requests',
+                    '--requests', str(options['requests']),
+                    '--repeat', str(options['repeat']),
+                ],
+                env=env, cwd=settings.BASE_DIR, check=True,
+                capture_output=True, text=True
+            ).stdout
+            for line in output.splitlines():
+                self.stdout.write(f'{profile}: {line.strip()}')
+
+    def benchmark(self, requests, repeat, **options):
+        bank_accounts = create_card_accounts(100)
+        create_transactions(bank_accounts, create_transaction_type(), 1000)
+        token, _ = Token.objects.get_or_create(user=bank_accounts[0].user)
+        urls = [
+            reverse('bank_account'),
+            reverse('transaction'),
+            reverse('card_type'),
+        ]
+
+        # WSGIHandler без тестового клиента: сигналы request_started/finished
+        # закрывают или переиспользуют соединение с бд по CONN_MAX_AGE
+        handler = WSGIHandler()
+        factory = RequestFactory(
+            SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+
+        def start_response(status, headers):
+            assert status.startswith('200'), status
+
+        def run(url):
+            for _ in range(requests):
+                response = handler(factory.get(url).environ, start_response)
+                b''.join(response)
+                response.close()
+
+        for url in urls:
+            run(url)
+            seconds = min(measure(run, url)[0] for _ in range(repeat))
+            self.report(url, seconds, requests)
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection, DatabaseError
+
+from rest_framework.exceptions import APIException
+from rest_framework.validators import ValidationError
+
+from bank.models import AccountBalance, Card
+from bank.transfers import transfer
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    create_card_accounts,
+    create_transaction_type,
+    get_total,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Многопоточный стресс-тест bank.transfers.transfer: '
+        'пропускная способность и сохранение суммарного баланса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=50)
+        parser.add_argument('--transfers', type=int, default=2000)
+        parser.add_argument('--threads', type=str, default='1,2,4,8')
+
+    def benchmark(self, accounts, transfers, threads, **options):
+        bank_accounts = create_card_accounts(accounts, money=1000)
+        transaction_type = create_transaction_type()
+        total_before = self.get_total_money()
+
+        for threads_count in [int(value) for value in threads.split(',')]:
+            stats = {'done': 0, 'rejected': 0, 'conflicts': 0}
+            lock = threading.Lock()
+            per_thread = transfers // threads_count
+            workers = [
+                threading.Thread(
+                    target=self.worker,
+                    args=(
+                        bank_accounts, transaction_type, per_thread, seed, stats, lock
+                    )
+                )
+                for seed in range(threads_count)
+            ]
+
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            seconds = time.perf_counter() - start
+
+            self.report(
+                f'{threads_count} threads: {stats["done"]} done, '
+                f'{stats["rejected"]} rejected, {stats["conflicts"]} conflicts',
+                seconds,
+                stats['done']
+            )
+
+            total_after = self.get_total_money()
+            if total_after != total_before:
+                raise CommandError(
+                    f'Суммарный баланс не сохранился: {total_before} -> {total_after}'
+                )
+            if AccountBalance.objects.filter(balance__lt=0).exists():
+                raise CommandError('Обнаружен отрицательный баланс.')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Суммарный баланс сохранен: {total_before}')
+        )
+
+    def worker(self, bank_accounts, transaction_type, count, seed, stats, lock):
+        rnd = random.Random(seed)
+        done = rejected = conflicts = 0
+        try:
+            for _ in range(count):
+                from_number, to_number = rnd.sample(bank_accounts, 2)
+                try:
+                    transfer(
+                        from_number, to_number, rnd.randint(1, 100), transaction_type
+                    )
+                    done += 1
+                except ValidationError:
+                    rejected += 1
+                except (APIException, DatabaseError):
+                    # Конфликт конкурентного доступа (sqlite: database is locked,
+                    # deadlock, ответ 409) не останавливает поток
+                    conflicts += 1
+        finally:
+            connection.close()
+            with lock:
+                stats['done'] += done
+                stats['rejected'] += rejected
+                stats['conflicts'] += conflicts
+
+    def get_total_money(self):
+        return get_total(Card)
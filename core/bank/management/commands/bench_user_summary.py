@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from bank.management.benchmark import (
+    BenchmarkCommand,
+    measure,
+    create_card_accounts,
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает получение сводки пользователя через /user_card/ и '
+        '/user_deposit/ со сводкой /user_summary/ (без кэша и из кэша).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=50)
+
+    def benchmark(self, cards, requests, **options):
+        bank_accounts = create_card_accounts(cards)
+        user = bank_accounts[0].user
+        # Вне manage.py test ALLOWED_HOSTS не содержит testserver
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        summary_url = reverse('user_summary', kwargs={'user_pk': user.pk})
+
+        def run(urls, clear_cache=False):
+            for _ in range(requests):
+                if clear_cache:
+                    cache.clear()
+                for url in urls:
+                    response = client.get(url, {'page_size': cards})
+                    assert response.status_code == 200, response.status_code
+
+        for title, urls, clear_cache in (
+            ('user_card + user_deposit', [
+                reverse('user_card', kwargs={'user_pk': user.pk}),
+                reverse('user_deposit', kwargs={'user_pk': user.pk}),
+            ], False),
+            ('user_summary, no cache', [summary_url], True),
+            ('user_summary, cached', [summary_url], False),
+        ):
+            seconds, _ = measure(run, urls, clear_cache)
+            self.report(title, seconds, requests)
@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bank.billing import bill_cards, BILLING_CHUNK_SIZE, BILLING_PROCESSES
+
+
+class Command(BaseCommand):
+    help = (
+        'Списывает месячную плату за обслуживание карт и уведомления. '
+        'Запускается по расписанию (cron) раз в месяц, диапазоны карт '
+        'обрабатываются в пуле процессов. После сбоя повторный запуск за тот '
+        'же месяц продолжает с контрольных точек.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', help='Дата списания YYYY-MM-DD, по умолчанию сегодня.'
+        )
+        parser.add_argument('--processes', type=int, default=BILLING_PROCESSES)
+        parser.add_argument('--chunk-size', type=int, default=BILLING_CHUNK_SIZE)
+
+    def handle(self, *args, processes, chunk_size, **options):
+        try:
+            on_date = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f'Неверная дата: {options["date"]}.')
+
+        checkpoints = bill_cards(on_date, processes, chunk_size)
+        for checkpoint in checkpoints:
+            self.stdout.write(
+                f'{checkpoint.job} {checkpoint.period} '
+                f'[{checkpoint.partition}] до id {checkpoint.end_id}: '
+                f'плата списана с {checkpoint.processed} карт.'
+            )
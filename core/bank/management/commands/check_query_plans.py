@@ -0,0 +1,84 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from bank.models import BankAccount, Transaction
+
+
+HISTORY_PAGE_SIZE = 50
+
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # Строка плана без USING INDEX: "SCAN t", но не "SCAN t USING INDEX i"
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),
+}
+
+
+def get_canonical_queries(user_pk=1, bank_account_pk=1, transaction_type_pk=1):
+    """Основные запросы истории операций, которые должны идти по индексам."""
+    user_bank_accounts = BankAccount.objects.filter(user=user_pk).values('pk')
+    return {
+        'account_outgoing': Transaction.objects.filter(
+            from_number=bank_account_pk
+        ).order_by('-date')[:HISTORY_PAGE_SIZE],
+        'account_incoming': Transaction.objects.filter(
+            to_number=bank_account_pk
+        ).order_by('-date')[:HISTORY_PAGE_SIZE],
+        'transaction_type_period': Transaction.objects.filter(
+            transaction_type=transaction_type_pk,
+            date__gte=timezone.now() - timedelta(days=30)
+        ).order_by('date')[:HISTORY_PAGE_SIZE],
+        'user_history': Transaction.objects.filter(
+            Q(from_number__in=user_bank_accounts) | Q(to_number__in=user_bank_accounts)
+        ).order_by('-date', '-id')[:HISTORY_PAGE_SIZE],
+    }
+
+
+def get_table_rows(table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table]
+            )
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для основных запросов истории транзакций и '
+        'завершается с ошибкой, если какой-то из них планирует '
+        'последовательное сканирование большой таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=100000,
+            help='Таблицы меньшего размера могут сканироваться целиком.'
+        )
+
+    def handle(self, *args, min_rows, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'База данных {connection.vendor} не поддерживается.')
+
+        failures = []
+        for name, queryset in get_canonical_queries().items():
+            plan = queryset.explain()
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{name}:\n{plan}\n')
+
+            for table in sorted(set(pattern.findall(plan))):
+                rows = get_table_rows(table)
+                if rows >= min_rows:
+                    failures.append(f'{name}: seq scan on {table} ({rows} rows)')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы.'))
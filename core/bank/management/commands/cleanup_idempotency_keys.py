@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from bank.models import IdempotencyKey
+from bank.idempotency import get_expiration_time
+
+
+CLEANUP_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет ключи Idempotency-Key старше IDEMPOTENCY_KEY_TTL пачками '
+        'по индексу created_at. Запускается по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE)
+
+    def handle(self, *args, batch_size, **options):
+        expired = IdempotencyKey.objects.filter(created_at__lt=get_expiration_time())
+        count = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            count += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
+
+        self.stdout.write(f'Удалено ключей: {count}.')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from bank.journal import compact_postings, COMPACTION_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Сворачивает проводки журнала (Posting) в снимки балансов счетов '
+        '(BalanceSnapshot) пачками по диапазону счетов. Запускается '
+        'по расписанию (cron), прерванный запуск продолжает с последней пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=COMPACTION_CHUNK_SIZE,
+            help='Число счетов в пачке.'
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        checkpoint = compact_postings(chunk_size)
+        self.stdout.write(
+            f'Проводки свернуты по счет {checkpoint.last_id}, '
+            f'обновлено снимков: {checkpoint.processed}.'
+        )
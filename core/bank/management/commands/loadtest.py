@@ -0,0 +1,135 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = (
+    '/api/v1/',
+    '/api/v1/user_card/',
+    '/api/v1/user_deposit/',
+    '/api/v1/user_transaction/',
+)
+
+
+async def read_response(reader):
+    """Читает HTTP/1.1 ответ (Content-Length или chunked), возвращает статус."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Соединение закрыто сервером.')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест запущенного сервера: concurrency клиентов с '
+        'keep-alive соединениями по очереди запрашивают paths. Печатает RPS, '
+        'p50/p99 задержки и число ошибок для каждого base url - так '
+        'сравниваются режимы WSGI (sync) и ASGI (ASYNC_READ_VIEWS=1), '
+        'например: loadtest http://localhost:8001 http://localhost:1337 '
+        '--token ...'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_urls', nargs='+')
+        parser.add_argument('--token', help='DRF Token для Authorization.')
+        parser.add_argument('--paths', default=','.join(DEFAULT_PATHS))
+        parser.add_argument('--concurrency', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=30.0)
+
+    def handle(self, *args, base_urls, token, paths, concurrency, duration,
+               **options):
+        paths = [path for path in paths.split(',') if path]
+        for base_url in base_urls:
+            latencies, errors, elapsed = asyncio.run(
+                self.run(base_url, token, paths, concurrency, duration)
+            )
+            self.report(base_url, latencies, errors, elapsed)
+
+    async def run(self, base_url, token, paths, concurrency, duration):
+        url = urlsplit(base_url)
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError(f'Поддерживается только http://host[:port]: {base_url}')
+        host, port = url.hostname, url.port or 80
+
+        headers = f'Host: {url.netloc}\r\nConnection: keep-alive\r\n'
+        if token:
+            headers += f'Authorization: Token {token}\r\n'
+        requests = [
+            f'GET {url.path.rstrip("/")}{path} HTTP/1.1\r\n{headers}\r\n'.encode()
+            for path in paths
+        ]
+
+        latencies = []
+        errors = []
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def client(offset):
+            connection = None
+            i = offset
+            while time.perf_counter() < deadline:
+                request = requests[i % len(requests)]
+                i += 1
+                request_start = time.perf_counter()
+                try:
+                    if connection is None:
+                        connection = await asyncio.open_connection(host, port)
+                    reader, writer = connection
+                    writer.write(request)
+                    await writer.drain()
+                    status, is_closed = await read_response(reader)
+                except (OSError, ConnectionError, ValueError,
+                        asyncio.IncompleteReadError) as exc:
+                    errors.append(type(exc).__name__)
+                    connection = self.close(connection)
+                    continue
+
+                latencies.append(time.perf_counter() - request_start)
+                if status >= 400:
+                    errors.append(f'HTTP {status}')
+                if is_closed:
+                    connection = self.close(connection)
+            self.close(connection)
+
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    def close(self, connection):
+        if connection is not None:
+            connection[1].close()
+        return None
+
+    def report(self, base_url, latencies, errors, elapsed):
+        self.stdout.write(base_url)
+        if not latencies:
+            self.stdout.write(f'    нет успешных ответов, ошибок: {len(errors)}')
+            return
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'    requests {len(latencies):>8}   rps {len(latencies) / elapsed:>9.1f}'
+            f'   p50 {p50 * 1000:>8.1f} ms   p99 {p99 * 1000:>8.1f} ms'
+            f'   errors {len(errors)}'
+        )
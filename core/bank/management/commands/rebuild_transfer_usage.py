@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import DateField, F, Sum
+from django.db.models.functions import TruncMonth
+
+from bank.models import Transaction, TransferUsage
+
+
+REBUILD_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики месячного лимита переводов (TransferUsage) '
+        'из истории транзакций: одна агрегация GROUP BY (пользователь, месяц) '
+        'и bulk_create. Без --month пересчитываются все месяцы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Месяц YYYY-MM.')
+
+    def handle(self, *args, month, **options):
+        transactions = Transaction.objects.filter(
+            from_number__isnull=False, to_number__isnull=False
+        ).exclude(from_number__user=F('to_number__user'))
+        usages = TransferUsage.objects.all()
+
+        if month:
+            try:
+                month = date.fromisoformat(f'{month}-01')
+            except ValueError:
+                raise CommandError(f'Неверный месяц: {month}.')
+            usages = usages.filter(month=month)
+
+        rows = transactions.annotate(
+            month=TruncMonth('date', output_field=DateField())
+        ).values('from_number__user', 'month').annotate(total=Sum('money'))
+        if month:
+            rows = rows.filter(month=month)
+
+        with transaction.atomic():
+            usages.delete()
+            created = TransferUsage.objects.bulk_create(
+                (
+                    TransferUsage(
+                        user_id=row['from_number__user'],
+                        month=row['month'],
+                        money=row['total']
+                    )
+                    for row in rows.order_by()
+                ),
+                batch_size=REBUILD_BATCH_SIZE
+            )
+
+        self.stdout.write(f'Пересчитано счетчиков: {len(created)}.')
@@ -0,0 +1,45 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bank.reconcile import (
+    reconcile,
+    Mismatch,
+    RECONCILE_PROCESSES,
+    RECONCILE_RANGE_SIZE,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет балансы счетов (AccountBalance) с журналом проводок '
+        'и историей транзакций. Диапазоны счетов проверяются в пуле процессов, '
+        'расхождения выводятся отчетом, при расхождениях команда завершается '
+        'с ошибкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=RECONCILE_PROCESSES)
+        parser.add_argument('--range-size', type=int, default=RECONCILE_RANGE_SIZE)
+        parser.add_argument('--output', help='Файл отчета о расхождениях (CSV).')
+
+    def handle(self, *args, processes, range_size, output, **options):
+        checked, mismatches = reconcile(processes, range_size)
+
+        for row in mismatches:
+            self.stdout.write(
+                f'Счет {row.bank_account_id}: баланс {row.balance}, '
+                f'по журналу {row.journal_balance}; операции {row.history}, '
+                f'проводки {row.journal_history}'
+            )
+        if output:
+            with open(output, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(Mismatch._fields)
+                writer.writerows(mismatches)
+
+        self.stdout.write(
+            f'Проверено счетов: {checked}, расхождений: {len(mismatches)}.'
+        )
+        if mismatches:
+            raise CommandError(f'Найдено расхождений: {len(mismatches)}.')
@@ -0,0 +1,403 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .custom_serializer import serializer_measured
+
+
+# Границы корзин гистограммы задержки запроса, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Скользящее окно последних запросов view для квантилей
+ROLLING_WINDOW = 1024
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_FILE_SUFFIX = '.json'
+UNRESOLVED_VIEW = 'unresolved'
+
+# Счетчики текущего запроса. contextvars переходят в потоки sync_to_async,
+# поэтому запросы async views тоже попадают в счетчики своего запроса.
+request_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'serializer_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+
+def instrument_query(execute, sql, params, many, context):
+    """connection.execute_wrappers: число и время запросов к бд."""
+    stats = request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def install_query_instrumentation(db_connection):
+    if instrument_query not in db_connection.execute_wrappers:
+        db_connection.execute_wrappers.append(instrument_query)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_query_instrumentation(connection)
+
+
+@receiver(serializer_measured)
+def serializer_measured_receiver(sender, seconds, **kwargs):
+    """Время валидации и представления сериализатора в счетчиках запроса."""
+    stats = request_stats.get()
+    if stats is not None:
+        stats.serializer_seconds += seconds
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.queries_sum = 0
+        self.db_seconds_sum = 0.0
+        self.serializer_seconds_sum = 0.0
+        # Без +Inf, корзина len(LATENCY_BUCKETS) - запросы дольше последней границы
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latencies = deque(maxlen=ROLLING_WINDOW)
+        self.queries = deque(maxlen=ROLLING_WINDOW)
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    Суммирует снимки метрик воркеров [(pid, rows)] по (view, method).
+    Окна квантилей берутся только у живых процессов: окно остановленного
+    воркера не обновится и исказило бы квантили.
+    """
+    merged = {}
+    for pid, rows in snapshots:
+        is_alive = is_process_alive(pid)
+        for (view, method, count, errors, latency_sum, queries_sum, db_seconds,
+             serializer_seconds, buckets, latencies, queries) in rows:
+            row = merged.setdefault((view, method), [
+                view, method, 0, 0, 0.0, 0, 0.0, 0.0, [0] * len(buckets), [], []
+            ])
+            row[2] += count
+            row[3] += errors
+            row[4] += latency_sum
+            row[5] += queries_sum
+            row[6] += db_seconds
+            row[7] += serializer_seconds
+            row[8] = [total + bucket for total, bucket in zip(row[8], buckets)]
+            if is_alive:
+                row[9].extend(latencies)
+                row[10].extend(queries)
+    return [tuple(row) for _, row in sorted(merged.items())]
+
+
+class MetricsRegistry:
+    """
+    Метрики запросов по имени url (view_name) в памяти процесса.
+    Запись - несколько операций под lock, квантили считаются только
+    при выдаче /metrics.
+    Без settings.METRICS_MULTIPROCESS_DIR каждый воркер gunicorn отдает
+    свои метрики. С ним воркер не реже раза в METRICS_FLUSH_INTERVAL секунд
+    записывает снимок метрик в файл <pid>.json этого каталога, а /metrics
+    суммирует файлы всех воркеров - счетчики не зависят от того, какой
+    воркер ответил на опрос.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.views = defaultdict(ViewMetrics)
+        self.flushed_at = 0.0
+
+    def record(self, view, method, status_code, latency, stats):
+        with self.lock:
+            metrics = self.views[(view, method)]
+            metrics.count += 1
+            if status_code >= 500:
+                metrics.errors += 1
+            metrics.latency_sum += latency
+            metrics.queries_sum += stats.queries
+            metrics.db_seconds_sum += stats.db_seconds
+            metrics.serializer_seconds_sum += stats.serializer_seconds
+            metrics.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            metrics.latencies.append(latency)
+            metrics.queries.append(stats.queries)
+
+        flush_interval = settings.METRICS_FLUSH_INTERVAL
+        if settings.METRICS_MULTIPROCESS_DIR and (
+            time.monotonic() - self.flushed_at >= flush_interval
+        ):
+            self.flush()
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+        if settings.METRICS_MULTIPROCESS_DIR:
+            try:
+                os.remove(self.get_path())
+            except FileNotFoundError:
+                pass
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                (view, method, metrics.count, metrics.errors, metrics.latency_sum,
+                 metrics.queries_sum, metrics.db_seconds_sum,
+                 metrics.serializer_seconds_sum, list(metrics.latency_buckets),
+                 list(metrics.latencies), list(metrics.queries))
+                for (view, method), metrics in sorted(self.views.items())
+            ]
+
+    def get_path(self, pid=None):
+        return os.path.join(
+            settings.METRICS_MULTIPROCESS_DIR,
+            f'{pid or os.getpid()}{METRICS_FILE_SUFFIX}'
+        )
+
+    def flush(self):
+        """
+        Атомарно (запись во временный файл и os.replace) сохраняет снимок
+        метрик процесса. Снимки пишутся по одному, поэтому более старый
+        не может заменить более новый.
+        """
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.flushed_at = time.monotonic()
+            directory = settings.METRICS_MULTIPROCESS_DIR
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', dir=directory, prefix='.', suffix='.tmp', delete=False
+            ) as file:
+                json.dump(self.snapshot(), file)
+            os.replace(file.name, self.get_path())
+        finally:
+            self.flush_lock.release()
+
+    def collect(self):
+        """Строки метрик процесса или, при общем каталоге, всех воркеров."""
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if not directory:
+            return merge_snapshots([(os.getpid(), self.snapshot())])
+
+        self.flush()
+        snapshots = []
+        for name in os.listdir(directory):
+            pid = name[:-len(METRICS_FILE_SUFFIX)]
+            if not (name.endswith(METRICS_FILE_SUFFIX) and pid.isdigit()):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as file:
+                    snapshots.append((int(pid), json.load(file)))
+            except FileNotFoundError:
+                continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        """Prometheus text format 0.0.4."""
+        lines = {
+            'requests': [
+                '# HELP star_bank_requests_total Number of requests.',
+                '# TYPE star_bank_requests_total counter',
+            ],
+            'errors': [
+                '# HELP star_bank_request_errors_total Number of 5xx responses.',
+                '# TYPE star_bank_request_errors_total counter',
+            ],
+            'latency': [
+                '# HELP star_bank_request_duration_seconds Request latency.',
+                '# TYPE star_bank_request_duration_seconds histogram',
+            ],
+            'latency_window': [
+                '# HELP star_bank_request_duration_window_seconds Request latency '
+                f'quantiles over the last {ROLLING_WINDOW} requests of each worker.',
+                '# TYPE star_bank_request_duration_window_seconds summary',
+            ],
+            'queries': [
+                '# HELP star_bank_db_queries_total Number of DB queries.',
+                '# TYPE star_bank_db_queries_total counter',
+            ],
+            'queries_window': [
+                '# HELP star_bank_db_queries_window DB queries per request '
+                f'quantiles over the last {ROLLING_WINDOW} requests of each worker.',
+                '# TYPE star_bank_db_queries_window summary',
+            ],
+            'db_seconds': [
+                '# HELP star_bank_db_seconds_total Time spent in DB queries.',
+                '# TYPE star_bank_db_seconds_total counter',
+            ],
+            'serializer_seconds': [
+                '# HELP star_bank_serializer_seconds_total Time spent in serializers.',
+                '# TYPE star_bank_serializer_seconds_total counter',
+            ],
+        }
+
+        for (view, method, count, errors, latency_sum, queries_sum, db_seconds,
+             serializer_seconds, buckets, latencies, queries) in self.collect():
+            latencies.sort()
+            queries.sort()
+            labels = f'view="{view}",method="{method}"'
+            lines['requests'].append(f'star_bank_requests_total{{{labels}}} {count}')
+            lines['errors'].append(
+                f'star_bank_request_errors_total{{{labels}}} {errors}'
+            )
+
+            cumulative = 0
+            for bound, bucket in zip((*LATENCY_BUCKETS, '+Inf'), buckets):
+                cumulative += bucket
+                lines['latency'].append(
+                    f'star_bank_request_duration_seconds_bucket'
+                    f'{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines['latency'].append(
+                f'star_bank_request_duration_seconds_sum{{{labels}}} {latency_sum}'
+            )
+            lines['latency'].append(
+                f'star_bank_request_duration_seconds_count{{{labels}}} {count}'
+            )
+
+            for name, metric, window in (
+                ('latency_window', 'star_bank_request_duration_window_seconds',
+                 latencies),
+                ('queries_window', 'star_bank_db_queries_window', queries),
+            ):
+                for quantile in QUANTILES:
+                    # Пустое окно - только остановленные воркеры
+                    value = 'NaN'
+                    if window:
+                        index = min(len(window) - 1, int(len(window) * quantile))
+                        value = window[index]
+                    lines[name].append(
+                        f'{metric}{{{labels},quantile="{quantile}"}} {value}'
+                    )
+                lines[name].append(f'{metric}_sum{{{labels}}} {sum(window)}')
+                lines[name].append(f'{metric}_count{{{labels}}} {len(window)}')
+
+            lines['queries'].append(
+                f'star_bank_db_queries_total{{{labels}}} {queries_sum}'
+            )
+            lines['db_seconds'].append(
+                f'star_bank_db_seconds_total{{{labels}}} {db_seconds}'
+            )
+            lines['serializer_seconds'].append(
+                f'star_bank_serializer_seconds_total{{{labels}}} {serializer_seconds}'
+            )
+
+        return '\n'.join(line for group in lines.values() for line in group) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Записывает по каждому запросу (по имени url) задержку, число и время
+    запросов к бд и время сериализаторов в registry. Подключается первой
+    в MIDDLEWARE, отключается settings.METRICS_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        # Соединение могло открыться до импорта модуля (connection_created)
+        install_query_instrumentation(connection)
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        return self.finish(request, response, start, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        return self.finish(request, response, start, stats)
+
+    def finish(self, request, response, start, stats):
+        """
+        Записывает метрики ответа. Тело StreamingHttpResponse (выгрузки)
+        формируется уже после возврата из middleware, поэтому такой ответ
+        учитывается, когда сервер дочитает или закроет streaming_content.
+        """
+        if not response.streaming:
+            self.record(request, response, time.perf_counter() - start, stats)
+            return response
+        response.streaming_content = self.measure_streaming(
+            request, response, response.streaming_content, start, stats
+        )
+        return response
+
+    def measure_streaming(self, request, response, content, start, stats):
+        # Запросы к бд при формировании частей тела - тоже запросы этого
+        # запроса. Счетчики выставляются только на время next(): между
+        # частями итератор может продолжаться в другом контексте.
+        try:
+            iterator = iter(content)
+            while True:
+                token = request_stats.set(stats)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    request_stats.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, time.perf_counter() - start, stats)
+
+    def record(self, request, response, latency, stats):
+        resolver_match = request.resolver_match
+        view = UNRESOLVED_VIEW if resolver_match is None else resolver_match.view_name
+        if view != 'metrics':
+            registry.record(view, request.method, response.status_code, latency, stats)
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus, только для адресов METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404()
+    return HttpResponse(registry.render(), content_type=METRICS_CONTENT_TYPE)
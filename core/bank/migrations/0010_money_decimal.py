@@ -0,0 +1,29 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:22
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0009_card_is_blocked_alter_card_cashback_money'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='card',
+            name='money',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20, verbose_name='сумма'),
+        ),
+        migrations.AlterField(
+            model_name='deposit',
+            name='money',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20, verbose_name='сумма'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='money',
+            field=models.DecimalField(decimal_places=2, max_digits=20, verbose_name='сумма'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0010_money_decimal'),
+    ]
+
+    operations = [
+        # Сначала составные индексы, затем удаление одиночных индексов FK
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['from_number', '-date'], name='transaction_from_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['to_number', '-date'], name='transaction_to_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'date'], name='transaction_type_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='from_number',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transaction_from', to='bank.bankaccount', verbose_name='от счета'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='to_number',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transaction_to', to='bank.bankaccount', verbose_name='к счета'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='bank.transactiontype', verbose_name='тип'),
+        ),
+    ]
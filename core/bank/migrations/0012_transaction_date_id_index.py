@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0011_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date', 'id'], name='transaction_date_id_idx'),
+        ),
+    ]
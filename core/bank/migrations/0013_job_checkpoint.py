@@ -0,0 +1,33 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0012_transaction_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=64, verbose_name='задача')),
+                ('period', models.CharField(max_length=32, verbose_name='период')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='последний id')),
+                ('processed', models.PositiveBigIntegerField(default=0, verbose_name='обработано')),
+                ('is_completed', models.BooleanField(default=False, verbose_name='завершена')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='обновлена')),
+            ],
+            options={
+                'verbose_name': 'контрольная точка задачи',
+                'verbose_name_plural': 'контрольные точки задач',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobcheckpoint',
+            constraint=models.UniqueConstraint(fields=('job', 'period'), name='job_checkpoint_job_period_unique'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0013_job_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='jobcheckpoint',
+            name='job_checkpoint_job_period_unique',
+        ),
+        migrations.AddField(
+            model_name='jobcheckpoint',
+            name='end_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='последний id диапазона'),
+        ),
+        migrations.AddField(
+            model_name='jobcheckpoint',
+            name='partition',
+            field=models.PositiveIntegerField(default=0, verbose_name='диапазон'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobcheckpoint',
+            constraint=models.UniqueConstraint(fields=('job', 'period', 'partition'), name='job_checkpoint_job_period_unique'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:06
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bank', '0014_job_checkpoint_partition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='месяц')),
+                ('money', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20, verbose_name='сумма')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'сумма переводов за месяц',
+                'verbose_name_plural': 'суммы переводов за месяц',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transferusage',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='transfer_usage_user_month_unique'),
+        ),
+    ]
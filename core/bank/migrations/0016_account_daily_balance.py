@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0015_transfer_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDailyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='дата')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='остаток')),
+                ('bank_account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_balances', to='bank.bankaccount', verbose_name='счет')),
+            ],
+            options={
+                'verbose_name': 'остаток счета за день',
+                'verbose_name_plural': 'остатки счетов за день',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountdailybalance',
+            constraint=models.UniqueConstraint(fields=('bank_account', 'date'), name='account_daily_balance_account_date_unique'),
+        ),
+    ]
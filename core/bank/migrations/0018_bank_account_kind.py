@@ -0,0 +1,29 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+def fill_bank_account_kind(apps, schema_editor):
+    BankAccount = apps.get_model('bank', 'BankAccount')
+    Card = apps.get_model('bank', 'Card')
+    Deposit = apps.get_model('bank', 'Deposit')
+    for kind, model in (('card', Card), ('deposit', Deposit)):
+        BankAccount.objects.filter(
+            pk__in=model.objects.values('bank_account_id')
+        ).update(kind=kind)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0017_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('card', 'Карта'), ('deposit', 'Вклад')], default='', editable=False, max_length=16, verbose_name='тип счета'),
+        ),
+        migrations.RunPython(fill_bank_account_kind, migrations.RunPython.noop),
+    ]
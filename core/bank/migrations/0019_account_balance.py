@@ -0,0 +1,61 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:41
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_balances(apps, schema_editor):
+    AccountBalance = apps.get_model('bank', 'AccountBalance')
+    for model_name in ('Card', 'Deposit'):
+        model = apps.get_model('bank', model_name)
+        rows = model.objects.values_list('bank_account_id', 'money').iterator()
+        AccountBalance.objects.bulk_create(
+            (
+                AccountBalance(bank_account_id=pk, balance=money)
+                for pk, money in rows
+            ),
+            batch_size=10000
+        )
+
+
+def restore_balances(apps, schema_editor):
+    AccountBalance = apps.get_model('bank', 'AccountBalance')
+    for model_name in ('Card', 'Deposit'):
+        model = apps.get_model('bank', model_name)
+        model.objects.update(money=models.Subquery(
+            AccountBalance.objects.filter(
+                pk=models.OuterRef('bank_account_id')
+            ).values('balance')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0018_bank_account_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('bank_account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='bank.bankaccount', verbose_name='счет')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20, verbose_name='сумма')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='версия')),
+            ],
+            options={
+                'verbose_name': 'баланс счета',
+                'verbose_name_plural': 'балансы счетов',
+            },
+        ),
+        migrations.RunPython(copy_balances, restore_balances),
+        migrations.RemoveField(
+            model_name='card',
+            name='money',
+        ),
+        migrations.RemoveField(
+            model_name='deposit',
+            name='money',
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:52
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_snapshots(apps, schema_editor):
+    # Открывающие снимки - текущие балансы, проводок до них нет
+    AccountBalance = apps.get_model('bank', 'AccountBalance')
+    BalanceSnapshot = apps.get_model('bank', 'BalanceSnapshot')
+    rows = AccountBalance.objects.values_list('bank_account_id', 'balance').iterator()
+    BalanceSnapshot.objects.bulk_create(
+        (BalanceSnapshot(bank_account_id=pk, balance=balance) for pk, balance in rows),
+        batch_size=10000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0019_account_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('bank_account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance_snapshot', serialize=False, to='bank.bankaccount', verbose_name='счет')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20, verbose_name='сумма')),
+                ('last_posting_id', models.BigIntegerField(default=0, verbose_name='последняя проводка')),
+            ],
+            options={
+                'verbose_name': 'снимок баланса счета',
+                'verbose_name_plural': 'снимки балансов счетов',
+            },
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='сумма')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='создана')),
+                ('bank_account', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='bank.bankaccount', verbose_name='счет')),
+                ('transaction', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='postings', to='bank.transaction', verbose_name='транзакция')),
+            ],
+            options={
+                'verbose_name': 'проводка',
+                'verbose_name_plural': 'проводки',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['bank_account', 'id'], name='posting_account_id_idx'),
+        ),
+        migrations.RunPython(create_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0020_journal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='balancesnapshot',
+            name='bank_account',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, primary_key=True, related_name='balance_snapshot', serialize=False, to='bank.bankaccount', verbose_name='счет'),
+        ),
+        migrations.AlterField(
+            model_name='posting',
+            name='bank_account',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='postings', to='bank.bankaccount', verbose_name='счет'),
+        ),
+    ]
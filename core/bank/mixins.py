@@ -53,8 +53,11 @@ class BankAccountSerializerMixin(serializers.Serializer):
         }
 
         with transaction.atomic():
-            bank_account = BankAccount.objects.create(**bank_account_validated_data)
-            obj = self.get_model()(**validated_data)
+            model = self.get_model()
+            bank_account = BankAccount.objects.create(
+                kind=model._meta.model_name, **bank_account_validated_data
+            )
+            obj = model(**validated_data)
             obj.bank_account = bank_account
             obj.save()
 
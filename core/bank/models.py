@@ -1,20 +1,29 @@
 from datetime import date
+from decimal import Decimal
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core import exceptions
+from django.core.serializers.json import DjangoJSONEncoder
 
 from .validators import number_validation
 
 
 USER_MODEL = get_user_model()
 DEFAULT_BANK_NAME = 'Star-Bank'
+MONEY_MAX_DIGITS = 20
+MONEY_DECIMAL_PLACES = 2
 ALLOWED_CURRENCY = [
     ('RUB', 'Рубль'),
     ('USD', 'Доллар'),
     ('EUR', 'Евро')
 ]
+# Тип счета - имя обратной связи BankAccount с Card или Deposit
+BANK_ACCOUNT_KINDS = [
+    ('card', 'Карта'),
+    ('deposit', 'Вклад')
+]
 
 
 def get_completion_data():
@@ -28,6 +37,14 @@ def get_completion_data():
     return completion_date
 
 
+class BankAccountQuerySet(models.QuerySet):
+    def with_related(self):
+        """Счета вместе с Card, Deposit и балансом одним запросом (LEFT JOIN)."""
+        return self.select_related(
+            *(kind for kind, _ in BANK_ACCOUNT_KINDS), 'balance'
+        )
+
+
 class BankAccount(models.Model):
     number = models.CharField(
         verbose_name='номер счета',
@@ -41,6 +58,16 @@ class BankAccount(models.Model):
     bank_name = models.CharField(
         verbose_name='банк', max_length=128, default=DEFAULT_BANK_NAME
     )
+    kind = models.CharField(
+        verbose_name='тип счета',
+        max_length=16,
+        choices=BANK_ACCOUNT_KINDS,
+        blank=True,
+        default='',
+        editable=False
+    )
+
+    objects = BankAccountQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'счет'
@@ -50,12 +77,121 @@ class BankAccount(models.Model):
         return f'{self.number} - {self.user}'
 
     def get_related_card_or_deposit(self):
-        related_obj = getattr(self, 'card', getattr(self, 'deposit', None))
-        if related_obj is None:
-            raise exceptions.ObjectDoesNotExist(
-                f'У объекта BankAccount {self.pk} нет связанного Card или Deposit.'
+        """
+        Card или Deposit счета. По kind загружается только нужная связь,
+        без kind связи проверяются по очереди. Django запоминает найденный
+        объект (и отсутствие связи) в экземпляре, поэтому повторные вызовы
+        и счета из with_related() не обращаются к бд.
+        """
+        kinds = [self.kind] if self.kind else [kind for kind, _ in BANK_ACCOUNT_KINDS]
+        for kind in kinds:
+            # RelatedObjectDoesNotExist - подкласс AttributeError
+            related_obj = getattr(self, kind, None)
+            if related_obj is not None:
+                return related_obj
+        raise exceptions.ObjectDoesNotExist(
+            f'У объекта BankAccount {self.pk} нет связанного Card или Deposit.'
+        )
+
+
+class AccountBalance(models.Model):
+    """
+    Баланс счета - единственное место хранения денег Card и Deposit.
+    Узкая строка на счет: переводы между картами и вкладами пишут
+    в одну таблицу, суммы по пользователю считаются без UNION.
+    version увеличивается при каждом изменении баланса (счетчик изменений
+    строки). Параллельные записи балансов упорядочиваются блокировкой
+    строки BankAccount (transfers.lock_bank_accounts).
+    """
+
+    bank_account = models.OneToOneField(
+        BankAccount,
+        verbose_name='счет',
+        related_name='balance',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    balance = models.DecimalField(
+        verbose_name='сумма',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES,
+        default=Decimal('0.00')
+    )
+    version = models.PositiveBigIntegerField(verbose_name='версия', default=0)
+
+    class Meta:
+        verbose_name = 'баланс счета'
+        verbose_name_plural = 'балансы счетов'
+
+    def __str__(self):
+        return f'{self.bank_account_id} - {self.balance}'
+
+
+class AccountBalanceMixin:
+    """
+    Поле money Card и Deposit - баланс счета в AccountBalance.
+    Присвоенное значение записывается при save(), в том числе
+    с update_fields, содержащим 'money'. Для списков нужен
+    select_related('bank_account__balance'), иначе баланс каждой
+    строки читается отдельным запросом.
+    """
+
+    @property
+    def money(self):
+        if '_money' in self.__dict__:
+            return self._money
+        try:
+            return self.bank_account.balance.balance
+        except exceptions.ObjectDoesNotExist:
+            return Decimal('0.00')
+
+    @money.setter
+    def money(self, value):
+        self._money = value
+
+    def save(self, *args, update_fields=None, **kwargs):
+        is_adding = self._state.adding
+        money = self.__dict__.pop('_money', None)
+        if update_fields is not None:
+            update_fields = [field for field in update_fields if field != 'money']
+
+        with transaction.atomic():
+            super().save(*args, update_fields=update_fields, **kwargs)
+            if money is not None or is_adding:
+                self.save_balance(Decimal('0.00') if money is None else money)
+
+    def save_balance(self, money):
+        # Та же блокировка строки счета, что у переводов и пакетных задач:
+        # они проверяют баланс после блокировки и пишут его безусловно
+        list(BankAccount.objects.select_for_update().filter(
+            pk=self.bank_account_id
+        ).values_list('pk'))
+        balance, created = AccountBalance.objects.select_for_update().get_or_create(
+            bank_account_id=self.bank_account_id, defaults={'balance': money}
+        )
+        delta = money if created else money - balance.balance
+        if not created:
+            balance.balance = money
+            balance.version = models.F('version') + 1
+            balance.save(update_fields=['balance', 'version'])
+        if delta:
+            # Прямое изменение баланса - корректировка со счетом банка в журнале
+            Posting.objects.bulk_create(
+                Posting.pair(None, None, self.bank_account_id, delta)
             )
-        return related_obj
+        self.clear_cached_balance()
+
+    def refresh_from_db(self, using=None, fields=None):
+        self.__dict__.pop('_money', None)
+        if fields is not None:
+            fields = [field for field in fields if field != 'money']
+        super().refresh_from_db(using=using, fields=fields)
+        self.clear_cached_balance()
+
+    def clear_cached_balance(self):
+        bank_account = self._state.fields_cache.get('bank_account')
+        if bank_account is not None:
+            bank_account._state.fields_cache.pop('balance', None)
 
 
 class TransactionType(models.Model):
@@ -75,16 +211,22 @@ class Transaction(models.Model):
         verbose_name='от счета',
         related_name='transaction_from',
         on_delete=models.SET_NULL,
-        null=True, blank=True
+        null=True, blank=True,
+        db_index=False
     )
     to_number = models.ForeignKey(
         BankAccount,
         verbose_name='к счета',
         related_name='transaction_to',
         on_delete=models.SET_NULL,
-        null=True, blank=True
+        null=True, blank=True,
+        db_index=False
+    )
+    money = models.DecimalField(
+        verbose_name='сумма',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES
     )
-    money = models.FloatField(verbose_name='сумма')
     currency = currency = models.CharField(
         verbose_name='валюта',
         max_length=64,
@@ -95,7 +237,8 @@ class Transaction(models.Model):
     transaction_type = models.ForeignKey(
         TransactionType,
         verbose_name='тип',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     cashback_money = models.IntegerField(
         verbose_name='Сумма кэшбэка',
@@ -106,6 +249,21 @@ class Transaction(models.Model):
     class Meta:
         verbose_name = 'транзакция'
         verbose_name_plural = 'транзакции'
+        # Индексы под историю операций счета и выборки по типу за период.
+        # Одиночные индексы внешних ключей покрываются префиксами составных.
+        indexes = [
+            models.Index(
+                fields=['from_number', '-date'], name='transaction_from_date_idx'
+            ),
+            models.Index(
+                fields=['to_number', '-date'], name='transaction_to_date_idx'
+            ),
+            models.Index(
+                fields=['transaction_type', 'date'], name='transaction_type_date_idx'
+            ),
+            # Keyset пагинация списка транзакций по (date, id)
+            models.Index(fields=['date', 'id'], name='transaction_date_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.pk} - {self.money}{self.currency}'
@@ -167,7 +325,7 @@ class CardDesign(models.Model):
         return f'{self.title}'
 
 
-class Card(models.Model):
+class Card(AccountBalanceMixin, models.Model):
     bank_account = models.OneToOneField(
         BankAccount,
         verbose_name='счет',
@@ -179,7 +337,6 @@ class Card(models.Model):
         choices=ALLOWED_CURRENCY,
         default='RUB'
     )
-    money = models.FloatField(verbose_name='сумма', default=0.0)
     card_type = models.ForeignKey(
         CardType,
         verbose_name='тип карты',
@@ -219,7 +376,7 @@ class Card(models.Model):
         return f'{self.bank_account} - {self.money}{self.currency}'
 
 
-class Deposit(models.Model):
+class Deposit(AccountBalanceMixin, models.Model):
     bank_account = models.OneToOneField(
         BankAccount,
         verbose_name='счет',
@@ -228,7 +385,6 @@ class Deposit(models.Model):
     currency = models.CharField(
         verbose_name='валюта', max_length=64, choices=ALLOWED_CURRENCY, default='RUB'
     )
-    money = models.FloatField(verbose_name='сумма', default=0.0)
     interest_rate = models.FloatField(verbose_name='ставка %', default=0.0)
     min_value = models.PositiveIntegerField(verbose_name='минимальная сумма', default=0)
     max_value = models.PositiveIntegerField(
@@ -249,3 +405,237 @@ class Deposit(models.Model):
 
     def __str__(self):
         return f'{self.bank_account} - {self.money}{self.currency}'
+
+
+class AccountDailyBalance(models.Model):
+    """
+    Остаток счета на конец дня. Строка текущего дня обновляется при каждом
+    изменении баланса, строки прошлых дней не меняются. Дни без операций
+    не хранятся - остаток на дату D берется из последней строки с date <= D.
+    """
+
+    bank_account = models.ForeignKey(
+        BankAccount,
+        verbose_name='счет',
+        related_name='daily_balances',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    date = models.DateField(verbose_name='дата')
+    balance = models.DecimalField(
+        verbose_name='остаток',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES
+    )
+
+    class Meta:
+        verbose_name = 'остаток счета за день'
+        verbose_name_plural = 'остатки счетов за день'
+        # Индекс ограничения обслуживает поиск по (bank_account, date <= D)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bank_account', 'date'],
+                name='account_daily_balance_account_date_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.bank_account_id} {self.date} - {self.balance}'
+
+
+class Posting(models.Model):
+    """
+    Проводка журнала - изменение баланса одного счета. Каждая операция
+    записывается парой проводок с суммой 0: списание (amount < 0)
+    и зачисление (amount > 0). bank_account = None - счет банка
+    (начисление процентов, плата за карту, корректировка баланса).
+    Строки только добавляются, счет с проводками удалить нельзя (PROTECT):
+    вторая проводка пары осталась бы без первой. Баланс по журналу -
+    BalanceSnapshot плюс проводки после него (bank.journal).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    transaction = models.ForeignKey(
+        Transaction,
+        verbose_name='транзакция',
+        related_name='postings',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        db_index=False
+    )
+    bank_account = models.ForeignKey(
+        BankAccount,
+        verbose_name='счет',
+        related_name='postings',
+        on_delete=models.PROTECT,
+        null=True, blank=True,
+        db_index=False
+    )
+    amount = models.DecimalField(
+        verbose_name='сумма',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES
+    )
+    created_at = models.DateTimeField(verbose_name='создана', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'проводка'
+        verbose_name_plural = 'проводки'
+        # Проводки счета после снимка: bank_account = X AND id > last_posting_id
+        indexes = [
+            models.Index(fields=['bank_account', 'id'], name='posting_account_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.transaction_id} {self.bank_account_id} - {self.amount}'
+
+    @classmethod
+    def pair(cls, transaction_id, from_number_id, to_number_id, money):
+        """Списание с from_number и зачисление на to_number."""
+        return [
+            cls(transaction_id=transaction_id, bank_account_id=from_number_id,
+                amount=-money),
+            cls(transaction_id=transaction_id, bank_account_id=to_number_id,
+                amount=money),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Свернутый баланс счета по журналу: сумма проводок счета
+    с id <= last_posting_id. Обновляется командой compact_postings.
+    """
+
+    bank_account = models.OneToOneField(
+        BankAccount,
+        verbose_name='счет',
+        related_name='balance_snapshot',
+        on_delete=models.PROTECT,
+        primary_key=True
+    )
+    balance = models.DecimalField(
+        verbose_name='сумма',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES,
+        default=Decimal('0.00')
+    )
+    last_posting_id = models.BigIntegerField(
+        verbose_name='последняя проводка', default=0
+    )
+
+    class Meta:
+        verbose_name = 'снимок баланса счета'
+        verbose_name_plural = 'снимки балансов счетов'
+
+    def __str__(self):
+        return f'{self.bank_account_id} - {self.balance} ({self.last_posting_id})'
+
+
+class TransferUsage(models.Model):
+    """
+    Сумма переводов пользователя другим пользователям за месяц - счетчик
+    для проверки AccountTarif.transfer_limit без суммирования Transaction.
+    Обновляется в транзакции бд перевода, пересчитывается из истории
+    командой rebuild_transfer_usage.
+    """
+
+    user = models.ForeignKey(
+        USER_MODEL,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    month = models.DateField(verbose_name='месяц')
+    money = models.DecimalField(
+        verbose_name='сумма',
+        max_digits=MONEY_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES,
+        default=Decimal('0.00')
+    )
+
+    class Meta:
+        verbose_name = 'сумма переводов за месяц'
+        verbose_name_plural = 'суммы переводов за месяц'
+        # Индекс ограничения покрывает и поиск по user
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month'], name='transfer_usage_user_month_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.month:%Y-%m} - {self.money}'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Сохраненный ответ на POST с заголовком Idempotency-Key.
+    Ключ уникален в пределах пользователя, повтор запроса с тем же ключом
+    получает сохраненный ответ (bank.idempotency.idempotent_response).
+    """
+
+    user = models.ForeignKey(
+        USER_MODEL,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    key = models.CharField(verbose_name='ключ', max_length=255)
+    request_hash = models.CharField(verbose_name='хэш запроса', max_length=64)
+    # Заполняется в той же транзакции бд, что и создание ключа
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='статус ответа', null=True
+    )
+    response_data = models.JSONField(
+        verbose_name='тело ответа', encoder=DjangoJSONEncoder, null=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='создан', default=timezone.now, db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'], name='idempotency_key_user_key_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.key} - {self.status_code}'
+
+
+class JobCheckpoint(models.Model):
+    """
+    Прогресс пакетной задачи (начисление процентов и т.п.) за период.
+    last_id - последний обработанный pk, обновляется в той же транзакции бд,
+    что и обработанная пачка, поэтому повторный запуск продолжает с места
+    остановки и не обрабатывает строки дважды.
+    Задача, разбитая на диапазоны pk (partition), хранит по строке
+    на диапазон, end_id - верхняя граница диапазона включительно.
+    """
+
+    job = models.CharField(verbose_name='задача', max_length=64)
+    period = models.CharField(verbose_name='период', max_length=32)
+    partition = models.PositiveIntegerField(verbose_name='диапазон', default=0)
+    last_id = models.BigIntegerField(verbose_name='последний id', default=0)
+    end_id = models.BigIntegerField(
+        verbose_name='последний id диапазона', null=True, blank=True
+    )
+    processed = models.PositiveBigIntegerField(verbose_name='обработано', default=0)
+    is_completed = models.BooleanField(verbose_name='завершена', default=False)
+    updated_at = models.DateTimeField(verbose_name='обновлена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'контрольная точка задачи'
+        verbose_name_plural = 'контрольные точки задач'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job', 'period', 'partition'],
+                name='job_checkpoint_job_period_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.job} {self.period} - {self.last_id}'
@@ -0,0 +1,136 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) пагинация по уникальному набору полей ordering.
+    Курсор хранит значения всех полей ordering последней записи страницы,
+    следующая страница выбирается условием
+    (f1 > v1) OR (f1 = v1 AND f2 > v2) ... по индексу, без OFFSET,
+    поэтому время ответа не зависит от номера страницы.
+    Последним полем ordering должен быть уникальный ключ (id).
+    """
+
+    ordering = ('id',)
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же, что paginate_queryset, для async views (async ORM)."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse, self.current_position = False, None
+        else:
+            self.reverse = self.cursor.reverse
+            self.current_position = self.cursor.position
+
+        if self.reverse:
+            ordering = _reverse_ordering(self.ordering)
+        else:
+            ordering = self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        if self.current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.get_keyset_filter(ordering, self.current_position)
+                )
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Лишняя запись нужна, чтобы узнать, есть ли следующая страница
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        current_position = self.current_position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if self.reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, ordering, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        keyset_filter = Q()
+        equal_filter = Q()
+        for order, value in zip(ordering, values):
+            field_name = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            keyset_filter |= equal_filter & Q(**{f'{field_name}__{lookup}': value})
+            equal_filter &= Q(**{field_name: value})
+
+        # Дублирующее условие по первому полю позволяет бд сузить диапазон индекса
+        first_order = ordering[0]
+        first_lookup = 'lte' if first_order.startswith('-') else 'gte'
+        return Q(**{f'{first_order.lstrip("-")}__{first_lookup}': values[0]}) & (
+            keyset_filter
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(str(attr))
+        return json.dumps(values)
+
+
+class TransactionPagination(KeysetPagination):
+    ordering = ('-date', '-id')
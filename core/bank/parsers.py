@@ -0,0 +1,23 @@
+import codecs
+import json
+
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Парсит поток NDJSON (один JSON объект на строку) в список."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            decoded_stream = codecs.getreader(encoding)(stream)
+            return [json.loads(line) for line in decoded_stream if line.strip()]
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error - {exc}')
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+import django
+from django.conf import settings
+from django.db import connections
+
+
+def get_pool_context():
+    """
+    fork, где он доступен (Linux): дочерний процесс наследует настроенный
+    django. Иначе (Windows) - spawn, процессы настраивают django сами
+    в setup_worker.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('spawn')
+
+
+def setup_worker(settings_module):
+    """initializer пула: процесс spawn начинает без настроенного django."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def run_in_pool(func, args_list, processes, context=None):
+    """
+    Выполняет func(*args) для каждого args из args_list в пуле
+    из processes процессов, при processes <= 1 или одном задании -
+    в текущем процессе. Возвращает результаты в порядке args_list.
+    func должна быть функцией уровня модуля (передается по имени).
+    """
+    if processes <= 1 or len(args_list) <= 1:
+        return [func(*args) for args in args_list]
+
+    # Дочерние процессы не должны унаследовать открытые соединения с бд
+    connections.close_all()
+    context = context or get_pool_context()
+    with context.Pool(
+        min(processes, len(args_list)),
+        initializer=setup_worker,
+        initargs=(settings.SETTINGS_MODULE,)
+    ) as pool:
+        return pool.starmap(func, args_list)
@@ -0,0 +1,133 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import AccountBalance, BalanceSnapshot, BankAccount, Posting, Transaction
+from .processes import run_in_pool
+
+
+RECONCILE_RANGE_SIZE = 50000
+RECONCILE_PROCESSES = 4
+
+# Расхождение по счету: баланс AccountBalance и по журналу, сумма операций
+# счета по Transaction и по проводкам этих операций
+Mismatch = namedtuple(
+    'Mismatch',
+    ['bank_account_id', 'balance', 'journal_balance', 'history', 'journal_history']
+)
+
+
+def get_account_ranges(range_size=RECONCILE_RANGE_SIZE):
+    """Диапазоны pk счетов [(start, end)] по range_size pk, границы включительно."""
+    bounds = BankAccount.objects.aggregate(min_id=Min('pk'), max_id=Max('pk'))
+    if bounds['min_id'] is None:
+        return []
+    return [
+        (start, min(start + range_size - 1, bounds['max_id']))
+        for start in range(bounds['min_id'], bounds['max_id'] + 1, range_size)
+    ]
+
+
+def get_journal_start_id():
+    """
+    pk первой Transaction с проводками. Операции до появления журнала
+    проводок не имеют и сверяются только через открывающие снимки.
+    """
+    return Posting.objects.filter(transaction__isnull=False).order_by(
+        'pk'
+    ).values_list('transaction_id', flat=True).first()
+
+
+def get_totals(queryset, field, value):
+    """{значение field: Sum(value)} одним GROUP BY."""
+    return dict(
+        queryset.values_list(field).annotate(total=Sum(value)).order_by()
+    )
+
+
+def reconcile_range(start_id, end_id, journal_start_id):
+    """
+    Сверяет счета с pk в [start_id, end_id]:
+    - AccountBalance.balance и баланс по журналу (снимок + проводки после него);
+    - сумму операций счета по Transaction (to_number - from_number)
+      и сумму проводок этих операций.
+    На каждую таблицу один агрегирующий запрос по диапазону. Запросы
+    выполняются в одной транзакции бд (на PostgreSQL - REPEATABLE READ),
+    поэтому параллельные переводы не дают ложных расхождений.
+    Возвращает (число счетов, [Mismatch]).
+    """
+    def in_range(field):
+        return {f'{field}__gte': start_id, f'{field}__lte': end_id}
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY'
+                )
+
+        balances = dict(
+            AccountBalance.objects.filter(**in_range('pk')).values_list(
+                'pk', 'balance'
+            )
+        )
+        journal_balances = defaultdict(Decimal, BalanceSnapshot.objects.filter(
+            **in_range('pk')
+        ).values_list('pk', 'balance'))
+        postings = Posting.objects.filter(**in_range('bank_account_id'))
+        pending = get_totals(
+            postings.filter(pk__gt=Coalesce(
+                Subquery(BalanceSnapshot.objects.filter(
+                    pk=OuterRef('bank_account_id')
+                ).values('last_posting_id')),
+                0
+            )),
+            'bank_account_id', 'amount'
+        )
+        for pk, total in pending.items():
+            journal_balances[pk] += total
+
+        history = defaultdict(Decimal)
+        journal_history = defaultdict(Decimal)
+        if journal_start_id is not None:
+            transactions = Transaction.objects.filter(pk__gte=journal_start_id)
+            for field, sign in (('to_number', 1), ('from_number', -1)):
+                totals = get_totals(
+                    transactions.filter(**in_range(f'{field}_id')), field, 'money'
+                )
+                for pk, total in totals.items():
+                    history[pk] += sign * total
+            journal_history.update(get_totals(
+                postings.filter(transaction_id__gte=journal_start_id),
+                'bank_account_id', 'amount'
+            ))
+
+    mismatches = []
+    pks = set(balances) | set(journal_balances) | set(history) | set(journal_history)
+    for pk in sorted(pks):
+        row = Mismatch(
+            pk, balances.get(pk), journal_balances[pk], history[pk], journal_history[pk]
+        )
+        if row.balance != row.journal_balance or row.history != row.journal_history:
+            mismatches.append(row)
+    return len(balances), mismatches
+
+
+def reconcile(processes=RECONCILE_PROCESSES, range_size=RECONCILE_RANGE_SIZE):
+    """
+    Сверяет балансы всех счетов с журналом и историей операций.
+    Счета делятся на диапазоны pk по range_size, диапазоны обрабатываются
+    в пуле из processes процессов. Возвращает (число счетов, [Mismatch]).
+    """
+    journal_start_id = get_journal_start_id()
+    args = [
+        (start_id, end_id, journal_start_id)
+        for start_id, end_id in get_account_ranges(range_size)
+    ]
+    results = run_in_pool(reconcile_range, args, processes)
+
+    checked = sum(count for count, _ in results)
+    return checked, [row for _, mismatches in results for row in mismatches]
@@ -0,0 +1,51 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EchoBuffer:
+    """Псевдо-файл для csv.writer: write возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Рендерер выгрузок. Основные данные отдаются потоком через stream(),
+    render() используется только для ответов с ошибками.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+    def stream(self, fields, rows):
+        raise NotImplementedError('.stream() must be implemented.')
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, fields, rows):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(row) + '\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, fields, rows):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([row[field] for field in fields])
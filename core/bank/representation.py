@@ -0,0 +1,238 @@
+import decimal
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import (
+    ManyRelatedField,
+    PrimaryKeyRelatedField,
+    PKOnlyObject,
+)
+from rest_framework.settings import api_settings
+
+from .fields import MoneyField
+
+
+# Значение поля, которое не попадает в ответ (SkipField)
+SKIP = object()
+
+# Поля, чей to_representation сводится к простому преобразованию значения
+FAST_CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.BooleanField: bool,
+    serializers.CharField: str,
+    serializers.EmailField: str,
+}
+
+
+def has_iso_format(field, default_format):
+    output_format = getattr(field, 'format', default_format)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+def get_choice_converter(field):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '':
+            return value
+        return choices.get(str(value), value)
+
+    return convert
+
+
+def get_date_converter(field):
+    if not has_iso_format(field, api_settings.DATE_FORMAT):
+        return field.to_representation
+
+    def convert(value):
+        if not value:
+            return None
+        if isinstance(value, str):
+            return value
+        return value.isoformat()
+
+    return convert
+
+
+def get_datetime_converter(field):
+    """Конвертер (value, tz) - зона передается снаружи, а не ищется на каждое поле."""
+    is_fast = settings.USE_TZ and not hasattr(field, 'timezone') and (
+        has_iso_format(field, api_settings.DATETIME_FORMAT)
+    )
+
+    def convert(value, tz):
+        if not is_fast or isinstance(value, str) or value.utcoffset() is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
+
+def get_money_converter(field):
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+    exp = decimal.Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return float(value.quantize(exp, rounding=rounding, context=context))
+
+    return convert
+
+
+CONVERTER_FACTORIES = {
+    serializers.ChoiceField: get_choice_converter,
+    serializers.DateField: get_date_converter,
+    serializers.DateTimeField: get_datetime_converter,
+    MoneyField: get_money_converter,
+}
+
+
+def get_converter(field):
+    converter = FAST_CONVERTERS.get(type(field))
+    if converter is not None:
+        return converter
+    factory = CONVERTER_FACTORIES.get(type(field))
+    if factory is not None:
+        return factory(field)
+    return field.to_representation
+
+
+def compile_serializer(serializer):
+    """
+    Собирает функцию (instance, tz) -> dict по readable полям сериализатора,
+    tz - текущая временная зона, вычисляется один раз на весь список.
+    Результат совпадает с Serializer.to_representation, но вместо
+    get_attribute/SkipField/OrderedDict на каждое поле каждой строки
+    выполняются заранее выбранные функции чтения атрибута (attrgetter)
+    и преобразования значения поля.
+    Функции замыкают поля этого экземпляра сериализатора, поэтому
+    учитываются его context и поля, измененные после создания.
+    """
+    fields = tuple(
+        (field.field_name, *compile_field(serializer, field))
+        for field in serializer._readable_fields
+    )
+
+    def represent(instance, tz):
+        ret = {}
+        for name, get, convert, uses_tz in fields:
+            value = get(instance)
+            if value is SKIP:
+                continue
+            if value is not None and convert is not None:
+                value = convert(value, tz) if uses_tz else convert(value)
+            ret[name] = value
+        return ret
+
+    return represent
+
+
+def compile_field(serializer, field):
+    """
+    Возвращает (get, convert, uses_tz): get(instance) - значение атрибута
+    или SKIP (поля нет в ответе).
+    convert(value[, tz]) - значение поля в ответе для значения не None,
+    None - значение атрибута попадает в ответ как есть.
+    """
+    source_attrs = field.source_attrs
+    if len(source_attrs) != 1 or not source_attrs[0].isidentifier():
+        return compile_generic_field(field), None, False
+    get = attrgetter(source_attrs[0])
+
+    if isinstance(field, serializers.ListSerializer):
+        return get, get_list_converter(field), True
+
+    if isinstance(field, serializers.Serializer):
+        return get, get_representation(field), True
+
+    if isinstance(field, ManyRelatedField) and is_pk_field(field.child_relation):
+        return get_pk_list_getter(get), None, False
+
+    if is_pk_field(field):
+        attname = get_attname(serializer, source_attrs[0])
+        if attname is not None:
+            return attrgetter(attname), None, False
+
+    if isinstance(field, serializers.RelatedField):
+        return compile_generic_field(field), None, False
+
+    return get, get_converter(field), type(field) is serializers.DateTimeField
+
+
+def get_list_converter(field):
+    represent = get_representation(field.child)
+
+    def convert(value, tz):
+        if isinstance(value, models.Manager):
+            value = value.all()
+        return [represent(item, tz) for item in value]
+
+    return convert
+
+
+def get_pk_list_getter(get):
+    def get_pks(instance):
+        if instance.pk is None:
+            return []
+        return [item.pk for item in get(instance).all()]
+
+    return get_pks
+
+
+def is_pk_field(field):
+    return type(field) is PrimaryKeyRelatedField and field.pk_field is None
+
+
+def compile_generic_field(field):
+    """Обычный путь DRF для полей, которые не удалось упростить."""
+
+    def represent(instance):
+        try:
+            attribute = field.get_attribute(instance)
+        except serializers.SkipField:
+            return SKIP
+        if isinstance(attribute, PKOnlyObject):
+            check_for_none = attribute.pk
+        else:
+            check_for_none = attribute
+        if check_for_none is None:
+            return None
+        return field.to_representation(attribute)
+
+    return represent
+
+
+def get_attname(serializer, field_name):
+    """Колонка fk (user_id) для PrimaryKeyRelatedField, без загрузки объекта."""
+    try:
+        model_field = serializer.get_model()._meta.get_field(field_name)
+    except (NotImplementedError, AttributeError, FieldDoesNotExist):
+        return None
+    if not isinstance(model_field, models.ForeignKey):
+        return None
+    if model_field.target_field != model_field.related_model._meta.pk:
+        return None
+    return model_field.attname
+
+
+def get_representation(serializer):
+    """
+    Скомпилированное представление экземпляра сериализатора (с кэшем на нем).
+    Для many=True это один child на весь список.
+    """
+    represent = serializer.__dict__.get('_compiled_representation')
+    if represent is None:
+        represent = compile_serializer(serializer)
+        serializer._compiled_representation = represent
+    return represent
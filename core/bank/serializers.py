@@ -1,5 +1,6 @@
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
-from django.db import transaction
 
 from rest_framework import serializers
 from rest_framework.validators import ValidationError, UniqueValidator
@@ -14,12 +15,15 @@ from .models import (
     CardDesign,
     Card,
     Deposit,
+    AccountDailyBalance,
     ALLOWED_CURRENCY,
 )
 from .validators import number_validation
 from .custom_serializer import CustomSerializer
-from .fields import CustomRelatedField
+from .fields import CustomRelatedField, MoneyField
 from .mixins import BankAccountSerializerMixin
+from . import transfers
+from .balances import BALANCE_CHART_MAX_DAYS
 
 
 USER_MODEL = get_user_model()
@@ -63,7 +67,7 @@ class TransactionSerializer(CustomSerializer):
     id = serializers.IntegerField(read_only=True)
     from_number = BankAccountDepthSerializer()
     to_number = BankAccountDepthSerializer()
-    money = serializers.FloatField(min_value=0.1)
+    money = MoneyField(min_value=Decimal('0.1'))
     currency = serializers.ChoiceField(required=False, choices=ALLOWED_CURRENCY)
     date = serializers.DateTimeField(read_only=True)
     transaction_type = TransactionTypeSerializer()
@@ -75,10 +79,16 @@ class TransactionSerializer(CustomSerializer):
 
 class TransactionCreateUpdateSerializer(TransactionSerializer):
     from_number = CustomRelatedField(
-        model=BankAccount, model_serializer=BankAccountDepthSerializer
+        model=BankAccount,
+        model_serializer=BankAccountDepthSerializer,
+        # user__tarif - лимит переводов проверяется в transfers.transfer,
+        # одинаковый select_related у обоих полей - счета грузятся одним запросом
+        select_related=('card', 'deposit', 'balance', 'user__tarif')
     )
     to_number = CustomRelatedField(
-        model=BankAccount, model_serializer=BankAccountDepthSerializer
+        model=BankAccount,
+        model_serializer=BankAccountDepthSerializer,
+        select_related=('card', 'deposit', 'balance', 'user__tarif')
     )
     transaction_type = CustomRelatedField(
         model=TransactionType,
@@ -150,37 +160,92 @@ class TransactionCreateUpdateSerializer(TransactionSerializer):
             from_number, transaction_type, money
         )
 
-        with transaction.atomic():
-            from_obj = from_number.get_related_card_or_deposit()
-            to_obj = to_number.get_related_card_or_deposit()
-            from_obj.money -= money
-            to_obj.money += money
+        return transfers.transfer(
+            from_number,
+            to_number,
+            money,
+            transaction_type,
+            currency=validated_data.get('currency', 'RUB'),
+            cashback_money=cashback_money
+        )
 
-            if cashback_money != 0:
-                from_obj.cashback_money += cashback_money
-                validated_data['cashback_money'] = cashback_money
+    def calculate_cashback_money(self, from_number, transaction_type, money):
+        from_obj = from_number.get_related_card_or_deposit()
+        return transfers.calculate_cashback_money(from_obj, transaction_type, money)
 
-            from_obj.save()
-            to_obj.save()
 
-        return Transaction.objects.create(**validated_data)
+class TransactionHistoryFilterSerializer(serializers.Serializer):
+    """Параметры фильтрации истории операций пользователя (query params)."""
 
-    def calculate_cashback_money(self, from_number, transaction_type, money):
-        from_obj = from_number.get_related_card_or_deposit()
+    DIRECTION_CHOICES = ('all', 'outgoing', 'incoming')
 
-        if not isinstance(from_obj, Card):
-            return 0
+    direction = serializers.ChoiceField(
+        choices=DIRECTION_CHOICES, required=False, default='all'
+    )
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    transaction_type = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from')
+        date_to = attrs.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError(
+                {'date_to': ['Поле date_to должно быть не раньше date_from.']}
+            )
+        return attrs
+
+
+class AccountDailyBalanceSerializer(CustomSerializer):
+    bank_account = serializers.PrimaryKeyRelatedField(read_only=True)
+    date = serializers.DateField(read_only=True)
+    balance = MoneyField(read_only=True)
+
+    def get_model(self):
+        return AccountDailyBalance
 
-        card_type = from_obj.card_type
-        cashbacks = card_type.cashbacks.all()
-        percent = 0
 
-        for cashback in cashbacks:
-            transaction_types = cashback.transaction_type.all()
-            if transaction_type in transaction_types:
-                percent = cashback.percent if cashback.percent > percent else percent
+class BalanceFilterSerializer(serializers.Serializer):
+    """Дата остатка счета (query params), по умолчанию сегодня."""
 
-        return int(money * (percent / 100))
+    date = serializers.DateField(required=False)
+
+
+class BalanceChartFilterSerializer(serializers.Serializer):
+    """Период графика остатков счета (query params)."""
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+
+    def validate(self, attrs):
+        days = (attrs['date_to'] - attrs['date_from']).days
+        if days < 0:
+            raise ValidationError(
+                {'date_to': ['Поле date_to должно быть не раньше date_from.']}
+            )
+        if days >= BALANCE_CHART_MAX_DAYS:
+            raise ValidationError({'date_to': [
+                f'Период не должен превышать {BALANCE_CHART_MAX_DAYS} дн.'
+            ]})
+        return attrs
+
+
+class CurrencySummarySerializer(serializers.Serializer):
+    currency = serializers.CharField(read_only=True)
+    cards_money = MoneyField(read_only=True)
+    deposits_money = MoneyField(read_only=True)
+    total_money = MoneyField(read_only=True)
+
+
+class UserSummarySerializer(serializers.Serializer):
+    """Сводка по счетам пользователя (bank.summary.get_user_summary)."""
+
+    user = serializers.IntegerField(read_only=True)
+    currencies = CurrencySummarySerializer(many=True, read_only=True)
+    cards_count = serializers.IntegerField(read_only=True)
+    blocked_cards_count = serializers.IntegerField(read_only=True)
+    deposits_count = serializers.IntegerField(read_only=True)
+    cashback_money = serializers.IntegerField(read_only=True)
 
 
 class CashbackSerializer(CustomSerializer):
@@ -269,7 +334,7 @@ class CardSerializer(CustomSerializer):
     id = serializers.IntegerField(read_only=True)
     bank_account = BankAccountDepthSerializer(read_only=True)
     currency = serializers.ChoiceField(choices=ALLOWED_CURRENCY)
-    money = serializers.FloatField()
+    money = MoneyField()
     card_type = CardTypeDepthSerializer()
     is_push = serializers.BooleanField(required=False)
     date_issue = serializers.DateField(read_only=True)
@@ -293,7 +358,7 @@ class DepositSeializer(CustomSerializer):
     id = serializers.IntegerField(read_only=True)
     bank_account = BankAccountDepthSerializer(read_only=True)
     currency = serializers.ChoiceField(choices=ALLOWED_CURRENCY)
-    money = serializers.FloatField()
+    money = MoneyField()
     interest_rate = serializers.FloatField(required=False, min_value=0.0)
     min_value = serializers.IntegerField(required=False, min_value=0)
     max_value = serializers.IntegerField(required=False, min_value=0)
@@ -0,0 +1,109 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from user.models import AccountTarif
+from .models import (
+    TransactionType,
+    Cashback,
+    CardType,
+    CardDesign,
+    Card,
+    Deposit,
+    BankAccount,
+    AccountBalance,
+)
+from .balances import balances_changed, save_daily_balances
+from .cashback import cashback_rates
+from .cache import invalidate_model
+from .summary import invalidate_user_summaries
+
+
+def invalidate_cashback_rates():
+    # Сброс сразу - для текущей транзакции, и после commit - для воркеров,
+    # успевших перестроить таблицу по еще не закоммиченным данным.
+    cashback_rates.invalidate()
+    transaction.on_commit(cashback_rates.invalidate)
+
+
+@receiver(post_save, sender=Cashback)
+@receiver(post_save, sender=CardType)
+@receiver(post_delete, sender=Cashback)
+@receiver(post_delete, sender=CardType)
+@receiver(post_delete, sender=TransactionType)
+def cashback_rates_changed(sender, **kwargs):
+    invalidate_cashback_rates()
+
+
+@receiver(m2m_changed, sender=CardType.cashbacks.through)
+@receiver(m2m_changed, sender=Cashback.transaction_type.through)
+def cashback_rates_relations_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_cashback_rates()
+
+
+# Справочники, ответы по которым кэшируются (bank.cache.cache_response)
+@receiver(post_save, sender=TransactionType)
+@receiver(post_save, sender=Cashback)
+@receiver(post_save, sender=CardType)
+@receiver(post_save, sender=CardDesign)
+@receiver(post_save, sender=AccountTarif)
+@receiver(post_delete, sender=TransactionType)
+@receiver(post_delete, sender=Cashback)
+@receiver(post_delete, sender=CardType)
+@receiver(post_delete, sender=CardDesign)
+@receiver(post_delete, sender=AccountTarif)
+def reference_data_changed(sender, **kwargs):
+    invalidate_model(sender)
+
+
+@receiver(m2m_changed, sender=CardType.cashbacks.through)
+@receiver(m2m_changed, sender=Cashback.transaction_type.through)
+def reference_data_relations_changed(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        # instance может быть с любой стороны связи (reverse=True)
+        invalidate_model(type(instance))
+        invalidate_model(model)
+
+
+@receiver(post_save, sender=AccountBalance)
+def balance_saved(sender, instance, **kwargs):
+    # Переводы меняют баланс через update() и пишут остатки сами,
+    # здесь - создание счета и изменение money Card/Deposit через save()
+    save_daily_balances({instance.bank_account_id: instance.balance})
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_save, sender=Deposit)
+def bank_account_kind_saved(sender, instance, created, **kwargs):
+    # BankAccountSerializerMixin создает счет сразу с kind,
+    # здесь - счета, созданные без него
+    kind = sender._meta.model_name
+    if created and instance.bank_account.kind != kind:
+        instance.bank_account.kind = kind
+        instance.bank_account.save(update_fields=['kind'])
+
+
+# Сводка пользователя (bank.summary): счета, карты, вклады и балансы
+@receiver(balances_changed)
+def user_balances_changed(sender, user_pks, **kwargs):
+    invalidate_user_summaries(user_pks)
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+def user_bank_account_changed(sender, instance, **kwargs):
+    invalidate_user_summaries([instance.user_id])
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_save, sender=Deposit)
+@receiver(post_delete, sender=Card)
+@receiver(post_delete, sender=Deposit)
+def user_card_or_deposit_changed(sender, instance, **kwargs):
+    try:
+        invalidate_user_summaries([instance.bank_account.user_id])
+    except ObjectDoesNotExist:
+        # Счет удален раньше - сводку сбросил user_bank_account_changed
+        pass
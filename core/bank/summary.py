@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Card, Deposit
+
+
+USER_MODEL = get_user_model()
+USER_SUMMARY_KEY = 'bank:user_summary:{user_pk}'
+
+
+def get_user_summary_cache_key(user_pk):
+    return USER_SUMMARY_KEY.format(user_pk=user_pk)
+
+
+def invalidate_user_summaries(user_pks):
+    cache_keys = [get_user_summary_cache_key(user_pk) for user_pk in user_pks]
+    if cache_keys:
+        # Повторный сброс после commit - для запросов, успевших закэшировать
+        # сводку по еще не закоммиченным данным.
+        cache.delete_many(cache_keys)
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def get_user_summary(user_pk):
+    """
+    Сводка по счетам пользователя, None - если пользователя нет.
+    Один GROUP BY currency по картам и один по вкладам, балансы берутся
+    join'ом AccountBalance.
+    """
+    cards = Card.objects.filter(bank_account__user_id=user_pk).values(
+        'currency'
+    ).annotate(
+        count=Count('pk'),
+        blocked=Count('pk', filter=Q(is_blocked=True)),
+        money=Sum('bank_account__balance__balance'),
+        cashback_money=Sum('cashback_money'),
+    ).order_by()
+    deposits = Deposit.objects.filter(bank_account__user_id=user_pk).values(
+        'currency'
+    ).annotate(
+        count=Count('pk'),
+        money=Sum('bank_account__balance__balance'),
+    ).order_by()
+
+    currencies = {}
+    summary = {
+        'user': user_pk,
+        'currencies': [],
+        'cards_count': 0,
+        'blocked_cards_count': 0,
+        'deposits_count': 0,
+        'cashback_money': 0,
+    }
+    for kind, rows in (('cards', cards), ('deposits', deposits)):
+        for row in rows:
+            currency = currencies.setdefault(row['currency'], {
+                'currency': row['currency'],
+                'cards_money': Decimal('0.00'),
+                'deposits_money': Decimal('0.00'),
+                'total_money': Decimal('0.00'),
+            })
+            money = row['money'] or Decimal('0.00')
+            currency[f'{kind}_money'] += money
+            currency['total_money'] += money
+            summary[f'{kind}_count'] += row['count']
+            if kind == 'cards':
+                summary['blocked_cards_count'] += row['blocked']
+                summary['cashback_money'] += row['cashback_money']
+
+    if not currencies and not USER_MODEL.objects.filter(pk=user_pk).exists():
+        return None
+    summary['currencies'] = sorted(currencies.values(), key=lambda row: row['currency'])
+    return summary
@@ -0,0 +1,67 @@
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.views import RootAsyncAPI
+from bank.async_views import (
+    UserTransactionListAsyncAPI,
+    UserCardListAsyncAPI,
+    UserDepositListAsyncAPI,
+)
+from .model_mixins import TransactionSetUpMixin
+
+
+class AsyncViewsTest(TransactionSetUpMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.get(user=self.user_1).key
+        self.factory = AsyncRequestFactory()
+
+    async def get_async(self, view_class, url, token=True, **kwargs):
+        headers = {'Authorization': f'Token {self.token}'} if token else {}
+        request = self.factory.get(url, **headers)
+        return await view_class.as_view()(request, **kwargs)
+
+    async def assert_same_as_sync(self, view_class, url_name, **kwargs):
+        url = reverse(url_name, kwargs=kwargs)
+        sync_response = await sync_to_async(self.client.get)(url)
+        response = await self.get_async(view_class, url, **kwargs)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(response.content), json.loads(sync_response.content)
+        )
+
+    async def test_async_views(self):
+        await self.assert_same_as_sync(
+            UserTransactionListAsyncAPI, 'user_transaction', user_pk=self.user_2.pk
+        )
+        await self.assert_same_as_sync(UserTransactionListAsyncAPI, 'my_transaction')
+        await self.assert_same_as_sync(UserCardListAsyncAPI, 'my_card')
+        await self.assert_same_as_sync(
+            UserDepositListAsyncAPI, 'user_deposit', user_pk=self.user_2.pk
+        )
+        await self.assert_same_as_sync(RootAsyncAPI, 'root')
+
+    async def test_async_views_errors(self):
+        url = reverse('my_card')
+        response = await self.get_async(UserCardListAsyncAPI, url, token=False)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.get_async(
+            UserCardListAsyncAPI, reverse('user_card', kwargs={'user_pk': 999}),
+            user_pk=999
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.get_async(
+            UserTransactionListAsyncAPI, reverse('my_transaction') + '?direction=abc'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from bank.models import AccountDailyBalance, Posting, Transaction
+from bank.transfers import transfer
+from bank.balances import (
+    backfill_daily_balances,
+    get_balance_at,
+    get_balance_chart,
+)
+from .model_mixins import TransactionSetUpMixin
+
+
+class DailyBalanceTest(TransactionSetUpMixin, TestCase):
+    def get_daily_balances(self, bank_account):
+        return list(
+            AccountDailyBalance.objects.filter(bank_account=bank_account).order_by(
+                'date'
+            ).values_list('date', 'balance')
+        )
+
+    def set_days_ago(self, obj, days):
+        Transaction.objects.filter(pk=obj.pk).update(
+            date=timezone.now() - timedelta(days=days)
+        )
+
+    def test_transfer_records_daily_balances(self):
+        today = timezone.localdate()
+        for money in (1000, 500):
+            transfer(
+                self.bank_account_1, self.bank_account_2, money, self.transaction_type_1
+            )
+
+        self.assertEqual(
+            self.get_daily_balances(self.bank_account_1), [(today, Decimal('8500'))]
+        )
+        self.assertEqual(
+            self.get_daily_balances(self.bank_account_2), [(today, Decimal('21500'))]
+        )
+
+    def test_backfill_daily_balances_adjustment(self):
+        today = timezone.localdate()
+        Posting.objects.update(created_at=timezone.now() - timedelta(days=3))
+        obj = transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+        )
+        self.set_days_ago(obj, 2)
+        Transaction.objects.exclude(pk=obj.pk).delete()
+        # Прямое изменение баланса: проводка корректировки без Transaction
+        self.card_1.money = 5000
+        self.card_1.save()
+        AccountDailyBalance.objects.all().delete()
+
+        backfill_daily_balances()
+
+        self.assertEqual(self.get_daily_balances(self.bank_account_1), [
+            (today - timedelta(days=3), Decimal('10000')),
+            (today - timedelta(days=2), Decimal('9000')),
+            (today, Decimal('5000')),
+        ])
+
+    def test_backfill_daily_balances(self):
+        today = timezone.localdate()
+        transaction_3 = Transaction.objects.create(
+            from_number=self.bank_account_2,
+            to_number=self.bank_account_1,
+            money=500,
+            currency='RUB',
+            transaction_type=self.transaction_type_1
+        )
+        self.set_days_ago(self.transaction_1, 3)
+        self.set_days_ago(self.transaction_2, 2)
+        self.set_days_ago(transaction_3, 1)
+        # Начальные балансы карт (корректировки) записаны раньше операций
+        Posting.objects.update(created_at=timezone.now() - timedelta(days=4))
+        AccountDailyBalance.objects.all().delete()
+
+        backfill_daily_balances(batch_size=1)
+
+        # Балансы карт в фикстурах не учитывают транзакции: остаток card_1
+        # до начального баланса 10000 - (500 - 1000) - 10000
+        self.assertEqual(self.get_daily_balances(self.bank_account_1), [
+            (today - timedelta(days=4), Decimal('10500')),
+            (today - timedelta(days=3), Decimal('9500')),
+            (today - timedelta(days=1), Decimal('10000')),
+            (today, Decimal('10000')),
+        ])
+        self.assertEqual(self.get_daily_balances(self.bank_account_3), [
+            (today - timedelta(days=4), Decimal('12000')),
+            (today - timedelta(days=2), Decimal('10000')),
+            (today, Decimal('10000')),
+        ])
+
+        self.assertIsNone(get_balance_at(self.bank_account_1, today - timedelta(5)))
+        self.assertEqual(
+            get_balance_at(self.bank_account_1, today - timedelta(days=2)), 9500
+        )
+        self.assertEqual(
+            [
+                (row.date, row.balance)
+                for row in get_balance_chart(
+                    self.bank_account_1, today - timedelta(days=4), today
+                )
+            ],
+            [
+                (today - timedelta(days=4), Decimal('10500')),
+                (today - timedelta(days=3), Decimal('9500')),
+                (today - timedelta(days=2), Decimal('9500')),
+                (today - timedelta(days=1), Decimal('10000')),
+                (today, Decimal('10000')),
+            ]
+        )
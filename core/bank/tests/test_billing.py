@@ -0,0 +1,116 @@
+import multiprocessing
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from bank.models import AccountBalance, Card, JobCheckpoint, Transaction
+from bank.billing import (
+    bill_cards,
+    get_partition_checkpoints,
+    BILLING_JOB,
+    SERVICE_FEE_TRANSACTION_TYPE,
+    PUSH_FEE_TRANSACTION_TYPE,
+)
+from bank.processes import run_in_pool
+from .model_mixins import CardSetUpMixin
+
+
+def get_model_label(pk):
+    return f'{Card._meta.label}:{pk}'
+
+
+class BillCardsTest(CardSetUpMixin, TestCase):
+    def get_fees(self):
+        return sorted(
+            Transaction.objects.filter(
+                transaction_type__title__in=(
+                    SERVICE_FEE_TRANSACTION_TYPE, PUSH_FEE_TRANSACTION_TYPE
+                )
+            ).values_list('from_number_id', 'transaction_type__title', 'money')
+        )
+
+    def test_bill_cards(self):
+        self.account_tarif_2.free_card_maintenance = False
+        self.account_tarif_2.save()
+
+        checkpoints = bill_cards(processes=1, chunk_size=1)
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(self.card_1.money, 10000 - 10)
+        self.assertEqual(self.card_2.money, 20000 - 200 - 20)
+        self.assertEqual(self.get_fees(), sorted([
+            (self.bank_account_1.pk, PUSH_FEE_TRANSACTION_TYPE, 10),
+            (self.bank_account_2.pk, PUSH_FEE_TRANSACTION_TYPE, 20),
+            (self.bank_account_2.pk, SERVICE_FEE_TRANSACTION_TYPE, 200),
+        ]))
+        self.assertEqual(len(checkpoints), 1)
+        self.assertTrue(checkpoints[0].is_completed)
+        self.assertEqual(checkpoints[0].processed, 2)
+
+    def test_bill_cards_is_idempotent_per_month(self):
+        # Диапазоны создаются при первом запуске и не зависят от processes
+        checkpoints = get_partition_checkpoints(date.today().strftime('%Y-%m'), 2)
+        self.assertEqual(
+            [(c.last_id, c.end_id) for c in checkpoints],
+            [(self.card_1.pk - 1, self.card_1.pk), (self.card_2.pk - 1, self.card_2.pk)]
+        )
+        bill_cards(processes=1)
+        bill_cards(processes=1)
+
+        self.card_1.refresh_from_db()
+        self.assertEqual(self.card_1.money, 10000 - 10)
+        self.assertEqual(len(self.get_fees()), 2)
+        self.assertEqual(
+            JobCheckpoint.objects.filter(job=BILLING_JOB, is_completed=True).count(),
+            2
+        )
+
+    def test_bill_cards_resumes_from_checkpoint(self):
+        JobCheckpoint.objects.create(
+            job=BILLING_JOB,
+            period=date.today().strftime('%Y-%m'),
+            last_id=self.card_1.pk,
+            end_id=self.card_2.pk
+        )
+        bill_cards(processes=1)
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(self.card_1.money, 10000)
+        self.assertEqual(self.card_2.money, 20000 - 20)
+
+    def test_bill_cards_skips_expired_and_poor_cards(self):
+        Card.objects.filter(pk=self.card_1.pk).update(
+            completion_date=date.today() - timedelta(days=1)
+        )
+        AccountBalance.objects.filter(pk=self.card_2.bank_account_id).update(balance=5)
+        bill_cards(processes=1)
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(self.card_1.money, 10000)
+        self.assertEqual(self.card_2.money, 5)
+        self.assertEqual(self.get_fees(), [])
+
+    def test_bill_cards_command(self):
+        out = StringIO()
+        call_command('bill_cards', processes=1, stdout=out)
+        self.assertIn('плата списана с 2 карт', out.getvalue())
+
+
+class RunInPoolTest(TestCase):
+    def test_run_in_pool_spawn(self):
+        # Процессы spawn (macOS, Windows) настраивают django в initializer
+        self.assertEqual(
+            run_in_pool(
+                get_model_label, [(1,), (2,)], processes=2,
+                context=multiprocessing.get_context('spawn')
+            ),
+            ['bank.Card:1', 'bank.Card:2']
+        )
+        self.assertEqual(run_in_pool(get_model_label, [(3,)], processes=2), [
+            'bank.Card:3'
+        ])
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from bank.models import (
+    AccountDailyBalance,
+    IdempotencyKey,
+    Transaction,
+    TransferUsage,
+)
+from bank.management.commands.check_query_plans import SEQ_SCAN_PATTERNS
+from bank.transfers import get_usage_month
+from .model_mixins import TransactionSetUpMixin
+
+
+class CheckQueryPlansCommandTest(TransactionSetUpMixin, TestCase):
+    def test_check_query_plans(self):
+        out = StringIO()
+        call_command('check_query_plans', min_rows=0, stdout=out)
+        self.assertIn('Все запросы используют индексы.', out.getvalue())
+
+    def test_seq_scan_patterns(self):
+        sqlite_plan = '\n'.join([
+            '3 0 0 SCAN bank_transaction USING INDEX bank_transaction_date_idx',
+            '5 0 0 SCAN bank_bankaccount USING COVERING INDEX bank_bankaccount_user',
+            '7 0 0 SEARCH bank_transactiontype USING INTEGER PRIMARY KEY (rowid=?)',
+            '9 0 0 SCAN bank_posting',
+        ])
+        self.assertEqual(
+            SEQ_SCAN_PATTERNS['sqlite'].findall(sqlite_plan), ['bank_posting']
+        )
+        postgresql_plan = '\n'.join([
+            'Limit  (cost=0.29..8.31 rows=1 width=64)',
+            '  ->  Index Scan using bank_transaction_date_idx on bank_transaction',
+            '  ->  Seq Scan on bank_posting  (cost=0.00..35.50 rows=2550 width=12)',
+        ])
+        self.assertEqual(
+            SEQ_SCAN_PATTERNS['postgresql'].findall(postgresql_plan), ['bank_posting']
+        )
+
+
+class RebuildTransferUsageCommandTest(TransactionSetUpMixin, TestCase):
+    def test_rebuild_transfer_usage(self):
+        TransferUsage.objects.create(user=self.user_1, month=get_usage_month())
+        out = StringIO()
+        call_command('rebuild_transfer_usage', stdout=out)
+
+        expected = {}
+        for obj in Transaction.objects.select_related('from_number', 'to_number'):
+            if obj.from_number.user_id != obj.to_number.user_id:
+                user_id = obj.from_number.user_id
+                expected[user_id] = expected.get(user_id, 0) + obj.money
+        self.assertTrue(expected)
+        self.assertEqual(
+            dict(TransferUsage.objects.values_list('user', 'money')), expected
+        )
+        self.assertIn(f'Пересчитано счетчиков: {len(expected)}.', out.getvalue())
+
+
+class BackfillDailyBalancesCommandTest(TransactionSetUpMixin, TestCase):
+    def test_backfill_daily_balances(self):
+        AccountDailyBalance.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_daily_balances', stdout=out)
+
+        self.assertEqual(
+            AccountDailyBalance.objects.get(bank_account=self.bank_account_1).balance,
+            self.card_1.money
+        )
+        self.assertIn('Записано остатков:', out.getvalue())
+
+
+class CleanupIdempotencyKeysCommandTest(TransactionSetUpMixin, TestCase):
+    def test_cleanup_idempotency_keys(self):
+        now = timezone.now()
+        for i, created_at in enumerate((now - timedelta(days=2), now)):
+            IdempotencyKey.objects.create(
+                user=self.user_1,
+                key=f'key-{i}',
+                request_hash='',
+                created_at=created_at
+            )
+        out = StringIO()
+        call_command('cleanup_idempotency_keys', batch_size=1, stdout=out)
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list('key', flat=True)), ['key-1']
+        )
+        self.assertIn('Удалено ключей: 1.', out.getvalue())
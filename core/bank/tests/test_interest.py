@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from bank.models import AccountBalance, Deposit, JobCheckpoint, Transaction
+from bank.interest import accrue_interest, INTEREST_TRANSACTION_TYPE
+from .model_mixins import DepositSetUpMixin
+
+
+class AccrueInterestTest(DepositSetUpMixin, TestCase):
+    def test_accrue_interest_monthly(self):
+        checkpoint = accrue_interest(period='monthly', chunk_size=1)
+
+        self.deposit_1.refresh_from_db()
+        self.deposit_2.refresh_from_db()
+        # (1% вклада + 1% тарифа) / 12 и (2% + 2%) / 12
+        self.assertEqual(self.deposit_1.money, Decimal('10016.67'))
+        self.assertEqual(self.deposit_2.money, Decimal('20066.67'))
+        self.assertTrue(checkpoint.is_completed)
+        self.assertEqual(checkpoint.processed, 2)
+
+        transactions = Transaction.objects.filter(
+            transaction_type__title=INTEREST_TRANSACTION_TYPE
+        ).order_by('money')
+        self.assertEqual(
+            [(t.from_number_id, t.to_number_id, t.money, t.currency)
+             for t in transactions],
+            [(None, self.bank_account_3.pk, Decimal('16.67'), 'EUR'),
+             (None, self.bank_account_4.pk, Decimal('66.67'), 'EUR')]
+        )
+
+    def test_accrue_interest_is_idempotent_per_period(self):
+        accrue_interest(period='daily')
+        accrue_interest(period='daily')
+
+        self.deposit_1.refresh_from_db()
+        self.assertEqual(self.deposit_1.money, Decimal('10000.55'))
+        self.assertEqual(
+            Transaction.objects.filter(
+                transaction_type__title=INTEREST_TRANSACTION_TYPE
+            ).count(),
+            2
+        )
+
+        accrue_interest(date.today() + timedelta(days=1), period='daily')
+        self.deposit_1.refresh_from_db()
+        self.assertEqual(self.deposit_1.money, Decimal('10001.10'))
+
+    def test_accrue_interest_resumes_from_checkpoint(self):
+        JobCheckpoint.objects.create(
+            job='accrue_interest_monthly',
+            period=date.today().strftime('%Y-%m'),
+            last_id=self.deposit_1.pk
+        )
+        accrue_interest(period='monthly')
+
+        self.deposit_1.refresh_from_db()
+        self.deposit_2.refresh_from_db()
+        self.assertEqual(self.deposit_1.money, 10000)
+        self.assertEqual(self.deposit_2.money, Decimal('20066.67'))
+
+    def test_accrue_interest_limits(self):
+        today = date.today()
+        AccountBalance.objects.filter(pk=self.deposit_1.bank_account_id).update(
+            balance=99990
+        )
+        Deposit.objects.filter(pk=self.deposit_2.pk).update(
+            completion_date=today - timedelta(days=1)
+        )
+        accrue_interest(period='monthly')
+
+        self.deposit_1.refresh_from_db()
+        self.deposit_2.refresh_from_db()
+        self.assertEqual(self.deposit_1.money, self.deposit_1.max_value)
+        self.assertEqual(self.deposit_2.money, 20000)
+
+        Deposit.objects.filter(pk=self.deposit_2.pk).update(completion_date=today)
+        AccountBalance.objects.filter(pk=self.deposit_2.bank_account_id).update(
+            balance=100
+        )
+        accrue_interest(today, period='daily')
+        self.deposit_2.refresh_from_db()
+        self.assertEqual(self.deposit_2.money, 100)  # меньше min_value
+
+    def test_accrue_interest_command(self):
+        out = StringIO()
+        call_command('accrue_interest', period='monthly', stdout=out)
+        self.assertIn('проценты начислены по 2 вкладам', out.getvalue())
@@ -0,0 +1,104 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import ProtectedError, Sum
+from django.test import TestCase
+
+from rest_framework.validators import ValidationError
+
+from bank.models import BalanceSnapshot, BankAccount, Card, Posting
+from bank.transfers import transfer, bulk_transfer
+from bank.balances import get_current_balances
+from bank.journal import (
+    compact_postings,
+    delete_with_journal_check,
+    get_journal_balances,
+)
+from .model_mixins import TransactionSetUpMixin
+
+
+class JournalTest(TransactionSetUpMixin, TestCase):
+    def test_transfer_postings(self):
+        obj = transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+        )
+        self.assertEqual(
+            list(obj.postings.order_by('pk').values_list('bank_account_id', 'amount')),
+            [(self.bank_account_1.pk, -1000), (self.bank_account_2.pk, 1000)]
+        )
+
+        bulk_transfer([{
+            'from_number': self.bank_account_2.pk,
+            'to_number': self.bank_account_1.pk,
+            'money': '250.50',
+            'transaction_type': self.transaction_type_1.pk,
+        }])
+        # Сумма проводок каждой операции (и всего журнала) равна 0
+        self.assertEqual(Posting.objects.aggregate(total=Sum('amount'))['total'], 0)
+        self.assertEqual(get_journal_balances(), get_current_balances())
+        self.assertEqual(
+            get_journal_balances([self.bank_account_1.pk]),
+            {self.bank_account_1.pk: Decimal('9250.50')}
+        )
+
+    def test_compact_postings(self):
+        for money in (1000, 500):
+            transfer(
+                self.bank_account_1, self.bank_account_2, money, self.transaction_type_1
+            )
+
+        checkpoint = compact_postings(chunk_size=2)
+        self.assertTrue(checkpoint.is_completed)
+        self.assertEqual(checkpoint.last_id, BankAccount.objects.latest('pk').pk)
+        self.assertEqual(
+            BalanceSnapshot.objects.get(pk=self.bank_account_1.pk).balance, 8500
+        )
+        self.assertEqual(get_journal_balances(), get_current_balances())
+
+        # Повторный запуск без новых проводок ничего не меняет
+        processed = checkpoint.processed
+        self.assertEqual(compact_postings().processed, processed)
+
+        transfer(self.bank_account_2, self.bank_account_1, 100, self.transaction_type_1)
+        self.assertEqual(get_journal_balances(), get_current_balances())
+
+    def test_compact_postings_late_commit(self):
+        obj = transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+        )
+        # Проводки перевода закоммичены позже: пока их не видно,
+        # сворачиваются проводки следующего перевода с большими id
+        postings = list(obj.postings.all())
+        obj.postings.all().delete()
+        transfer(self.bank_account_3, self.bank_account_4, 500, self.transaction_type_1)
+        compact_postings()
+
+        Posting.objects.bulk_create(postings)
+        self.assertEqual(get_journal_balances(), get_current_balances())
+
+        out = StringIO()
+        call_command('compact_postings', stdout=out)
+        self.assertIn(
+            f'по счет {BankAccount.objects.latest("pk").pk}', out.getvalue()
+        )
+        self.assertEqual(
+            BalanceSnapshot.objects.get(pk=self.bank_account_1.pk).balance, 9000
+        )
+        self.assertEqual(get_journal_balances(), get_current_balances())
+
+    def test_delete_bank_account_with_postings(self):
+        transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+        )
+        compact_postings()
+        card_pk = self.card_1.pk
+
+        with self.assertRaises(ProtectedError):
+            self.bank_account_1.delete()
+        with self.assertRaises(ValidationError):
+            delete_with_journal_check(self.card_1, self.bank_account_1)
+
+        self.assertTrue(Card.objects.filter(pk=card_pk).exists())
+        self.assertEqual(Posting.objects.aggregate(total=Sum('amount'))['total'], 0)
+        self.assertEqual(get_journal_balances(), get_current_balances())
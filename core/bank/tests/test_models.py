@@ -1,6 +1,8 @@
+from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase
 from user.models import AccountTarif, User
 from bank.models import (
+    AccountBalance,
     BankAccount,
     TransactionType,
     Transaction,
@@ -116,6 +118,75 @@ class DepositTest(DepositSetUpMixin, TestCase):
         self.assertEqual(deposit_2.min_value, 200)
 
 
+class BankAccountKindTest(DepositSetUpMixin, TestCase):
+    def test_bank_account_kind(self):
+        self.assertEqual(
+            BankAccount.objects.get(pk=self.bank_account_1.pk).kind, 'card'
+        )
+        self.assertEqual(
+            BankAccount.objects.get(pk=self.bank_account_3.pk).kind, 'deposit'
+        )
+
+    def test_get_related_card_or_deposit(self):
+        bank_account = BankAccount.objects.get(pk=self.bank_account_3.pk)
+        # Только связь по kind, повторный вызов - из кэша экземпляра
+        with self.assertNumQueries(1):
+            self.assertEqual(bank_account.get_related_card_or_deposit(), self.deposit_1)
+        with self.assertNumQueries(0):
+            self.assertEqual(bank_account.get_related_card_or_deposit(), self.deposit_1)
+
+        with self.assertNumQueries(1):
+            bank_accounts = BankAccount.objects.with_related().in_bulk(
+                [self.bank_account_1.pk, self.bank_account_3.pk]
+            )
+            self.assertEqual(
+                bank_accounts[self.bank_account_1.pk].get_related_card_or_deposit(),
+                self.card_1
+            )
+            self.assertEqual(
+                bank_accounts[self.bank_account_3.pk].get_related_card_or_deposit(),
+                self.deposit_1
+            )
+
+    def test_get_related_card_or_deposit_without_kind(self):
+        BankAccount.objects.update(kind='')
+        bank_account = BankAccount.objects.get(pk=self.bank_account_3.pk)
+        self.assertEqual(bank_account.get_related_card_or_deposit(), self.deposit_1)
+
+        bank_account = BankAccount.objects.create(
+            number='00000000000000000099', user=self.user_1
+        )
+        with self.assertRaises(ObjectDoesNotExist):
+            bank_account.get_related_card_or_deposit()
+
+
+class AccountBalanceTest(DepositSetUpMixin, TestCase):
+    def test_account_balance(self):
+        balance = AccountBalance.objects.get(pk=self.bank_account_1.pk)
+        self.assertEqual(balance.balance, self.card_1.money)
+        self.assertEqual(
+            AccountBalance.objects.get(pk=self.bank_account_3.pk).balance,
+            self.deposit_1.money
+        )
+
+        self.card_1.money = 500
+        self.card_1.save(update_fields=['money'])
+        self.card_1.refresh_from_db()
+        self.assertEqual(self.card_1.money, 500)
+        self.assertEqual(
+            AccountBalance.objects.get(pk=self.bank_account_1.pk).version,
+            balance.version + 1
+        )
+
+    def test_money_with_related(self):
+        money = self.card_1.money
+        card = Card.objects.select_related('bank_account__balance').get(
+            pk=self.card_1.pk
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(card.money, money)
+
+
 class TransactionTest(TransactionSetUpMixin, TestCase):
     def test_transaction(self):
         transaction_1 = Transaction.objects.get(pk=1)
@@ -0,0 +1,74 @@
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from bank.models import AccountBalance, Transaction
+from bank.journal import compact_postings
+from bank.reconcile import reconcile, Mismatch
+from bank.transfers import transfer
+from .model_mixins import TransactionSetUpMixin
+
+
+class ReconcileTest(TransactionSetUpMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for from_number, to_number, money in (
+            (self.bank_account_1, self.bank_account_2, 1000),
+            (self.bank_account_3, self.bank_account_1, 500),
+        ):
+            transfer(from_number, to_number, money, self.transaction_type_1)
+
+    def test_reconcile(self):
+        # Диапазоны по 2 счета, часть проводок свернута в снимки
+        compact_postings(chunk_size=3)
+        transfer(self.bank_account_2, self.bank_account_4, 100, self.transaction_type_1)
+
+        checked, mismatches = reconcile(processes=1, range_size=2)
+        self.assertEqual(checked, 4)
+        self.assertEqual(mismatches, [])
+
+    def test_reconcile_mismatches(self):
+        AccountBalance.objects.filter(pk=self.bank_account_1.pk).update(balance=1)
+        # Операция без проводок и изменения балансов
+        Transaction.objects.create(
+            from_number=self.bank_account_2,
+            to_number=self.bank_account_3,
+            money=10,
+            transaction_type=self.transaction_type_1
+        )
+
+        _, mismatches = reconcile(processes=1, range_size=2)
+        self.assertEqual(mismatches, [
+            Mismatch(
+                self.bank_account_1.pk, Decimal('1.00'), Decimal('9500.00'),
+                Decimal('-500'), Decimal('-500')
+            ),
+            Mismatch(
+                self.bank_account_2.pk, Decimal('21000.00'), Decimal('21000.00'),
+                Decimal('990'), Decimal('1000')
+            ),
+            Mismatch(
+                self.bank_account_3.pk, Decimal('9500.00'), Decimal('9500.00'),
+                Decimal('-490'), Decimal('-500')
+            ),
+        ])
+
+    def test_reconcile_command(self):
+        out = StringIO()
+        call_command('reconcile', processes=1, stdout=out)
+        self.assertIn('Проверено счетов: 4, расхождений: 0.', out.getvalue())
+
+        AccountBalance.objects.filter(pk=self.bank_account_2.pk).update(balance=1)
+        output = os.path.join(tempfile.mkdtemp(), 'reconcile.csv')
+        with self.assertRaises(CommandError):
+            call_command('reconcile', processes=1, output=output, stdout=StringIO())
+        with open(output, newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], list(Mismatch._fields))
+        self.assertEqual(rows[1][:2], [str(self.bank_account_2.pk), '1.00'])
@@ -1,8 +1,23 @@
+from unittest import mock
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
-from user.serializers import AccountTarifSerializer, UserCreateUpdateSerializer
+from user.serializers import (
+    AccountTarifSerializer,
+    UserSerializer,
+    UserCreateUpdateSerializer,
+)
 from user.models import AccountTarif, User
+from bank.custom_serializer import CustomSerializer, CustomListSerializer
 from bank.serializers import (
+    BankAccountSerializer,
+    TransactionSerializer,
+    CashbackSerializer,
+    CardTypeSerializer,
+    CardSerializer,
+    DepositSeializer,
     TransactionTypeSerializer,
     CashbackCreateUpdateSerializer,
     CardTypeCreateUpdateSerializer,
@@ -130,6 +145,20 @@ class CashbackSerializerTest(CashbackSetUpMixin, APITestCase):
             [self.transaction_type_1, self.transaction_type_2]
         )
 
+    def test_cashback_related_field_queries(self):
+        serializer = CashbackCreateUpdateSerializer(data=self.cashback_valid_data)
+        # Все transaction_type - одним запросом
+        with self.assertNumQueries(1):
+            self.assertEqual(serializer.is_valid(), True)
+
+    def test_cashback_related_field_missing(self):
+        serializer = CashbackCreateUpdateSerializer(data=self.cashback_invalid_data_2)
+        self.assertEqual(serializer.is_valid(), False)
+        self.assertListEqual(serializer.errors['transaction_type'], [
+            'Объекта с pk = 10 не существует.',
+            'Объекта с pk = 20 не существует.',
+        ])
+
     def test_cashback_invalid_1_serializer(self):
         serializer = CashbackCreateUpdateSerializer(data=self.cashback_invalid_data_1)
         self.assertEqual(serializer.is_valid(), False)
@@ -321,6 +350,19 @@ class TransactionSerializerTest(TransactionSetUpMixin, APITestCase):
         self.assertEqual(serializer.instance.to_number, self.bank_account_2)
         self.assertEqual(serializer.instance.transaction_type, self.transaction_type_1)
 
+    def test_transaction_related_field_queries(self):
+        serializer = TransactionCreateUpdateSerializer(
+            data=[self.transaction_valid_data, self.transaction_update_data], many=True
+        )
+        # Один запрос на все BankAccount (вместе с Card/Deposit)
+        # и один на TransactionType
+        with self.assertNumQueries(2):
+            self.assertEqual(serializer.is_valid(), True)
+
+        self.assertEqual(
+            serializer.validated_data[1]['from_number'], self.bank_account_3
+        )
+
     def test_transaction_create_invalid_serializer(self):
         serializer = TransactionCreateUpdateSerializer(
             data=self.transaction_invalid_data_1
@@ -386,3 +428,69 @@ class TransactionSerializerTest(TransactionSetUpMixin, APITestCase):
             from_obj.cashback_money, cashback_money_obj_old + cashback_money
         )
         self.assertEqual(serializer.instance.cashback_money, cashback_money)
+
+
+class CompiledRepresentationTest(TransactionSetUpMixin, APITestCase):
+    def render(self, serializer_class, instance, many=False):
+        return JSONRenderer().render(serializer_class(instance, many=many).data)
+
+    def render_with_drf_fields(self, serializer_class, instance, many=False):
+        with mock.patch.object(
+            CustomSerializer, 'to_representation',
+            serializers.Serializer.to_representation
+        ), mock.patch.object(
+            CustomListSerializer, 'to_representation',
+            serializers.ListSerializer.to_representation
+        ):
+            return self.render(serializer_class, instance, many=many)
+
+    def test_compiled_representation(self):
+        cases = (
+            (AccountTarifSerializer, AccountTarif.objects.all()),
+            (UserSerializer, User.objects.all()),
+            (BankAccountSerializer, BankAccount.objects.all()),
+            (TransactionTypeSerializer, TransactionType.objects.all()),
+            (TransactionSerializer, Transaction.objects.all()),
+            (TransactionCreateUpdateSerializer, Transaction.objects.all()),
+            (CashbackSerializer, Cashback.objects.all()),
+            (CardTypeSerializer, CardType.objects.all()),
+            (CardTypeCreateUpdateSerializer, CardType.objects.all()),
+            (CardDesignSerializer, CardDesign.objects.all()),
+            (CardSerializer, Card.objects.all()),
+            (DepositSeializer, Deposit.objects.all()),
+        )
+        for serializer_class, queryset in cases:
+            with self.subTest(serializer_class.__name__):
+                self.assertEqual(
+                    self.render(serializer_class, queryset, many=True),
+                    self.render_with_drf_fields(serializer_class, queryset, many=True)
+                )
+                self.assertEqual(
+                    self.render(serializer_class, queryset.first()),
+                    self.render_with_drf_fields(serializer_class, queryset.first())
+                )
+
+    def test_compiled_representation_instance_fields(self):
+        BankAccountSerializer(self.bank_account_1).data
+
+        serializer = BankAccountSerializer(self.bank_account_1)
+        serializer.fields.pop('user')
+        serializer.fields['bank_name'] = serializers.CharField(source='number')
+        self.assertEqual(serializer.data, {
+            'id': self.bank_account_1.pk,
+            'number': self.bank_account_1.number,
+            'bank_name': self.bank_account_1.number,
+        })
+
+        serializer = BankAccountSerializer([self.bank_account_1], many=True)
+        serializer.child.fields.pop('user')
+        self.assertNotIn('user', serializer.data[0])
+
+    def test_compiled_representation_null_relation(self):
+        self.transaction_1.from_number = None
+        self.transaction_1.save()
+        self.transaction_1.refresh_from_db()
+        self.assertEqual(
+            self.render(TransactionSerializer, self.transaction_1),
+            self.render_with_drf_fields(TransactionSerializer, self.transaction_1)
+        )
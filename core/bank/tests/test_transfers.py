@@ -0,0 +1,208 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from rest_framework.validators import ValidationError
+
+from bank.models import AccountBalance, Transaction, TransferUsage
+from bank.transfers import (
+    transfer,
+    bulk_transfer,
+    calculate_cashback_money,
+    lock_transfer_usages,
+)
+from bank.cashback import cashback_rates, CashbackRates
+from .model_mixins import TransactionSetUpMixin
+
+
+class TransferTest(TransactionSetUpMixin, TestCase):
+    def test_transfer(self):
+        count = Transaction.objects.count()
+        obj = transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1,
+            cashback_money=10
+        )
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(Transaction.objects.count(), count + 1)
+        self.assertEqual(obj.cashback_money, 10)
+        self.assertEqual(self.card_1.money, 9000)
+        self.assertEqual(self.card_1.cashback_money, 10)
+        self.assertEqual(self.card_2.money, 21000)
+
+    def test_transfer_exact_money(self):
+        for money in (Decimal('0.1'), Decimal('0.2')):
+            transfer(
+                self.bank_account_1, self.bank_account_2, money, self.transaction_type_1
+            )
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(self.card_1.money, Decimal('9999.70'))
+        self.assertEqual(self.card_2.money, Decimal('20000.30'))
+
+    def test_transfer_not_enough_money(self):
+        count = Transaction.objects.count()
+        # Баланс в памяти устарел, проверка должна идти по строке в бд
+        AccountBalance.objects.filter(pk=self.card_1.bank_account_id).update(
+            balance=500
+        )
+
+        with self.assertRaises(ValidationError):
+            transfer(
+                self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+            )
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(Transaction.objects.count(), count)
+        self.assertEqual(self.card_1.money, 500)
+        self.assertEqual(self.card_2.money, 20000)
+
+    def test_transfer_without_account_balance(self):
+        AccountBalance.objects.filter(pk=self.bank_account_2.pk).delete()
+        with self.assertRaises(ValidationError):
+            transfer(
+                self.bank_account_2, self.bank_account_1, 100, self.transaction_type_1
+            )
+
+        # Строка баланса получателя создается переводом
+        transfer(self.bank_account_1, self.bank_account_2, 100, self.transaction_type_1)
+        balance = AccountBalance.objects.get(pk=self.bank_account_2.pk)
+        self.assertEqual((balance.balance, balance.version), (100, 1))
+        self.assertEqual(
+            AccountBalance.objects.get(pk=self.bank_account_1.pk).balance, 9900
+        )
+
+
+class TransferLimitTest(TransactionSetUpMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.account_tarif_1.transfer_limit = 1500
+        self.account_tarif_1.save()
+
+    def test_transfer_limit(self):
+        transfer(
+            self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+        )
+
+        with self.assertRaises(ValidationError) as context:
+            transfer(
+                self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+            )
+        self.assertIn('money', context.exception.detail)
+
+        transfer(self.bank_account_1, self.bank_account_2, 500, self.transaction_type_1)
+        self.card_1.refresh_from_db()
+        self.assertEqual(self.card_1.money, 8500)
+        self.assertEqual(TransferUsage.objects.get(user=self.user_1).money, 1500)
+
+    def test_transfer_limit_not_reserved_on_error(self):
+        AccountBalance.objects.filter(pk=self.card_1.bank_account_id).update(
+            balance=500
+        )
+
+        with self.assertRaises(ValidationError):
+            transfer(
+                self.bank_account_1, self.bank_account_2, 1000, self.transaction_type_1
+            )
+        self.assertFalse(
+            TransferUsage.objects.filter(user=self.user_1, money__gt=0).exists()
+        )
+
+    def test_transfer_limit_own_accounts(self):
+        # Переводы между своими счетами в лимит не входят
+        transfer(
+            self.bank_account_1, self.bank_account_3, 2000, self.transaction_type_1
+        )
+        self.assertFalse(TransferUsage.objects.filter(user=self.user_1).exists())
+
+    def test_bulk_transfer_limit_locks(self):
+        self.user_2.tarif = None
+        self.user_2.save()
+        items = [
+            {
+                'from_number': self.bank_account_1.pk,
+                'to_number': self.bank_account_2.pk,
+                'money': '1000',
+                'transaction_type': self.transaction_type_1.pk,
+            },
+            {
+                'from_number': self.bank_account_2.pk,
+                'to_number': self.bank_account_1.pk,
+                'money': '3000',
+                'transaction_type': self.transaction_type_1.pk,
+            },
+        ]
+
+        with mock.patch(
+            'bank.transfers.lock_transfer_usages', wraps=lock_transfer_usages
+        ) as lock:
+            results = bulk_transfer(items)
+
+        # Блокируется только счетчик пользователя с лимитом
+        lock.assert_called_once_with({self.user_1})
+        self.assertTrue(all('id' in result for result in results))
+        self.assertEqual(TransferUsage.objects.get(user=self.user_1).money, 1000)
+        # Без лимита переводы все равно учитываются в счетчике
+        self.assertEqual(TransferUsage.objects.get(user=self.user_2).money, 3000)
+
+
+class CashbackRatesTest(TransactionSetUpMixin, TestCase):
+    def test_cashback_rates(self):
+        self.assertEqual(
+            cashback_rates.get_percent(
+                self.card_type_1.pk, self.transaction_type_1.pk
+            ),
+            self.cashback_1.percent
+        )
+        self.assertEqual(
+            cashback_rates.get_percent(
+                self.card_type_1.pk, self.transaction_type_2.pk
+            ),
+            0
+        )
+
+        with self.assertNumQueries(0):
+            calculate_cashback_money(self.card_1, self.transaction_type_1, 1000)
+
+    def test_cashback_rates_invalidation(self):
+        cashback_rates.get_rates()
+        self.card_type_1.cashbacks.add(self.cashback_2)
+        self.assertEqual(
+            cashback_rates.get_percent(
+                self.card_type_1.pk, self.transaction_type_2.pk
+            ),
+            self.cashback_2.percent
+        )
+
+        self.cashback_2.percent = 50
+        self.cashback_2.save()
+        self.assertEqual(
+            calculate_cashback_money(self.card_1, self.transaction_type_2, 1000), 500
+        )
+
+    @override_settings(CASHBACK_RATES_SHARED_CACHE=True, CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    })
+    def test_cashback_rates_shared_cache(self):
+        # Таблица другого воркера gunicorn со своим состоянием в памяти
+        other_worker_rates = CashbackRates()
+        self.assertEqual(
+            other_worker_rates.get_percent(
+                self.card_type_1.pk, self.transaction_type_1.pk
+            ),
+            self.cashback_1.percent
+        )
+
+        self.cashback_1.percent = 7
+        self.cashback_1.save()
+
+        self.assertEqual(
+            other_worker_rates.get_percent(
+                self.card_type_1.pk, self.transaction_type_1.pk
+            ),
+            7
+        )
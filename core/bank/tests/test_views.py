@@ -1,10 +1,26 @@
+import base64
+import json
+import os
+import pickle
+import tempfile
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
+from user.authentication import get_token_cache_key
 from user.models import AccountTarif, User
+from bank import exports
+from bank.metrics import registry, MetricsRegistry, RequestStats
 from bank.models import (
+    AccountBalance,
     BankAccount,
     TransactionType,
     Transaction,
@@ -13,6 +29,8 @@ from bank.models import (
     CardDesign,
     Card,
     Deposit,
+    TransferUsage,
+    IdempotencyKey,
 )
 from .model_mixins import (
     UserSetUpMixin,
@@ -43,7 +61,7 @@ class AccountTarifAPITest(UserSetUpMixin, APITestCase):
         response = self.client.get(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_account_tarif_retrive_update_delete_api(self):
         self.client.post(self.url, self.account_tarif_valid_data)
@@ -90,7 +108,7 @@ class UserAPITest(UserSetUpMixin, APITestCase):
         response = self.client.get(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_user_retrive_update_delete(self):
         self.client.post(self.url, self.user_valid_data)
@@ -128,6 +146,77 @@ class UserAPITest(UserSetUpMixin, APITestCase):
         )
 
 
+class TokenAuthenticationAPITest(TransactionTypeSetUpMixin, APITestCase):
+    url = reverse('transaction_type')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_token_authentication_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Токен и ответ справочника из кэша
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # В кэше нет ни токена, ни хэша пароля, пароль загружается по обращению
+        token = Token.objects.get(user=self.user_1)
+        cached = cache.get(get_token_cache_key(token.key))
+        data = pickle.dumps(cached)
+        self.assertNotIn(token.key.encode(), data)
+        self.assertNotIn(self.user_1.password.encode(), data)
+        user, _ = cached
+        with self.assertNumQueries(1):
+            self.assertEqual(user.password, self.user_1.password)
+
+        # Изменение пользователя сбрасывает кэш его токена
+        self.user_1.fio = 'New FIO'
+        self.user_1.save()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.user_1.is_active = False
+        self.user_1.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_api(self):
+        old_key = Token.objects.get(user=self.user_1).key
+        self.client.get(self.url)
+
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        new_key = Token.objects.get(user=self.user_1).key
+        self.assertNotEqual(new_key, old_key)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + new_key)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_basic_authentication_login_only(self):
+        user = User.objects.create_user(
+            'basic', 'basic@gmail.com', '+79000000099', password='basic_password'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Basic ' + base64.b64encode(
+            b'basic:basic_password'
+        ).decode())
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(
+            reverse('login'), {'username': 'basic', 'password': 'basic_password'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['token'], Token.objects.get(user=user).key)
+
+
 class TransactionTypeAPITest(TransactionTypeSetUpMixin, APITestCase):
     url = reverse('transaction_type')
     url_detail = reverse('transaction_type_detail', kwargs={'pk': 3})
@@ -143,7 +232,7 @@ class TransactionTypeAPITest(TransactionTypeSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_transaction_type_retrive_update_delete_api(self):
         self.client.post(self.url, data=self.transaction_type_valid_data)
@@ -193,7 +282,7 @@ class CashbackAPITest(CashbackSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_cashback_retrive_update_delete_api(self):
         self.client.post(self.url, data=self.cashback_valid_data)
@@ -245,7 +334,7 @@ class CardTypeAPITest(CardTypeSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_card_type_retrive_update_delete_api(self):
         self.client.post(self.url, data=self.card_type_valid_data)
@@ -293,7 +382,7 @@ class CardDesignAPITest(CardDesignSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_card_design_retrive_update_delete_api(self):
         self.client.post(self.url, data=self.card_design_valid_data)
@@ -329,10 +418,11 @@ class BankAccountAPITest(BankAccountSetUpMixin, APITestCase):
 
     def setUp(self):
         super().setUp()
+        # Вклад без операций - счет можно удалить
         self.deposit_for_delete = Deposit.objects.create(
             bank_account=self.bank_account_1,
             currency='EUR',
-            money=20000,
+            money=0,
             interest_rate=2.0,
             min_value=200,
             max_value=200000
@@ -346,7 +436,7 @@ class BankAccountAPITest(BankAccountSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count)
+        self.assertEqual(len(response.data['results']), count)
 
     def test_bank_account_retrive_update_api(self):
         response = self.client.get(self.url_detail)
@@ -377,6 +467,16 @@ class BankAccountAPITest(BankAccountSetUpMixin, APITestCase):
         self.assertEqual(BankAccount.objects.count(), bank_account_count - 1)
         self.assertEqual(Deposit.objects.count(), deposit_count - 1)
 
+    def test_bank_account_delete_with_postings_api(self):
+        self.deposit_for_delete.money = 20000
+        self.deposit_for_delete.save()
+        bank_account_count = BankAccount.objects.count()
+
+        response = self.client.delete(self.url_detail)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(BankAccount.objects.count(), bank_account_count)
+        self.assertTrue(Deposit.objects.filter(pk=self.deposit_for_delete.pk).exists())
+
     def test_bank_account_update_invalid_api(self):
         response = self.client.put(self.url_detail, self.bank_account_invalid_data_1)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -417,7 +517,7 @@ class CardAPITest(CardSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), card_count + 1)
+        self.assertEqual(len(response.data['results']), card_count + 1)
 
     def test_card_retrive_update_api(self):
         self.client.post(self.url, self.card_valid_data)
@@ -444,7 +544,7 @@ class CardAPITest(CardSetUpMixin, APITestCase):
         self.assertEqual(response.data['design']['id'], self.card_update_data['design'])
 
     def test_card_delete_api(self):
-        self.client.post(self.url, self.card_valid_data)
+        self.client.post(self.url, {**self.card_valid_data, 'money': 0})
 
         card_count = Card.objects.count()
         bank_acoount_count = BankAccount.objects.count()
@@ -455,6 +555,14 @@ class CardAPITest(CardSetUpMixin, APITestCase):
         self.assertEqual(Card.objects.count(), card_count - 1)
         self.assertEqual(BankAccount.objects.count(), bank_acoount_count - 1)
 
+    def test_card_delete_with_postings_api(self):
+        self.client.post(self.url, self.card_valid_data)
+        card_count = Card.objects.count()
+
+        response = self.client.delete(self.url_detail)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Card.objects.count(), card_count)
+
     def test_card_invalid_api(self):
         response = self.client.post(self.url, self.card_invalid_data_1)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -493,7 +601,7 @@ class DepositAPITest(DepositSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), deposit_count + 1)
+        self.assertEqual(len(response.data['results']), deposit_count + 1)
 
     def test_deposit_retrive_update_api(self):
         self.client.post(self.url, self.deposit_valid_data)
@@ -516,7 +624,7 @@ class DepositAPITest(DepositSetUpMixin, APITestCase):
         )
 
     def test_deposit_delete_api(self):
-        self.client.post(self.url, self.deposit_valid_data)
+        self.client.post(self.url, {**self.deposit_valid_data, 'money': 0})
 
         deposit_count = Deposit.objects.count()
         bank_acoount_count = BankAccount.objects.count()
@@ -527,6 +635,14 @@ class DepositAPITest(DepositSetUpMixin, APITestCase):
         self.assertEqual(Deposit.objects.count(), deposit_count - 1)
         self.assertEqual(BankAccount.objects.count(), bank_acoount_count - 1)
 
+    def test_deposit_delete_with_postings_api(self):
+        self.client.post(self.url, self.deposit_valid_data)
+        deposit_count = Deposit.objects.count()
+
+        response = self.client.delete(self.url_detail)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Deposit.objects.count(), deposit_count)
+
     def test_deposit_invalid_api(self):
         response = self.client.post(self.url, self.deposit_invalid_data_1)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -561,7 +677,7 @@ class TransactionAPITest(TransactionSetUpMixin, APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), count + 1)
+        self.assertEqual(len(response.data['results']), count + 1)
 
     def test_transaction_retrive_update_api(self):
         self.client.post(self.url, self.transaction_valid_data)
@@ -663,3 +779,480 @@ class TransactionAPITest(TransactionSetUpMixin, APITestCase):
             from_obj.cashback_money, cashback_money_obj_old + cashback_money
         )
         self.assertEqual(response.data['cashback_money'], cashback_money)
+
+
+class TransactionBulkAPITest(TransactionSetUpMixin, APITestCase):
+    url = reverse('transaction_bulk')
+
+    def test_transaction_bulk_api(self):
+        count = Transaction.objects.count()
+        items = [
+            self.transaction_valid_data,
+            self.transaction_invalid_data_2,
+            self.transaction_invalid_data_1,
+            self.transaction_valid_data,
+        ]
+
+        response = self.client.post(self.url, items)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], 2)
+        self.assertIn('id', response.data['results'][0])
+        self.assertListEqual(
+            list(response.data['results'][1]['errors'].keys()),
+            ['from_number', 'to_number']
+        )
+        self.assertListEqual(
+            list(response.data['results'][2]['errors'].keys()),
+            list(self.transaction_invalid_data_1.keys())
+        )
+        self.assertEqual(Transaction.objects.count(), count + 2)
+
+        self.card_1.refresh_from_db()
+        self.card_2.refresh_from_db()
+        self.assertEqual(self.card_1.money, 8000)
+        self.assertEqual(self.card_2.money, 22000)
+        cashback_money = int(
+            self.transaction_valid_data['money'] * self.cashback_1.percent / 100
+        )
+        self.assertEqual(self.card_1.cashback_money, 2 * cashback_money)
+
+    def test_transaction_bulk_ndjson_api(self):
+        count = Transaction.objects.count()
+        body = '\n'.join(
+            json.dumps(self.transaction_valid_data) for _ in range(3)
+        )
+
+        response = self.client.post(
+            self.url, body, content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(Transaction.objects.count(), count + 3)
+
+    def test_transaction_bulk_not_enough_money_api(self):
+        data = dict(self.transaction_valid_data, money=6000)
+
+        response = self.client.post(self.url, [data, data])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIn('id', response.data['results'][0])
+        self.assertIn('from_number', response.data['results'][1]['errors'])
+        self.card_1.refresh_from_db()
+        self.assertEqual(self.card_1.money, 4000)
+
+    def test_transaction_bulk_transfer_limit_api(self):
+        self.account_tarif_1.transfer_limit = 2500
+        self.account_tarif_1.save()
+        data = dict(self.transaction_valid_data, money=1000)
+
+        response = self.client.post(self.url, [data, data, data])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertIn('money', response.data['results'][2]['errors'])
+        self.assertEqual(
+            TransferUsage.objects.get(user=self.user_1).money, 2000
+        )
+
+
+class IdempotencyKeyAPITest(TransactionSetUpMixin, APITestCase):
+    url = reverse('transaction')
+
+    def test_idempotency_key_replay(self):
+        count = Transaction.objects.count()
+        response = self.client.post(
+            self.url, self.transaction_valid_data, HTTP_IDEMPOTENCY_KEY='key-1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Токен из кэша аутентификации, один запрос ключа по индексу
+        with self.assertNumQueries(1):
+            replayed = self.client.post(
+                self.url, self.transaction_valid_data, HTTP_IDEMPOTENCY_KEY='key-1'
+            )
+        self.assertEqual(replayed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(replayed.json(), response.json())
+
+        self.card_1.refresh_from_db()
+        self.assertEqual(Transaction.objects.count(), count + 1)
+        self.assertEqual(self.card_1.money, 9000)
+
+        response = self.client.post(
+            self.url, self.transaction_valid_data, HTTP_IDEMPOTENCY_KEY='key-2'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), count + 2)
+
+    def test_idempotency_key_reused_for_another_request(self):
+        self.client.post(
+            self.url, self.transaction_valid_data, HTTP_IDEMPOTENCY_KEY='key-1'
+        )
+        response = self.client.post(
+            self.url,
+            dict(self.transaction_valid_data, money=10),
+            HTTP_IDEMPOTENCY_KEY='key-1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_idempotency_key_not_stored_on_error(self):
+        data = dict(self.transaction_valid_data, money=15000)
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        AccountBalance.objects.filter(pk=self.card_1.bank_account_id).update(
+            balance=20000
+        )
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=0)
+    def test_idempotency_key_expired(self):
+        count = Transaction.objects.count()
+        for _ in range(2):
+            response = self.client.post(
+                self.url, self.transaction_valid_data, HTTP_IDEMPOTENCY_KEY='key-1'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), count + 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class BankAccountBalanceAPITest(TransactionSetUpMixin, APITestCase):
+    def test_bank_account_balance_api(self):
+        url = reverse('bank_account_balance', kwargs={'pk': self.bank_account_1.pk})
+        today = timezone.localdate()
+        response = self.client.post(reverse('transaction'), self.transaction_valid_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'bank_account': self.bank_account_1.pk,
+            'date': today.isoformat(),
+            'balance': 9000.0,
+        })
+
+        yesterday = today - timedelta(days=1)
+        response = self.client.get(url, {'date': yesterday.isoformat()})
+        self.assertIsNone(response.json()['balance'])
+
+        response = self.client.get(url, {'date': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bank_account_balance_chart_api(self):
+        url = reverse(
+            'bank_account_balance_chart', kwargs={'pk': self.bank_account_1.pk}
+        )
+        today = timezone.localdate()
+        self.client.post(reverse('transaction'), self.transaction_valid_data)
+
+        response = self.client.get(url, {
+            'date_from': (today - timedelta(days=2)).isoformat(),
+            'date_to': today.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['date'], row['balance']) for row in response.json()],
+            [(today.isoformat(), 9000.0)]
+        )
+
+        response = self.client.get(url, {
+            'date_from': today.isoformat(),
+            'date_to': (today - timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date_to', response.json())
+
+
+class KeysetPaginationAPITest(TransactionSetUpMixin, APITestCase):
+    url = reverse('transaction')
+
+    def setUp(self):
+        super().setUp()
+        for _ in range(3):
+            self.client.post(self.url, self.transaction_valid_data)
+        # Одинаковые даты - порядок должен определяться id
+        Transaction.objects.filter(pk__gt=2).update(
+            date=Transaction.objects.get(pk=3).date
+        )
+
+    def test_keyset_pagination_api(self):
+        expected_ids = list(
+            Transaction.objects.order_by('-date', '-id').values_list('id', flat=True)
+        )
+
+        ids = []
+        next_url = f'{self.url}?page_size=2'
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids += [obj['id'] for obj in response.data['results']]
+            next_url = response.data['next']
+        self.assertListEqual(ids, expected_ids)
+
+        previous_ids = [obj['id'] for obj in response.data['results']]
+        previous_url = response.data['previous']
+        while previous_url:
+            response = self.client.get(previous_url)
+            previous_ids = (
+                [obj['id'] for obj in response.data['results']] + previous_ids
+            )
+            previous_url = response.data['previous']
+        self.assertListEqual(previous_ids, expected_ids)
+
+    def test_keyset_pagination_invalid_cursor_api(self):
+        response = self.client.get(f'{self.url}?cursor=abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserTransactionAPITest(TransactionSetUpMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.transaction_3 = Transaction.objects.create(
+            from_number=self.bank_account_2,
+            to_number=self.bank_account_1,
+            money=500,
+            transaction_type=self.transaction_type_2
+        )
+        self.url = reverse('user_transaction', kwargs={'user_pk': self.user_2.pk})
+
+    def get_ids(self, params=''):
+        response = self.client.get(self.url + params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [obj['id'] for obj in response.json()['results']]
+
+    def test_user_transaction_api(self):
+        self.assertListEqual(
+            self.get_ids(),
+            [self.transaction_3.pk, self.transaction_2.pk, self.transaction_1.pk]
+        )
+        self.assertListEqual(
+            self.get_ids('?direction=outgoing'), [self.transaction_3.pk]
+        )
+        self.assertListEqual(
+            self.get_ids('?direction=incoming'),
+            [self.transaction_2.pk, self.transaction_1.pk]
+        )
+        self.assertListEqual(
+            self.get_ids(f'?transaction_type={self.transaction_type_2.pk}'),
+            [self.transaction_3.pk, self.transaction_2.pk]
+        )
+
+    def test_user_transaction_date_filter_api(self):
+        Transaction.objects.filter(pk=self.transaction_1.pk).update(
+            date=timezone.now() - timedelta(days=10)
+        )
+        date_from = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertListEqual(
+            self.get_ids(f'?date_from={quote(date_from)}'),
+            [self.transaction_3.pk, self.transaction_2.pk]
+        )
+
+    def test_user_transaction_invalid_api(self):
+        response = self.client.get(self.url + '?direction=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            reverse('user_transaction', kwargs={'user_pk': 999})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_user_transaction_export_api(self):
+        url = reverse(
+            'user_transaction_export', kwargs={'user_pk': self.user_2.pk}
+        )
+
+        response = self.client.get(url + '?format=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(exports.TRANSACTION_EXPORT_FIELDS))
+        self.assertEqual(len(lines), 4)
+
+        response = self.client.get(url + '?format=ndjson&direction=outgoing')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.transaction_3.pk)
+        self.assertEqual(rows[0]['from_number'], self.bank_account_2.number)
+        self.assertEqual(rows[0]['money'], '500.00')
+
+        response = self.client.get(url + '?format=csv&direction=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReferenceDataCacheAPITest(CashbackSetUpMixin, APITestCase):
+    url = reverse('cashback')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_reference_data_cache_api(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        # Повторный запрос - токен и справочник из кэша, без запросов к бд
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Изменение связанного справочника меняет версию ответа
+        self.transaction_type_1.title = 'Transaction type 111'
+        self.transaction_type_1.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            response.data['results'][0]['transaction_type'][0]['title'],
+            'Transaction type 111'
+        )
+
+    def test_reference_data_cache_m2m_api(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        self.transaction_type_2.cashback_set.add(self.cashback_1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results'][0]['transaction_type']), 2)
+
+
+class UserSummaryAPITest(TransactionSetUpMixin, APITestCase):
+    url = reverse('my_summary')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_user_summary_api(self):
+        # Токен из кэша после первого запроса, сводка - два агрегата
+        self.client.get(reverse('transaction_type'))
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'user': self.user_1.pk,
+            'currencies': [
+                {'currency': 'EUR', 'cards_money': 0.0, 'deposits_money': 10000.0,
+                 'total_money': 10000.0},
+                {'currency': 'RUB', 'cards_money': 10000.0, 'deposits_money': 0.0,
+                 'total_money': 10000.0},
+            ],
+            'cards_count': 1,
+            'blocked_cards_count': 0,
+            'deposits_count': 1,
+            'cashback_money': 0,
+        })
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json(), response.json())
+
+        # Перевод и изменение карты сбрасывают сводку
+        self.client.post(reverse('transaction'), self.transaction_valid_data)
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['currencies'][1]['cards_money'], 9000.0)
+
+        self.card_1.is_blocked = True
+        self.card_1.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['blocked_cards_count'], 1)
+
+    def test_user_summary_api_other_user(self):
+        response = self.client.get(
+            reverse('user_summary', kwargs={'user_pk': self.user_2.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['cards_count'], 1)
+        self.assertEqual(response.json()['deposits_count'], 1)
+
+        response = self.client.get(reverse('user_summary', kwargs={'user_pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MetricsAPITest(TransactionSetUpMixin, APITestCase):
+    url = reverse('metrics')
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+
+    def test_metrics_api(self):
+        response = self.client.get(reverse('transaction'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        metrics = response.content.decode()
+
+        labels = 'view="transaction",method="GET"'
+        self.assertIn(f'star_bank_requests_total{{{labels}}} 1\n', metrics)
+        # Аутентификация по токену и страница транзакций
+        self.assertIn(f'star_bank_db_queries_total{{{labels}}} 2\n', metrics)
+        self.assertIn(
+            f'star_bank_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1\n',
+            metrics
+        )
+        self.assertIn(
+            f'star_bank_db_queries_window{{{labels},quantile="0.99"}} 2\n', metrics
+        )
+        self.assertIn(f'star_bank_serializer_seconds_total{{{labels}}}', metrics)
+        # Запросы к /metrics не учитываются
+        self.assertNotIn('view="metrics"', metrics)
+
+    def test_metrics_api_streaming(self):
+        url = reverse('user_transaction_export', kwargs={'user_pk': self.user_2.pk})
+        response = self.client.get(url + '?format=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        labels = 'view="user_transaction_export",method="GET"'
+        # Выгрузка учитывается после того, как тело прочитано
+        metrics = self.client.get(self.url).content.decode()
+        self.assertNotIn(labels, metrics)
+
+        b''.join(response.streaming_content)
+        metrics = self.client.get(self.url).content.decode()
+        self.assertIn(f'star_bank_requests_total{{{labels}}} 1\n', metrics)
+        # Запросы выгрузки выполняются при чтении тела
+        self.assertNotIn(f'star_bank_db_queries_total{{{labels}}} 0\n', metrics)
+
+    def test_metrics_api_multiprocess(self):
+        directory = tempfile.mkdtemp()
+        # Снимок другого (живого) воркера
+        worker = MetricsRegistry()
+        worker.record('transaction', 'GET', 200, 0.01, RequestStats())
+        with open(os.path.join(directory, f'{os.getppid()}.json'), 'w') as file:
+            json.dump(worker.snapshot(), file)
+
+        with override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            response = self.client.get(reverse('transaction'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(os.path.exists(registry.get_path()))
+
+            metrics = self.client.get(self.url).content.decode()
+            registry.clear()
+
+        labels = 'view="transaction",method="GET"'
+        self.assertIn(f'star_bank_requests_total{{{labels}}} 2\n', metrics)
+        self.assertIn(f'star_bank_db_queries_total{{{labels}}} 2\n', metrics)
+        self.assertIn(f'star_bank_db_queries_window_count{{{labels}}} 2\n', metrics)
+        self.assertEqual(os.listdir(directory), [f'{os.getppid()}.json'])
+
+    def test_metrics_api_not_allowed_ip(self):
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,431 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from rest_framework import serializers
+from rest_framework.fields import empty, SkipField
+from rest_framework.validators import ValidationError
+
+from .models import (
+    AccountBalance,
+    BankAccount,
+    TransactionType,
+    Transaction,
+    Card,
+    TransferUsage,
+    ALLOWED_CURRENCY,
+)
+from .balances import record_daily_balances
+from .journal import create_postings
+from .cashback import cashback_rates
+from .fields import MoneyField
+
+
+BULK_TRANSFER_BATCH_SIZE = 1000
+
+BULK_TRANSFER_ITEM_FIELDS = {
+    'from_number': serializers.IntegerField(),
+    'to_number': serializers.IntegerField(),
+    'money': MoneyField(min_value=Decimal('0.1')),
+    'currency': serializers.ChoiceField(required=False, choices=ALLOWED_CURRENCY),
+    'transaction_type': serializers.IntegerField(),
+}
+
+
+def get_obj_type(obj):
+    return 'карты' if isinstance(obj, Card) else 'депозита'
+
+
+def lock_bank_accounts(pks):
+    """
+    Блокирует строки BankAccount (SELECT ... FOR UPDATE) строго
+    в порядке возрастания pk - так два встречных перевода A -> B и B -> A
+    ждут друг друга, а не попадают в deadlock.
+    Должна вызываться внутри transaction.atomic().
+    Возвращает pk заблокированных счетов (без создания объектов моделей).
+    """
+    return list(
+        BankAccount.objects.select_for_update().filter(pk__in=pks).order_by(
+            'pk'
+        ).values_list('pk', flat=True)
+    )
+
+
+def get_or_create_transaction_type(title):
+    """Служебный тип транзакций (начисления, списания платы) по названию."""
+    transaction_type = TransactionType.objects.filter(title=title).order_by(
+        'pk'
+    ).first()
+    if transaction_type is None:
+        transaction_type = TransactionType.objects.create(title=title)
+    return transaction_type
+
+
+def get_usage_month():
+    return timezone.localdate().replace(day=1)
+
+
+def is_limited_transfer(from_number, to_number):
+    """Лимит тарифа действует на переводы другим пользователям."""
+    return from_number.user_id != to_number.user_id
+
+
+def get_transfer_limit(user):
+    return None if user.tarif is None else user.tarif.transfer_limit
+
+
+def get_transfer_limit_error(limit):
+    return {'money': [f'Превышен месячный лимит переводов по тарифу ({limit}).']}
+
+
+def reserve_transfer_limit(user, money):
+    """
+    Добавляет money к сумме переводов user за текущий месяц, если сумма
+    не превышает лимит тарифа. Проверка и увеличение - один условный
+    UPDATE строки счетчика по уникальному индексу (user, month),
+    строка создается при первом переводе за месяц.
+    Должна вызываться внутри transaction.atomic().
+    """
+    month = get_usage_month()
+    limit = get_transfer_limit(user)
+    usage = TransferUsage.objects.filter(user=user, month=month)
+    if limit is not None:
+        usage = usage.filter(money__lte=limit - money)
+
+    if usage.update(money=F('money') + money):
+        return
+    TransferUsage.objects.bulk_create(
+        [TransferUsage(user=user, month=month)], ignore_conflicts=True
+    )
+    if not usage.update(money=F('money') + money):
+        raise ValidationError(get_transfer_limit_error(limit))
+
+
+def lock_transfer_usages(users):
+    """
+    Блокирует счетчики переводов users за текущий месяц (создавая
+    недостающие), возвращает {user_id: TransferUsage}.
+    Должна вызываться внутри transaction.atomic() после lock_bank_accounts.
+    """
+    month = get_usage_month()
+    TransferUsage.objects.bulk_create(
+        [TransferUsage(user=user, month=month) for user in users],
+        ignore_conflicts=True
+    )
+    usages = TransferUsage.objects.select_for_update().filter(
+        user__in=users, month=month
+    ).order_by('user_id')
+    return {usage.user_id: usage for usage in usages}
+
+
+def add_transfer_usages(deltas):
+    """
+    Добавляет {user_id: money} к счетчикам переводов текущего месяца
+    без блокировки строк: у пользователей без лимита проверять нечего,
+    UPDATE money = money + delta не теряет параллельные изменения.
+    """
+    month = get_usage_month()
+    TransferUsage.objects.bulk_create(
+        [TransferUsage(user_id=user_pk, month=month) for user_pk in deltas],
+        ignore_conflicts=True
+    )
+    for user_pk in sorted(deltas):
+        TransferUsage.objects.filter(user_id=user_pk, month=month).update(
+            money=F('money') + deltas[user_pk]
+        )
+
+
+def calculate_cashback_money(from_obj, transaction_type, money):
+    if not isinstance(from_obj, Card):
+        return 0
+
+    percent = cashback_rates.get_percent(from_obj.card_type_id, transaction_type.pk)
+    return int(money * percent / 100)
+
+
+def write_transfer_balances(from_number, from_obj, to_number, money):
+    """
+    Проверяет баланс from_number и переносит money на to_number
+    UPDATE ... SET balance = balance +/- money в порядке возрастания pk.
+    Счету без строки AccountBalance нечего списывать, для получателя
+    строка создается. Должна вызываться внутри transaction.atomic()
+    после lock_bank_accounts - прочитанный баланс не устареет до записи.
+    """
+    balances = dict(
+        AccountBalance.objects.filter(
+            pk__in=[from_number.pk, to_number.pk]
+        ).values_list('pk', 'balance')
+    )
+    if not balances.get(from_number.pk, Decimal('0.00')) >= money:
+        raise ValidationError({'from_number': [
+            f'У {get_obj_type(from_obj)} {from_number.number} недостаточно средств.'
+        ]})
+    if to_number.pk not in balances:
+        AccountBalance.objects.bulk_create(
+            [AccountBalance(bank_account_id=to_number.pk)], ignore_conflicts=True
+        )
+
+    deltas = {from_number.pk: -money, to_number.pk: money}
+    for pk in sorted(deltas):
+        AccountBalance.objects.filter(pk=pk).update(
+            balance=F('balance') + deltas[pk], version=F('version') + 1
+        )
+
+
+def transfer(from_number, to_number, money, transaction_type,
+             currency='RUB', cashback_money=0):
+    """
+    Переводит money со счета from_number на счет to_number.
+    Строки обоих счетов блокируются (lock_bank_accounts) - так же, как
+    в bulk_transfer и пакетных задачах, - баланс проверяется после
+    блокировки и не может уйти в минус при параллельных переводах.
+    Балансы (строки AccountBalance), запись Transaction, счетчик месячного
+    лимита переводов и остатки счетов за день обновляются в той же
+    транзакции бд.
+    """
+    from_obj = from_number.get_related_card_or_deposit()
+
+    with transaction.atomic():
+        lock_bank_accounts([from_number.pk, to_number.pk])
+        if is_limited_transfer(from_number, to_number):
+            reserve_transfer_limit(from_number.user, money)
+        write_transfer_balances(from_number, from_obj, to_number, money)
+
+        if cashback_money != 0:
+            Card.objects.filter(pk=from_obj.pk).update(
+                cashback_money=F('cashback_money') + cashback_money
+            )
+        record_daily_balances([from_number.pk, to_number.pk])
+
+        obj = Transaction.objects.create(
+            from_number=from_number,
+            to_number=to_number,
+            money=money,
+            currency=currency,
+            transaction_type=transaction_type,
+            cashback_money=cashback_money
+        )
+        create_postings([obj])
+        return obj
+
+
+def validate_bulk_transfer_item(data):
+    """Проверяет формат одного перевода без обращений к бд."""
+    if not isinstance(data, dict):
+        return None, {'non_field_errors': ['Необходимо передать объект.']}
+
+    validated_data = {}
+    errors = {}
+    for field_name, field in BULK_TRANSFER_ITEM_FIELDS.items():
+        try:
+            validated_data[field_name] = field.run_validation(
+                data.get(field_name, empty)
+            )
+        except SkipField:
+            pass
+        except ValidationError as exc:
+            errors[field_name] = exc.detail
+
+    if not errors and validated_data['from_number'] == validated_data['to_number']:
+        errors['non_field_errors'] = [
+            'Счета from_number и to_number должны быть разными.'
+        ]
+    return validated_data, errors
+
+
+def bulk_transfer(items):
+    """
+    Проводит список переводов за фиксированное число запросов:
+    все счета блокируются и загружаются вместе с Card/Deposit пачкой,
+    балансы проверяются и сводятся в памяти по порядку переводов,
+    затем применяются одним bulk_update на таблицу и одним bulk_create
+    для Transaction. Ошибочный перевод не отменяет остальные.
+    Возвращает список результатов в порядке items:
+    {'index': i, 'id': pk} или {'index': i, 'errors': {...}}.
+    """
+    results = [None] * len(items)
+    valid_items = []
+    for index, data in enumerate(items):
+        validated_data, errors = validate_bulk_transfer_item(data)
+        if errors:
+            results[index] = {'index': index, 'errors': errors}
+        else:
+            valid_items.append((index, validated_data))
+
+    account_pks = set()
+    transaction_type_pks = set()
+    for _, validated_data in valid_items:
+        account_pks.update(
+            (validated_data['from_number'], validated_data['to_number'])
+        )
+        transaction_type_pks.add(validated_data['transaction_type'])
+
+    with transaction.atomic():
+        lock_bank_accounts(account_pks)
+        # Балансы читаются отдельным запросом после получения блокировок
+        bank_accounts = BankAccount.objects.with_related().select_related(
+            'user__tarif'
+        ).in_bulk(account_pks)
+        transaction_types = TransactionType.objects.in_bulk(transaction_type_pks)
+        # Блокируются только счетчики, по которым проверяется лимит
+        usages = lock_transfer_usages(get_limited_users(valid_items, bank_accounts))
+
+        balances = {}
+        usage_deltas = defaultdict(Decimal)
+        money_deltas = defaultdict(Decimal)
+        cashback_deltas = defaultdict(int)
+        new_transactions = []
+        new_transaction_indexes = []
+
+        for index, validated_data in valid_items:
+            errors, from_number, to_number, transaction_type = (
+                get_bulk_transfer_objects(
+                    validated_data, bank_accounts, transaction_types
+                )
+            )
+            if errors:
+                results[index] = {'index': index, 'errors': errors}
+                continue
+
+            from_obj = from_number.get_related_card_or_deposit()
+            to_obj = to_number.get_related_card_or_deposit()
+            money = validated_data['money']
+            currency = validated_data.get('currency', 'RUB')
+
+            balance = balances.get(from_number.pk, from_obj.money)
+            errors = check_bulk_transfer_item(
+                from_number, from_obj, to_number, to_obj, money, currency, balance
+            )
+            if errors:
+                results[index] = {'index': index, 'errors': errors}
+                continue
+
+            if is_limited_transfer(from_number, to_number):
+                limit = get_transfer_limit(from_number.user)
+                if limit is None:
+                    usage_deltas[from_number.user_id] += money
+                else:
+                    usage = usages[from_number.user_id]
+                    if usage.money + money > limit:
+                        results[index] = {
+                            'index': index,
+                            'errors': get_transfer_limit_error(limit)
+                        }
+                        continue
+                    usage.money += money
+
+            cashback_money = calculate_cashback_money(from_obj, transaction_type, money)
+            balances[from_number.pk] = balance - money
+            balances[to_number.pk] = balances.get(to_number.pk, to_obj.money) + money
+            money_deltas[from_obj] -= money
+            money_deltas[to_obj] += money
+            cashback_deltas[from_obj] += cashback_money
+
+            new_transactions.append(Transaction(
+                from_number=from_number,
+                to_number=to_number,
+                money=money,
+                currency=currency,
+                transaction_type=transaction_type,
+                cashback_money=cashback_money
+            ))
+            new_transaction_indexes.append(index)
+
+        apply_money_deltas(money_deltas, cashback_deltas)
+        record_daily_balances([obj.bank_account_id for obj in money_deltas])
+        # Строки счетчиков заблокированы, поэтому пишутся итоговые значения
+        TransferUsage.objects.bulk_update(usages.values(), ['money'])
+        add_transfer_usages(usage_deltas)
+        new_transactions = Transaction.objects.bulk_create(
+            new_transactions, batch_size=BULK_TRANSFER_BATCH_SIZE
+        )
+        create_postings(new_transactions)
+
+    for index, obj in zip(new_transaction_indexes, new_transactions):
+        results[index] = {'index': index, 'id': obj.pk}
+    return results
+
+
+def get_limited_users(valid_items, bank_accounts):
+    """Отправители переводов другим пользователям, у тарифа которых есть лимит."""
+    users = set()
+    for _, validated_data in valid_items:
+        from_number = bank_accounts.get(validated_data['from_number'])
+        to_number = bank_accounts.get(validated_data['to_number'])
+        if from_number is None or to_number is None:
+            continue
+        if is_limited_transfer(from_number, to_number) and (
+            get_transfer_limit(from_number.user) is not None
+        ):
+            users.add(from_number.user)
+    return users
+
+
+def get_bulk_transfer_objects(validated_data, bank_accounts, transaction_types):
+    errors = {}
+    objects = []
+    for field_name, objects_map in (
+        ('from_number', bank_accounts),
+        ('to_number', bank_accounts),
+        ('transaction_type', transaction_types),
+    ):
+        pk = validated_data[field_name]
+        obj = objects_map.get(pk)
+        if obj is None:
+            errors[field_name] = [f'Объекта с pk = {pk} не существует.']
+        objects.append(obj)
+    return (errors, *objects)
+
+
+def check_bulk_transfer_item(from_number, from_obj, to_number, to_obj,
+                             money, currency, balance):
+    errors = defaultdict(list)
+
+    if not balance >= money:
+        errors['from_number'].append(
+            f'У {get_obj_type(from_obj)} {from_number.number} недостаточно средств.'
+        )
+
+    for field_name, number, obj in (
+        ('from_number', from_number, from_obj),
+        ('to_number', to_number, to_obj),
+    ):
+        if obj.currency != currency:
+            errors[field_name].append(
+                f'У {get_obj_type(obj)} {number.number} валюта - {obj.currency}, '
+                f'у транзакции - {currency}'
+            )
+
+    return dict(errors)
+
+
+def apply_money_deltas(money_deltas, cashback_deltas):
+    """
+    Применяет накопленные изменения балансов через bulk_update.
+    Значения записываются как F('balance') + delta, а не абсолютными
+    числами, чтобы не затереть параллельные изменения строк.
+    """
+    AccountBalance.objects.bulk_update(
+        [
+            AccountBalance(
+                pk=obj.bank_account_id,
+                balance=F('balance') + delta,
+                version=F('version') + 1
+            )
+            for obj, delta in money_deltas.items()
+        ],
+        ['balance', 'version'],
+        batch_size=BULK_TRANSFER_BATCH_SIZE
+    )
+    Card.objects.bulk_update(
+        [
+            Card(pk=obj.pk, cashback_money=F('cashback_money') + cashback)
+            for obj, cashback in cashback_deltas.items()
+            if cashback and isinstance(obj, Card)
+        ],
+        ['cashback_money'],
+        batch_size=BULK_TRANSFER_BATCH_SIZE
+    )
@@ -1,5 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+
+if settings.ASYNC_READ_VIEWS:
+    UserTransactionListView = async_views.UserTransactionListAsyncAPI
+    UserCardListView = async_views.UserCardListAsyncAPI
+    UserDepositListView = async_views.UserDepositListAsyncAPI
+else:
+    UserTransactionListView = views.UserTransactionListAPI
+    UserCardListView = views.UserCardListAPI
+    UserDepositListView = views.UserDepositListAPI
 
 
 urlpatterns = [
@@ -13,6 +24,16 @@ urlpatterns = [
         views.BankAccountRetriveUpdateDeleteAPI.as_view(),
         name='bank_account_detail'
     ),
+    path(
+        'bank_account/<int:pk>/balance/',
+        views.BankAccountBalanceAPI.as_view(),
+        name='bank_account_balance'
+    ),
+    path(
+        'bank_account/<int:pk>/balance_chart/',
+        views.BankAccountBalanceChartAPI.as_view(),
+        name='bank_account_balance_chart'
+    ),
 
     path(
         'transaction_type/',
@@ -30,6 +51,11 @@ urlpatterns = [
         views.TransactionListCreateAPI.as_view(),
         name='transaction'
     ),
+    path(
+        'transaction/bulk/',
+        views.TransactionBulkCreateAPI.as_view(),
+        name='transaction_bulk'
+    ),
     path(
         'transaction/<int:pk>/',
         views.TransactionRetriveUpdateDeleteAPI.as_view(),
@@ -73,22 +99,34 @@ urlpatterns = [
 
     path(
         'user_transaction/',
-        views.UserTransactionListAPI.as_view(),
+        UserTransactionListView.as_view(),
         name='my_transaction'
     ),
     path(
         'user_transaction/<int:user_pk>/',
-        views.UserTransactionListAPI.as_view(),
+        UserTransactionListView.as_view(),
         name='user_transaction'
     ),
+    path(
+        'user_transaction/<int:user_pk>/export/',
+        views.UserTransactionExportAPI.as_view(),
+        name='user_transaction_export'
+    ),
+
+    path('user_summary/', views.UserSummaryAPI.as_view(), name='my_summary'),
+    path(
+        'user_summary/<int:user_pk>/',
+        views.UserSummaryAPI.as_view(),
+        name='user_summary'
+    ),
 
-    path('user_card/', views.UserCardListAPI.as_view(), name='my_card'),
-    path('user_card/<int:user_pk>/', views.UserCardListAPI.as_view(), name='user_card'),
+    path('user_card/', UserCardListView.as_view(), name='my_card'),
+    path('user_card/<int:user_pk>/', UserCardListView.as_view(), name='user_card'),
 
-    path('user_deposit/', views.UserDepositListAPI.as_view(), name='my_deposit'),
+    path('user_deposit/', UserDepositListView.as_view(), name='my_deposit'),
     path(
         'user_deposit/<int:user_pk>/',
-        views.UserDepositListAPI.as_view(),
+        UserDepositListView.as_view(),
         name='user_deposit'
     ),
 ]
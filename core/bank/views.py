@@ -1,8 +1,14 @@
-from django.db import transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from rest_framework import status
+from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import JSONParser
 from rest_framework.mixins import (
     ListModelMixin,
     CreateModelMixin,
@@ -20,8 +26,15 @@ from .models import (
     CardDesign,
     Card,
     Deposit,
+    AccountDailyBalance,
 )
-from . import serializers
+from . import serializers, transfers, exports, balances, summary
+from .cache import cache_response
+from .idempotency import idempotent_response
+from .journal import delete_with_journal_check
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .pagination import TransactionPagination
 from .response import Response
 
 
@@ -54,17 +67,66 @@ class BankAccountRetriveUpdateDeleteAPI(RetrieveModelMixin,
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
         related_obj = instance.get_related_card_or_deposit()
-        with transaction.atomic():
-            related_obj.delete()
-            instance.delete()
+        delete_with_journal_check(related_obj, instance)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class BankAccountBalanceAPI(GenericAPIView):
+    """Остаток счета на конец дня (query param date, по умолчанию сегодня)."""
+
+    queryset = BankAccount.objects.all()
+    serializer_class = serializers.AccountDailyBalanceSerializer
+
+    def get(self, request, *args, **kwargs):
+        bank_account = self.get_object()
+        params = self.get_filter_params(request)
+        on_date = params.get('date') or timezone.localdate()
+
+        serializer = self.get_serializer(AccountDailyBalance(
+            bank_account=bank_account,
+            date=on_date,
+            balance=balances.get_balance_at(bank_account, on_date)
+        ))
+        return Response(serializer.data)
+
+    def get_filter_params(self, request):
+        filter_serializer = serializers.BalanceFilterSerializer(
+            data=request.query_params
+        )
+        filter_serializer.is_valid(raise_exception=True)
+        return filter_serializer.validated_data
+
+
+class BankAccountBalanceChartAPI(BankAccountBalanceAPI):
+    """
+    Остатки счета на каждый день периода date_from - date_to (query params),
+    читается O(дней) строк AccountDailyBalance, а не вся история транзакций.
+    """
+
+    def get(self, request, *args, **kwargs):
+        bank_account = self.get_object()
+        params = self.get_filter_params(request)
+
+        chart = balances.get_balance_chart(
+            bank_account, params['date_from'], params['date_to']
+        )
+        serializer = self.get_serializer(chart, many=True)
+        return Response(serializer.data)
+
+    def get_filter_params(self, request):
+        filter_serializer = serializers.BalanceChartFilterSerializer(
+            data=request.query_params
+        )
+        filter_serializer.is_valid(raise_exception=True)
+        return filter_serializer.validated_data
+
+
 class TransactionTypeListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = TransactionType.objects.all()
     serializer_class = serializers.TransactionTypeSerializer
 
+    @cache_response(TransactionType)
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
@@ -94,6 +156,7 @@ class TransactionListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView)
         'from_number', 'to_number', 'transaction_type'
     )
     serializer_class = serializers.TransactionCreateUpdateSerializer
+    pagination_class = TransactionPagination
 
     def get(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -104,10 +167,51 @@ class TransactionListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView)
         serializer = serializers.TransactionSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @idempotent_response
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
 
 
+class TransactionBulkCreateAPI(APIView):
+    """
+    Проводит пачку переводов за один запрос.
+    Принимает JSON список или NDJSON поток (application/x-ndjson),
+    возвращает результат по каждому переводу.
+    """
+
+    parser_classes = (JSONParser, NDJSONParser)
+    max_items = 10000
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'non_field_errors': 'Необходимо передать список переводов.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.max_items:
+            return Response(
+                {'non_field_errors': f'Максимум {self.max_items} переводов за запрос.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = transfers.bulk_transfer(items)
+        errors_count = sum(1 for result in results if 'errors' in result)
+
+        if errors_count == 0:
+            response_status = status.HTTP_201_CREATED
+        elif errors_count == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+
+        return Response({
+            'created': len(results) - errors_count,
+            'errors': errors_count,
+            'results': results
+        }, status=response_status)
+
+
 class TransactionRetriveUpdateDeleteAPI(RetrieveModelMixin,
                                         UpdateModelMixin,
                                         DestroyModelMixin,
@@ -133,6 +237,7 @@ class CashbackListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = Cashback.objects.all().prefetch_related('transaction_type')
     serializer_class = serializers.CashbackCreateUpdateSerializer
 
+    @cache_response(Cashback, TransactionType)
     def get(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
@@ -169,6 +274,7 @@ class CardTypeListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = CardType.objects.all()
     serializer_class = serializers.CardTypeCreateUpdateSerializer
 
+    @cache_response(CardType, Cashback)
     def get(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
@@ -205,6 +311,7 @@ class CardDesignListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = CardDesign.objects.all()
     serializer_class = serializers.CardDesignSerializer
 
+    @cache_response(CardDesign)
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
@@ -231,7 +338,7 @@ class CardDesignRetriveUpdateDeleteAPI(RetrieveModelMixin,
 
 class CardListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = Card.objects.all().select_related(
-        'bank_account', 'card_type', 'design'
+        'bank_account__balance', 'card_type', 'design'
     ).prefetch_related('card_type__cashbacks')
     serializer_class = serializers.CardCreateUpdateSerializer
 
@@ -252,7 +359,7 @@ class CardRetriveUpdateDeleteAPI(RetrieveModelMixin,
                                  UpdateModelMixin,
                                  DestroyModelMixin,
                                  GenericAPIView):
-    queryset = Card.objects.all()
+    queryset = Card.objects.all().select_related('bank_account__balance')
     serializer_class = serializers.CardCreateUpdateSerializer
 
     def get(self, request, *args, **kwargs):
@@ -265,16 +372,13 @@ class CardRetriveUpdateDeleteAPI(RetrieveModelMixin,
 
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
-        bank_account = instance.bank_account
-        with transaction.atomic():
-            instance.delete()
-            bank_account.delete()
+        delete_with_journal_check(instance, instance.bank_account)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class DepositListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
-    queryset = Deposit.objects.all().select_related('bank_account')
+    queryset = Deposit.objects.all().select_related('bank_account__balance')
     serializer_class = serializers.DepositCreateUpdateSerializer
 
     def get(self, request, *args, **kwargs):
@@ -294,7 +398,7 @@ class DepositRetriveUpdateDeleteAPI(RetrieveModelMixin,
                                     UpdateModelMixin,
                                     DestroyModelMixin,
                                     GenericAPIView):
-    queryset = Deposit.objects.all()
+    queryset = Deposit.objects.all().select_related('bank_account__balance')
     serializer_class = serializers.DepositCreateUpdateSerializer
 
     def get(self, request, *args, **kwargs):
@@ -307,60 +411,136 @@ class DepositRetriveUpdateDeleteAPI(RetrieveModelMixin,
 
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
-        bank_account = instance.bank_account
-        with transaction.atomic():
-            instance.delete()
-            bank_account.delete()
+        delete_with_journal_check(instance, instance.bank_account)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # Api views for user's transactions, cards, deposits
 class UserTransactionListAPI(ListModelMixin, GenericAPIView):
+    """
+    История операций пользователя одним запросом к бд по всем его счетам.
+    Query params: direction (all, outgoing, incoming), date_from, date_to,
+    transaction_type; результат отдается страницами через курсор.
+    """
+
     serializer_class = serializers.TransactionSerializer
+    pagination_class = TransactionPagination
 
     def get(self, request, user_pk=None, *args, **kwargs):
-        if user_pk is None:
-            user = request.user
-        elif user_pk == request.user.pk:
-            user = request.user
-        else:
-            try:
-                user = USER_MODEL.objects.get(pk=user_pk)
-            except:
-                return Response(
-                    {'non_field_errors': 'Передан неверный id пользователя.'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        queryset_outgoing, queryset_incoming = self.filter_queryset(
-            self.get_queryset(user)
-        )
+        user = self.get_user(request, user_pk)
+        if user is None:
+            return Response(
+                {'non_field_errors': 'Передан неверный id пользователя.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        serializer_outgoing = self.get_serializer(queryset_outgoing, many=True)
-        serializer_incoming = self.get_serializer(queryset_incoming, many=True)
+        queryset = self.get_queryset(user, **self.get_filter_params(request))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
 
-        return Response({
-            'transaction_outgoing': serializer_outgoing.data,
-            'transaction_incoming': serializer_incoming.data
-        })
+    def get_user(self, request, user_pk=None):
+        if user_pk is None or user_pk == request.user.pk:
+            return request.user
+        try:
+            return USER_MODEL.objects.get(pk=user_pk)
+        except USER_MODEL.DoesNotExist:
+            return None
 
-    def get_queryset(self, user=None):
+    def get_filter_params(self, request):
+        filter_serializer = serializers.TransactionHistoryFilterSerializer(
+            data=request.query_params
+        )
+        filter_serializer.is_valid(raise_exception=True)
+        return filter_serializer.validated_data
+
+    def get_queryset(self, user=None, direction='all', date_from=None,
+                     date_to=None, transaction_type=None):
         if user is None:
-            return None
+            return Transaction.objects.none()
+
+        # Подзапрос вместо списка pk - счета пользователя не загружаются в память
+        user_bank_accounts = BankAccount.objects.filter(user=user).values('pk')
+        outgoing = Q(from_number__in=user_bank_accounts)
+        incoming = Q(to_number__in=user_bank_accounts)
+        queryset = Transaction.objects.filter({
+            'all': outgoing | incoming,
+            'outgoing': outgoing,
+            'incoming': incoming,
+        }[direction])
+
+        if date_from is not None:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date__lte=date_to)
+        if transaction_type is not None:
+            queryset = queryset.filter(transaction_type=transaction_type)
+
+        return queryset.select_related(
+            'from_number', 'to_number', 'transaction_type'
+        )
+
+
+class UserTransactionExportAPI(UserTransactionListAPI):
+    """
+    Выписка по операциям пользователя потоком CSV или NDJSON
+    (?format=csv|ndjson), с теми же фильтрами, что и история операций.
+    """
 
-        transaction_outgoing = []
-        transaction_incoming = []
-        bank_accounts = user.bankaccount_set.all().prefetch_related(
-            'transaction_from', 'transaction_from__transaction_type',
-            'transaction_from__from_number', 'transaction_from__to_number',
-            'transaction_to', 'transaction_to__transaction_type',
-            'transaction_to__from_number', 'transaction_to__to_number'
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    pagination_class = None
+
+    def get(self, request, user_pk=None, *args, **kwargs):
+        user = self.get_user(request, user_pk)
+        if user is None:
+            return Response(
+                {'non_field_errors': 'Передан неверный id пользователя.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Транзакции подгружаются уже во время отдачи ответа, порциями
+        queryset = self.get_queryset(user, **self.get_filter_params(request))
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                list(exports.TRANSACTION_EXPORT_FIELDS),
+                exports.iter_transaction_rows(queryset)
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="statement_{user.pk}.{renderer.format}"'
         )
-        for bank_account in bank_accounts:
-            transaction_outgoing += list(bank_account.transaction_from.all())
-            transaction_incoming += list(bank_account.transaction_to.all())
+        return response
 
-        return transaction_outgoing, transaction_incoming
+
+class UserSummaryAPI(GenericAPIView):
+    """
+    Сводка по счетам пользователя: суммы по валютам, число карт и вкладов,
+    заблокированных карт и кэшбэк. Ответ кэшируется на USER_SUMMARY_CACHE_TTL
+    и сбрасывается сигналами при изменении счетов и балансов пользователя.
+    """
+
+    serializer_class = serializers.UserSummarySerializer
+
+    def get(self, request, user_pk=None, *args, **kwargs):
+        user_pk = request.user.pk if user_pk is None else user_pk
+        cache_key = summary.get_user_summary_cache_key(user_pk)
+        data = cache.get(cache_key)
+        if data is None:
+            user_summary = summary.get_user_summary(user_pk)
+            if user_summary is None:
+                return Response(
+                    {'non_field_errors': 'Передан неверный id пользователя.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            data = self.get_serializer(user_summary).data
+            cache.set(cache_key, data, settings.USER_SUMMARY_CACHE_TTL)
+        return Response(data)
 
 
 class UserCardListAPI(ListModelMixin, GenericAPIView):
@@ -390,7 +570,7 @@ class UserCardListAPI(ListModelMixin, GenericAPIView):
 
     def get_queryset(self, user=None):
         return Card.objects.filter(bank_account__user=user).select_related(
-            'bank_account', 'card_type', 'design'
+            'bank_account__balance', 'card_type', 'design'
         ).prefetch_related('card_type__cashbacks')
 
 
@@ -400,4 +580,4 @@ class UserDepositListAPI(UserCardListAPI):
     def get_queryset(self, user=None):
         return Deposit.objects.filter(
             bank_account__user=user
-        ).select_related('bank_account')
+        ).select_related('bank_account__balance')
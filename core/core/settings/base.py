@@ -1,5 +1,6 @@
 """
-Django settings for core project.
+Django settings for core project, common for all profiles.
+Profiles: core.settings.dev (manage.py) and core.settings.prod (wsgi, asgi).
 
 Generated by 'django-admin startproject' using Django 4.1.1.
 
@@ -12,9 +13,10 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 # Quick-start development settings - unsuitable for production
@@ -27,7 +29,8 @@ SECRET_KEY = os.environ.get(
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.environ.get('DEBUG', True)
+# Only DEBUG=1 turns it on, DEBUG=0 or DEBUG=False keep it off
+DEBUG = os.environ.get('DEBUG', '0') == '1'
 
 ALLOWED_HOSTS = os.environ.get(
     'DJANGO_ALLOWED_HOSTS',
@@ -47,7 +50,6 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'phonenumber_field',
-    'debug_toolbar',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -56,9 +58,12 @@ INSTALLED_APPS = [
     'bank.apps.BankConfig',
 ]
 
+# Debug toolbar is installed by core.settings.dev only
+DEBUG_TOOLBAR = False
+
 MIDDLEWARE = [
+    'bank.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -159,31 +164,80 @@ AUTH_USER_MODEL = 'user.User'
 
 
 REST_FRAMEWORK = {
+    # BasicAuthentication (password hash check) - only in LoginAPIView
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'user.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    'DEFAULT_PAGINATION_CLASS': 'bank.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 100)),
 }
 
+# Upper bound for ?page_size= on list endpoints
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 1000))
+
+# Seconds a token -> user lookup is cached (user.authentication)
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60))
+
+# Seconds a user summary is cached, changes evict it earlier (bank.summary)
+USER_SUMMARY_CACHE_TTL = int(os.environ.get('USER_SUMMARY_CACHE_TTL', 300))
+
 
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# Request latency and DB query metrics per url name (bank.metrics),
+# exported in Prometheus format on /metrics for METRICS_ALLOWED_IPS only
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_ALLOWED_IPS = os.environ.get(
+    'METRICS_ALLOWED_IPS', ' '.join(INTERNAL_IPS)
+).split(' ')
+# Directory shared by the workers of one host: each worker flushes its metrics
+# there at most every METRICS_FLUSH_INTERVAL seconds and /metrics sums them up.
+# Empty - every worker exports only its own metrics
+METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+
 PHONENUMBER_DEFAULT_REGION = 'RU'
 
 
+# locmem - per process, file - shared by all workers on one host, dummy - off
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'star-bank',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'star_bank_cache')
+        ),
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
 CACHES = {
-    'default': {
-         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-     }
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
 }
 
+# Share cashback rate table between gunicorn workers through CACHES
+CASHBACK_RATES_SHARED_CACHE = os.environ.get('CASHBACK_RATES_SHARED_CACHE', '0') == '1'
+
+# Serve read-heavy endpoints with async views (bank.async_views), for ASGI
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '0') == '1'
+
+# Idempotency-Key lifetime in seconds, expired keys are removed by
+# manage.py cleanup_idempotency_keys
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
 ACCESS_CONTROL_ALLOW_ORIGIN = '*'
 
 
@@ -193,11 +247,3 @@ CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
     # 'http://127.0.0.1:3000',
 ]
-
-# To display debug_toolbar in docker
-def show_toolbar(request):
-    return True
-
-DEBUG_TOOLBAR_CONFIG = {
-    'SHOW_TOOLBAR_CALLBACK': show_toolbar,
-}
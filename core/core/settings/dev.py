@@ -0,0 +1,34 @@
+"""
+Development profile: manage.py runserver, tests.
+"""
+
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+
+DEBUG = os.environ.get('DEBUG', '1') == '1'
+
+# Debug toolbar collects SQL and templates for every request,
+# DEBUG_TOOLBAR=0 turns it off for benchmarks
+DEBUG_TOOLBAR = os.environ.get('DEBUG_TOOLBAR', '1') == '1'
+
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS = [*INSTALLED_APPS, 'debug_toolbar']
+    cors_index = MIDDLEWARE.index('corsheaders.middleware.CorsMiddleware')
+    MIDDLEWARE = [
+        *MIDDLEWARE[:cors_index + 1],
+        'debug_toolbar.middleware.DebugToolbarMiddleware',
+        *MIDDLEWARE[cors_index + 1:],
+    ]
+
+
+# To display debug_toolbar in docker
+def show_toolbar(request):
+    return True
+
+
+DEBUG_TOOLBAR_CONFIG = {
+    'SHOW_TOOLBAR_CALLBACK': show_toolbar,
+}
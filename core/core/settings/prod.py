@@ -0,0 +1,62 @@
+"""
+Production profile: gunicorn core.wsgi / core.asgi.
+"""
+
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import ASYNC_READ_VIEWS, CACHE_BACKENDS, DATABASES, TEMPLATES
+
+
+# Not taken from the environment - DEBUG keeps every SQL query in memory
+DEBUG = False
+
+# Persistent DB connections, reused by the worker between requests
+# and checked before reuse after a DB restart.
+# Under ASGI (ASYNC_READ_VIEWS) sync ORM code runs in executor threads and
+# every thread keeps its own connection, so persistent connections pile up
+# past the postgres max_connections - they are closed after each request
+# unless CONN_MAX_AGE is set explicitly.
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': int(
+            os.environ.get('CONN_MAX_AGE', 0 if ASYNC_READ_VIEWS else 60)
+        ),
+        'CONN_HEALTH_CHECKS': True,
+    },
+}
+
+# Templates (admin, swagger-ui) are compiled once per process
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Cache shared by all workers on the host instead of per process locmem
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+# Several gunicorn workers: cashback rate changes made in one worker must
+# reach the others through the shared cache above
+CASHBACK_RATES_SHARED_CACHE = os.environ.get('CASHBACK_RATES_SHARED_CACHE', '1') == '1'
+
+# Several workers answer /metrics: counters are summed over all of them
+# (the directory is cleared by entrypoint.sh on container start)
+METRICS_MULTIPROCESS_DIR = os.environ.get(
+    'METRICS_MULTIPROCESS_DIR', '/tmp/star_bank_metrics'
+)
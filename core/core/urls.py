@@ -13,6 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
@@ -21,7 +22,8 @@ from rest_framework.schemas import get_schema_view
 from rest_framework.permissions import AllowAny
 from rest_framework.schemas.openapi import SchemaGenerator
 
-from .views import redirect_to_root, RootAPI
+from bank.metrics import metrics_view
+from .views import redirect_to_root, RootAPI, RootAsyncAPI
 
 
 class TOSSchemaGenerator(SchemaGenerator):
@@ -50,12 +52,20 @@ urlpatterns = [
         extra_context={'schema_url': 'openapi-schema'},
     ), name='swagger-ui'),
 
-    path('__debug__/', include('debug_toolbar.urls')),
+    # Prometheus metrics, see bank.metrics
+    path('metrics', metrics_view, name='metrics'),
 
     path('api/v1/auth/', include('user.auth_urls')),
 
-    path('api/v1/', RootAPI.as_view(), name='root'),
+    path(
+        'api/v1/',
+        (RootAsyncAPI if settings.ASYNC_READ_VIEWS else RootAPI).as_view(),
+        name='root'
+    ),
 
     path('api/v1/', include('bank.urls')),
     path('api/v1/', include('user.urls')),
 ]
+
+if settings.DEBUG_TOOLBAR:
+    urlpatterns.append(path('__debug__/', include('debug_toolbar.urls')))
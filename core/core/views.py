@@ -4,13 +4,17 @@ from django.shortcuts import redirect
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from bank.async_views import AsyncAPIView
+
 
 def redirect_to_root(request):
     return redirect('root')
 
 
-class RootAPI(APIView):
-    def get(self, request, *args, **kwargs):
+class RootAPIMixin:
+    """Ссылки на все разделы api, общие для sync и async RootAPI."""
+
+    def get_api_mapping(self):
         api_mapping = {
             'swagger-ui': self.get_full_url('swagger-ui'),
             'user': self.get_full_url('user'),
@@ -18,6 +22,7 @@ class RootAPI(APIView):
             'bank_account': self.get_full_url('bank_account'),
             'transaction_type': self.get_full_url('transaction_type'),
             'transaction': self.get_full_url('transaction'),
+            'transaction_bulk': self.get_full_url('transaction_bulk'),
             'cashback': self.get_full_url('cashback'),
             'card_type': self.get_full_url('card_type'),
             'card_design': self.get_full_url('card_design'),
@@ -25,15 +30,28 @@ class RootAPI(APIView):
             'deposit': self.get_full_url('deposit'),
             'my_transaction': self.get_full_url('my_transaction'),
             'user_transaction': self.get_full_url('user_transaction', user_pk=1),
+            'user_transaction_export': self.get_full_url(
+                'user_transaction_export', user_pk=1
+            ),
             'my_card': self.get_full_url('my_card'),
             'user_card': self.get_full_url('user_card', user_pk=1),
             'my_deposit': self.get_full_url('my_deposit'),
             'user_deposit': self.get_full_url('user_deposit', user_pk=1),
         }
-        return Response(api_mapping)
+        return api_mapping
 
     def get_full_url(self, url_name, **kwargs):
         host = self.request.get_host()
         scheme = self.request.scheme
         url = reverse(url_name, kwargs={**kwargs})
         return f'{scheme}://{host}{url}'
+
+
+class RootAPI(RootAPIMixin, APIView):
+    def get(self, request, *args, **kwargs):
+        return Response(self.get_api_mapping())
+
+
+class RootAsyncAPI(RootAPIMixin, AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        return self.render(self.get_api_mapping())
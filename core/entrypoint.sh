@@ -6,5 +6,10 @@ then
   python manage.py migrate
 fi
 
+# Metrics files of the previous run (bank.metrics)
+if [ -n "$METRICS_MULTIPROCESS_DIR" ]
+then
+  rm -rf "$METRICS_MULTIPROCESS_DIR"
+fi
 
 exec "$@"
\ No newline at end of file
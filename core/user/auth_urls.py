@@ -1,7 +1,8 @@
 from django.urls import path
-from .auth_views import LoginAPIView
+from .auth_views import LoginAPIView, LogoutAPIView
 
 
 urlpatterns = [
     path('login/', LoginAPIView.as_view(), name='login'),
+    path('logout/', LogoutAPIView.as_view(), name='logout'),
 ]
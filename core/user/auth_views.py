@@ -1,6 +1,7 @@
-from django.contrib.auth import login, get_user_model
+from django.contrib.auth import login, logout, get_user_model
 
 from rest_framework import status
+from rest_framework.authentication import BasicAuthentication
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
@@ -13,6 +14,8 @@ USER_MODEL = get_user_model()
 
 
 class LoginAPIView(APIView):
+    # Проверка пароля дорогая, поэтому Basic auth только здесь
+    authentication_classes = (BasicAuthentication, )
     permission_classes = (AllowAny, )
 
     def post(self, request, *args, **kwargs):
@@ -35,6 +38,16 @@ class LoginAPIView(APIView):
         return Response({'token': token.key, 'user': user_serializer.data})
 
 
+class LogoutAPIView(APIView):
+    def post(self, request, *args, **kwargs):
+        # Старый токен удаляется (и сбрасывается из кэша аутентификации),
+        # следующий вход получит новый
+        Token.objects.filter(user=request.user).delete()
+        Token.objects.create(user=request.user)
+        logout(request)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # API for SessionAuth
 # class LoginAPIView(GenericAPIView):
 #     serializer_class = UserLoginSerializer
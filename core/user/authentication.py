@@ -0,0 +1,73 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+TOKEN_KEY = 'user:token:{digest}'
+
+
+def get_token_cache_key(key):
+    # В ключе кэша не хранится сам токен
+    return TOKEN_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+
+
+def evict_tokens(keys):
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    if cache_keys:
+        # Повторный сброс после commit - для запросов, успевших закэшировать
+        # еще не закоммиченные данные пользователя.
+        cache.delete_many(cache_keys)
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def evict_user_tokens(user):
+    evict_tokens(Token.objects.filter(user_id=user.pk).values_list('key', flat=True))
+
+
+def get_cached_user(user):
+    """
+    Копия user для кэша без хэша пароля: поле password становится
+    отложенным (загружается из бд при обращении), а save() без update_fields
+    сохраняет только загруженные поля и не затирает пароль. Связанные
+    объекты (в том числе обратная ссылка на Token) в кэш не попадают.
+    """
+    user = copy.copy(user)
+    del user.__dict__['password']
+    user._state.fields_cache = {}
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кэшированием пользователя токена на
+    AUTH_TOKEN_CACHE_TTL секунд: повторные запросы с тем же токеном
+    аутентифицируются без запроса к бд. В кэше (в prod - файлы на диске)
+    нет ни самого токена, ни хэша пароля пользователя: Token собирается
+    заново из ключа запроса, password у закэшированного User отложен.
+    Кэш сбрасывается сигналами (user.signals) при изменении или удалении
+    пользователя и токена, в том числе при выходе (LogoutAPIView).
+    С locmem кэшем сброс виден только текущему процессу, в остальных
+    воркерах запись устаревает через AUTH_TOKEN_CACHE_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            # Неактивные пользователи не кэшируются - super() их отклоняет
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key,
+                (get_cached_user(user), token.created),
+                settings.AUTH_TOKEN_CACHE_TTL
+            )
+            return user, token
+
+        user, created = cached
+        return user, Token(key=key, user=user, created=created)
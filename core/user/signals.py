@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from rest_framework.authtoken.models import Token
 
+from .authentication import evict_tokens, evict_user_tokens
+
 
 USER_MODEL = get_user_model()
 
@@ -12,3 +14,17 @@ USER_MODEL = get_user_model()
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+# Кэш аутентификации (authentication.CachedTokenAuthentication)
+@receiver(post_save, sender=USER_MODEL)
+@receiver(post_delete, sender=USER_MODEL)
+def user_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        evict_user_tokens(instance)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    evict_tokens([instance.key])
@@ -7,6 +7,8 @@ from rest_framework.mixins import (
 )
 from rest_framework.generics import GenericAPIView
 
+from bank.cache import cache_response
+from bank.journal import delete_with_journal_check
 from bank.response import Response
 from .models import User, AccountTarif
 from . import serializers
@@ -47,11 +49,16 @@ class UserRetriveUpdateDeleteAPI(RetrieveModelMixin,
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        # Счета пользователя удаляются каскадом, если у них нет проводок
+        delete_with_journal_check(instance)
+
 
 class AccountTarifListCreateAPI(ListModelMixin, CreateModelMixin, GenericAPIView):
     queryset = AccountTarif.objects.all()
     serializer_class = serializers.AccountTarifSerializer
 
+    @cache_response(AccountTarif)
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 